@@ -1,15 +1,138 @@
 import { emitter, E } from "./env/events.js";
 import { data, API_SETTINGS, GRAPH_CONFIG, Article } from "./env/data.js";
 
-const request = (method, url, payload, rawPayload = false) => {
+/**
+ * Media types of /api/graph responses, see server/data/wire.py
+ */
+const GRAPH_FORMATS = Object.freeze({
+    V1: 'application/json',
+    V2_JSON: 'application/vnd.comex.graph.v2+json',
+    V2_BINARY: 'application/vnd.comex.graph.v2+octet-stream'
+});
+
+const TYPED_ARRAYS = Object.freeze({
+    int32: Int32Array,
+    float64: Float64Array
+});
+
+/**
+ * Expands a sparse column ({idx, val}, idx is left out if there are no nulls) to one value (or null) per entry.
+ */
+const expandSparse = (column, length) => {
+    let values = new Array(length).fill(null);
+    if (!column)
+        return values;
+    if (!column.idx) {
+        for (let i = 0; i < length; i++)
+            values[i] = column.val[i];
+    } else {
+        for (let i = 0; i < column.idx.length; i++)
+            values[column.idx[i]] = column.val[i];
+    }
+    return values;
+};
+
+const expandWeights = (wgts, keys, length) => {
+    let columns = keys.map(key => expandSparse(wgts[key], length));
+    let weights = new Array(length);
+    for (let i = 0; i < length; i++) {
+        weights[i] = {};
+        keys.forEach((key, k) => weights[i][key] = columns[k][i]);
+    }
+    return weights;
+};
+
+const SPLIT_WEIGHTS = ['SIZE', 'PAGERANK', 'DEGREE_CENTRALITY', 'RECENCY', 'VOTES', 'TOXICITY', 'MERGE_ID', 'CLUSTER_ID'];
+const EDGE_WEIGHTS = ['REPLY_TO', 'SAME_ARTICLE', 'SIMILARITY', 'SAME_GROUP', 'SAME_COMMENT', 'TEMPORAL'];
+
+/**
+ * Edge groups (see server/data/processors/implicit.py) in the structure of the v1 JSON response:
+ * an implicit edge with weight {tp: wgt} between every two nodes of a group, unless the pair has an edge
+ * or is excluded. They are kept as groups, not expanded into edges.
+ */
+const decodeGroups = (g) => {
+    let groups = new Array(g.tp.length);
+    for (let i = 0; i < groups.length; i++) {
+        let nodes = [], excluded = [];
+        for (let j = g.node_offsets[i]; j < g.node_offsets[i + 1]; j++)
+            nodes.push([g.node_comment[j], g.node_split[j]]);
+        for (let j = g.excluded_offsets[i]; j < g.excluded_offsets[i + 1]; j++)
+            excluded.push([[g.excluded_src_comment[j], g.excluded_src_split[j]],
+                [g.excluded_tgt_comment[j], g.excluded_tgt_split[j]]]);
+        groups[i] = {tp: g.tp[i], wgt: g.wgt[i], nodes: nodes, excluded: excluded};
+    }
+    return groups;
+};
+
+/**
+ * Turns the struct of arrays graph (v2) back into the structure of the v1 JSON response.
+ */
+const decodeGraphV2 = (g) => {
+    let splitWeights = expandWeights(g.splits.wgts, SPLIT_WEIGHTS, g.splits.s.length);
+    let grpIds = expandSparse(g.comments.grp_id, g.comments.id.length);
+    let comments = new Array(g.comments.id.length);
+    for (let i = 0; i < comments.length; i++) {
+        let splits = [];
+        for (let j = g.comments.split_offsets[i]; j < g.comments.split_offsets[i + 1]; j++)
+            splits.push({s: g.splits.s[j], e: g.splits.e[j], wgts: splitWeights[j]});
+        comments[i] = {id: g.comments.id[i], grp_id: grpIds[i], splits: splits};
+    }
+
+    let id2idx = {};
+    for (let i = 0; i < g.id2idx.id.length; i++)
+        id2idx[g.id2idx.id[i]] = g.id2idx.idx[i];
+
+    let numEdges = g.edges.src_comment.length;
+    let edgeWeights = expandWeights(g.edges.wgts, EDGE_WEIGHTS, numEdges);
+    let edges = new Array(numEdges);
+    for (let i = 0; i < numEdges; i++)
+        edges[i] = {
+            src: [g.edges.src_comment[i], g.edges.src_split[i]],
+            tgt: [g.edges.tgt_comment[i], g.edges.tgt_split[i]],
+            wgts: edgeWeights[i]
+        };
+    let groups = g.groups ? decodeGroups(g.groups) : [];
+
+    return {article_ids: g.article_ids, graph_id: g.graph_id, comments: comments, id2idx: id2idx, edges: edges,
+        groups: groups};
+};
+
+/**
+ * Binary v2: "CXG2", uint32 header length, JSON header, buffers. Arrays in the header are
+ * references {"$": [dtype, byteOffset, length]} into the 8 byte aligned buffers.
+ */
+const decodeGraphBinary = (buffer) => {
+    let view = new DataView(buffer);
+    let headerLength = view.getUint32(4, true);
+    let header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    let start = 8 + headerLength;
+    const resolve = (node) => {
+        if (node === null || typeof node !== 'object' || Array.isArray(node))
+            return node;
+        if (node.$)
+            return new TYPED_ARRAYS[node.$[0]](buffer, start + node.$[1], node.$[2]);
+        return Object.fromEntries(Object.entries(node).map(([k, v]) => [k, resolve(v)]));
+    };
+    return decodeGraphV2(resolve(header));
+};
+
+const request = (method, url, payload, rawPayload = false, accept = 'application/json, text/plain') => {
     return new Promise(function (resolve, reject) {
         let xhttp = new XMLHttpRequest();
         xhttp.onreadystatechange = function () {
             if (this.readyState === 4) {
                 if (this.status === 200) {
-                    let r = this.responseText;
-                    if (this.getResponseHeader("Content-Type") === 'application/json')
+                    let contentType = (this.getResponseHeader("Content-Type") || '').split(';')[0];
+                    if (contentType === GRAPH_FORMATS.V2_BINARY) {
+                        resolve(decodeGraphBinary(this.response));
+                        return;
+                    }
+                    let r = this.responseType === 'arraybuffer' ?
+                        new TextDecoder().decode(this.response) : this.responseText;
+                    if (contentType === 'application/json')
                         r = JSON.parse(r);
+                    else if (contentType === GRAPH_FORMATS.V2_JSON)
+                        r = decodeGraphV2(JSON.parse(r));
                     resolve(r);
                 } else {
                     reject('FAIL');
@@ -17,17 +140,44 @@ const request = (method, url, payload, rawPayload = false) => {
             }
         };
         xhttp.open(method, url, true);
-        xhttp.setRequestHeader('Accept', 'application/json');
-        xhttp.setRequestHeader('Accept', 'text/plain');
+        xhttp.setRequestHeader('Accept', accept);
+        if (accept.includes(GRAPH_FORMATS.V2_BINARY))
+            xhttp.responseType = 'arraybuffer';
         xhttp.send(rawPayload ? payload : JSON.stringify(payload));
     });
 };
 
+/**
+ * Reads a newline delimited JSON response as it arrives and calls onLine for every parsed line.
+ */
+const streamNDJSON = (method, url, payload, onLine) => {
+    return fetch(url, {
+        method: method,
+        headers: {'Accept': 'application/x-ndjson', 'Content-Type': 'application/json'},
+        body: JSON.stringify(payload)
+    }).then(async (response) => {
+        if (!response.ok)
+            throw 'FAIL';
+        let reader = response.body.getReader();
+        let decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            let {done, value} = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), {stream: !done});
+            let lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.length > 0).forEach(line => onLine(JSON.parse(line)));
+            if (done)
+                break;
+        }
+    });
+};
+
 const GET = (url) =>
     request('GET', url);
 
-const POST = (url, payload, rawPayload = false) =>
-    request('POST', url, payload, rawPayload);
+const POST = (url, payload, rawPayload = false, accept = undefined) =>
+    request('POST', url, payload, rawPayload, accept);
 
 /**
  * This should be a 1:1 copy of the API as specified in the openapi.json
@@ -73,7 +223,23 @@ const _api = Object.freeze({
                 article_ids: articleIds,
                 urls: urls,
                 conf: conf
-            });
+            }, false, `${GRAPH_FORMATS.V2_BINARY}, ${GRAPH_FORMATS.V2_JSON};q=0.9, ${GRAPH_FORMATS.V1};q=0.8`);
+        },
+        '/api/graph/stream': (articleIds, urls, overrideCache, ignoreCache, conf, onLine) => {
+            let query = '/api/graph/stream';
+            let params = [];
+            if (overrideCache)
+                params.push('override_cache=true');
+            if (ignoreCache)
+                params.push('ignore_cache=true');
+            if (params.length > 0)
+                query += '?' + params.join('&');
+
+            return streamNDJSON('POST', query, {
+                article_ids: articleIds,
+                urls: urls,
+                conf: conf
+            }, onLine);
         }
     }
 });
@@ -139,15 +305,51 @@ class Api {
     getGraph(articleIds, conf) {
         if (!conf)
             conf = GRAPH_CONFIG;
+        if (API_SETTINGS.GRAPH_STREAM)
+            return this.getGraphStream(articleIds, conf);
         _api.POST["/api/graph/"](articleIds, null,
             API_SETTINGS.GRAPH_OVERRIDE_CACHE,
             API_SETTINGS.GRAPH_IGNORE_CACHE, conf).then(d => {
-            emitter.emit(E.GRAPH_RECEIVED, d.graph_id, d.comments, d.id2idx, d.edges);
+            emitter.emit(E.GRAPH_RECEIVED, d.graph_id, d.comments, d.id2idx, d.edges, d.groups || []);
         }).catch((e) => {
             console.error(e);
             emitter.emit(E.GRAPH_REQUEST_FAILED, e);
         });
     }
+
+    getGraphStream(articleIds, conf) {
+        let graphId = null;
+        let comments = [];
+        let id2idx = {};
+        let nodesSent = false;
+        const sendNodes = () => {
+            if (!nodesSent)
+                emitter.emit(E.GRAPH_NODES_RECEIVED, graphId, comments, id2idx);
+            nodesSent = true;
+        };
+        _api.POST["/api/graph/stream"](articleIds, null,
+            API_SETTINGS.GRAPH_OVERRIDE_CACHE,
+            API_SETTINGS.GRAPH_IGNORE_CACHE, conf, (line) => {
+                if (line.type === 'meta') {
+                    graphId = line.graph_id;
+                    id2idx = line.id2idx;
+                } else if (line.type === 'comments') {
+                    line.comments.forEach(c => comments.push(c));
+                } else if (line.type === 'edges') {
+                    sendNodes();
+                    emitter.emit(E.GRAPH_EDGES_RECEIVED, line.edges);
+                } else if (line.type === 'groups') {
+                    sendNodes();
+                    emitter.emit(E.GRAPH_GROUPS_RECEIVED, line.groups);
+                } else if (line.type === 'end') {
+                    sendNodes();
+                    emitter.emit(E.GRAPH_STREAM_END);
+                }
+            }).catch((e) => {
+            console.error(e);
+            emitter.emit(E.GRAPH_REQUEST_FAILED, e);
+        });
+    }
 }
 
 
@@ -18,13 +18,15 @@ class Comments {
                     text: data.getCommentText(commentId, j),
                     wgts: split.wgts,
                     comexVotes: 0,
-                    cluster: split.wgts.CLUSTER_ID //|| split.wgts.MERGE_ID
+                    cluster: split.wgts.CLUSTER_ID, //|| split.wgts.MERGE_ID
+                    edgeGroups: []
                 });
                 this.lookup[commentId].push(counter);
                 counter++;
             });
         });
-        console.log(`Initialising drawing with ${this.splits.length} nodes/splits and ${data.edges.length} edges.`)
+        console.log(`Initialising drawing with ${this.splits.length} nodes/splits, ${data.edges.length} edges ` +
+            `and ${data.edgeGroups.length} edge groups.`)
 
         const clusterCounts = this.splits.map(split=>split.cluster).reduce((acc, cid) => {
             if (!(cid in acc)) acc[cid] = 0
@@ -56,6 +58,22 @@ class Comments {
             }
         });
 
+        // every node knows its edge groups, a group is drawn as a star from its first node
+        // instead of an implicit edge between every two of its nodes
+        const node = ([comment, split]) => this.splits[this.lookup[data.idx2id[comment]][split]];
+        data.edgeGroups.forEach((group, g) => {
+            let nodes = group.nodes.map(node);
+            nodes.forEach(split => split.edgeGroups.push(g));
+            nodes.slice(1).forEach((split, i) => this.edges.push({
+                source: nodes[0],
+                target: split,
+                weights: {[group.tp]: group.wgt},
+                src: group.nodes[0],
+                tgt: group.nodes[i + 1],
+                group: g
+            }));
+        });
+
         const colors = [CONFIG.STYLES.DEFAULT.NODE_FILL_NEG,
             CONFIG.STYLES.DEFAULT.NODE_FILL,
             CONFIG.STYLES.DEFAULT.NODE_FILL_POS];
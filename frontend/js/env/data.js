@@ -329,7 +329,10 @@ const GRAPH_CONFIG = {
 
 const API_SETTINGS = {
     GRAPH_OVERRIDE_CACHE: false,
-    GRAPH_IGNORE_CACHE: false
+    GRAPH_IGNORE_CACHE: false,
+    // request /api/graph/stream and draw the nodes before all edges arrived, otherwise /api/graph/ is requested
+    // in the compact v2 format (see api.js); the stream is plain NDJSON, so it only pays off for huge graphs
+    GRAPH_STREAM: false
 };
 
 function difference(setA, setB) {
@@ -362,6 +365,8 @@ class DataStore {
     sources = {};
     id2idx = {};
     edges = [];
+    // implicit edges of the graph, see api.js decodeGroups
+    edgeGroups = [];
     groups = {};
 
     activeFilters = {
@@ -378,6 +383,10 @@ class DataStore {
         emitter.on(E.RECEIVED_ARTICLE, this.onArticleReceive.bind(this));
         emitter.on(E.RECEIVED_COMMENTS, this.onCommentsReceive.bind(this));
         emitter.on(E.GRAPH_RECEIVED, this.onGraphReceive.bind(this));
+        emitter.on(E.GRAPH_NODES_RECEIVED, this.onGraphNodesReceive.bind(this));
+        emitter.on(E.GRAPH_EDGES_RECEIVED, this.onGraphEdgesReceive.bind(this));
+        emitter.on(E.GRAPH_GROUPS_RECEIVED, this.onGraphGroupsReceive.bind(this));
+        emitter.on(E.GRAPH_STREAM_END, this.onGraphStreamEnd.bind(this));
         emitter.on(E.DATA_UPDATED_COMMENTS, this.resetSearchIndex.bind(this));
         emitter.on(E.COMMENT_SEARCH, this.searchComments.bind(this));
         emitter.on(E.CLEAR_FILTERS, this.clearFilters.bind(this));
@@ -456,10 +465,39 @@ class DataStore {
         this.sources[article.articleId] = article;
     }
 
-    onGraphReceive(graph_id, splitComments, id2idx, edges) {
+    onGraphReceive(graph_id, splitComments, id2idx, edges, edgeGroups = []) {
+        this.setGraphNodes(splitComments, id2idx);
+        this.edges = edges;
+        this.edgeGroups = edgeGroups;
+        console.log(`Received graph with ${splitComments.length} comments, ${edges.length} edges ` +
+            `and ${edgeGroups.length} edge groups.`)
+        emitter.emit(E.REDRAW);
+    }
+
+    onGraphNodesReceive(graph_id, splitComments, id2idx) {
+        this.setGraphNodes(splitComments, id2idx);
+        this.edges = [];
+        this.edgeGroups = [];
+        console.log(`Received ${splitComments.length} comments of streamed graph.`)
+        emitter.emit(E.REDRAW);
+    }
+
+    onGraphEdgesReceive(edges) {
+        edges.forEach(edge => this.edges.push(edge));
+    }
+
+    onGraphGroupsReceive(edgeGroups) {
+        edgeGroups.forEach(group => this.edgeGroups.push(group));
+    }
+
+    onGraphStreamEnd() {
+        console.log(`Received streamed graph with ${this.edges.length} edges.`)
+        emitter.emit(E.REDRAW);
+    }
+
+    setGraphNodes(splitComments, id2idx) {
         this.id2idx = id2idx;
         this.idx2id = Object.fromEntries(Object.entries(id2idx).map(([k, v]) => [v, k]));
-        this.edges = edges;
         splitComments.forEach(splitComment => {
             this.comments[splitComment.id].group = splitComment.grp_id;
             if (!(splitComment.grp_id in this.groups)) this.groups[splitComment.grp_id] = [];
@@ -469,8 +507,6 @@ class DataStore {
             //this.comments[splitComment.id].splits = splitComment.splits.map((split) => text.substr(split.s, split.e));
             this.comments[splitComment.id].splits = splitComment.splits;
         });
-        console.log(`Received graph with ${splitComments.length} comments and ${edges.length} edges.`)
-        emitter.emit(E.REDRAW);
     }
 
     getCommentText(commentId, split) {
@@ -56,6 +56,11 @@ const E = {
     GRAPH_REQUESTED: 'GRAPH_REQUESTED', // DATA: empty
     GRAPH_REQUEST_FAILED: 'GRAPH_REQUEST_FAILED',
     GRAPH_RECEIVED: 'GRAPH_RECEIVED',
+    // streamed graph: nodes arrive first, then edges in chunks until the stream ends
+    GRAPH_NODES_RECEIVED: 'GRAPH_NODES_RECEIVED', // DATA: graph_id, split comments, id2idx
+    GRAPH_EDGES_RECEIVED: 'GRAPH_EDGES_RECEIVED', // DATA: list of edges
+    GRAPH_GROUPS_RECEIVED: 'GRAPH_GROUPS_RECEIVED', // DATA: list of edge groups (after all edges)
+    GRAPH_STREAM_END: 'GRAPH_STREAM_END', // DATA: empty
     // request to fully redraw the graph
     REDRAW: 'REDRAW',
     // request to stop the simulation
@@ -7,7 +7,7 @@ from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoin
 from starlette.requests import Request
 from starlette.responses import Response
 from common import config, get_logger_config
-from api.routes import ping, platforms, graph
+from api.routes import ping, ready, metrics, platforms, graph
 import uvicorn
 import json
 import time
@@ -34,6 +34,8 @@ class APISubRouter:
         self.router = APIRouter()
         self.paths = {
             '/ping': ping,
+            '/ready': ready,
+            '/metrics': metrics,
             '/platforms': platforms,
             '/graph': graph
         }
@@ -62,6 +64,7 @@ class Server:
 
         self.app.mount('/', StaticFiles(directory='../frontend', html=True), name='static')
 
+    def run(self):
         uvicorn.run(self.app, host=config.get('server', 'host'), port=config.getint('server', 'port'),
                     log_config=get_logger_config())
 
@@ -79,6 +82,9 @@ class TimingMiddleware(BaseHTTPMiddleware):
 
         response.headers['X-CPU-Time'] = f'{used_cpu_time:.8f}s'
         response.headers['X-WallTime'] = f'{used_time:.8f}s'
+        # next to the spans routes may report, see data.processors.tracing
+        response.headers.append('Server-Timing',
+                                f'total;dur={used_time * 1000:.3f}, cpu;dur={used_cpu_time * 1000:.3f}')
 
         request.scope['timing_stats'] = {
             'cpu_time': f'{used_cpu_time:.8f}s',
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, WebSocket, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from common import init_logging, except2str
 from pydantic import HttpUrl
 from data.models import Graph, GraphConfig
 import data.models as m
 from typing import List, Optional
 import data.cache as cache
+import data.jobs as jobs
+import data.wire as wire
+from data.processors import explain
+from data.processors.tracing import Tracer
 import functools
+import json
 
 logger = init_logging('comex.api.route.graph')
 logger.debug('Setup comex.api.route.graph router')
@@ -13,11 +19,28 @@ logger.debug('Setup comex.api.route.graph router')
 router = APIRouter()
 
 
+def graph_response(graph: Graph, accept: Optional[str], response: Response, tracer: Tracer, debug: bool):
+    # spans of the build as Server-Timing header, with all details in the response if asked to debug
+    server_timing = tracer.server_timing()
+    if debug:
+        graph.debug = tracer.debug()
+    media_type = wire.negotiate(accept)
+    if media_type == wire.GRAPH_V1:
+        response.headers['Server-Timing'] = server_timing
+        return graph
+    return Response(wire.encode(graph, media_type), media_type=media_type,
+                    headers={'Vary': 'Accept', 'Server-Timing': server_timing})
+
+
 def catch_errors(func):
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         try:
             return await func(*args, **kwargs)
+        except explain.OverBudgetException as e:
+            # the estimate tells the client what makes the graph too expensive
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail={'message': str(e), 'explain': json.loads(e.explanation.json())})
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                                 detail=except2str(e, logger))
@@ -27,13 +50,131 @@ def catch_errors(func):
 
 @router.post('/', response_model=Graph)
 @catch_errors
-async def get_graph(article_ids: List[int] = None,
+async def get_graph(response: Response,
+                    article_ids: List[int] = None,
                     urls: List[HttpUrl] = None,
                     override_cache: bool = False, ignore_cache: bool = False,
-                    conf: GraphConfig = None):
+                    conf: GraphConfig = None,
+                    debug: bool = False,
+                    accept: str = Header(None)):
+    """
+    Responds with the Graph as JSON by default. Clients may ask for the compact struct of arrays format via
+    `Accept: application/vnd.comex.graph.v2+json` or its binary encoding
+    `Accept: application/vnd.comex.graph.v2+octet-stream`, see data.wire.
+    The time of every stage of the build is reported in the Server-Timing header. With `debug` the graph
+    contains a `debug` block with wall and CPU time, edges before and after and peak memory of every stage and
+    the time of every comparator.
+    """
     if conf is not None:
         conf = conf.dict(exclude_unset=True)
         logger.debug(f'Graph request included config: {conf}')
+    tracer = Tracer(memory=debug, comparators=debug)
     graph = await cache.get_graph(urls=urls, article_ids=article_ids, conf=conf,
-                                  override_cache=override_cache, ignore_cache=ignore_cache)
-    return graph
+                                  override_cache=override_cache, ignore_cache=ignore_cache, tracer=tracer)
+    return graph_response(graph, accept, response, tracer, debug)
+
+
+@router.post('/explain', response_model=m.GraphExplain)
+@catch_errors
+async def explain_graph(article_ids: List[int] = None,
+                        urls: List[HttpUrl] = None,
+                        conf: GraphConfig = None):
+    """
+    Plan of building the graph (same parameters as POST /api/graph/) without building it: the modifier stages,
+    the estimated pairs of splits compared, edges, peak memory and seconds of every stage and the whole build, and
+    whether the server admits, downgrades (see `downgrades` and `conf`) or rejects it.
+    """
+    if conf is not None:
+        conf = conf.dict(exclude_unset=True)
+    return await cache.explain_graph(urls=urls, article_ids=article_ids, conf=conf)
+
+
+@router.post('/stream', response_class=StreamingResponse)
+@catch_errors
+async def stream_graph(article_ids: List[int] = None,
+                       urls: List[HttpUrl] = None,
+                       override_cache: bool = False, ignore_cache: bool = False,
+                       conf: GraphConfig = None,
+                       chunk_size: int = 1000):
+    """
+    Streams the graph as newline delimited JSON (chunked transfer encoding): meta data first, then chunks of
+    comments (nodes) and finally chunks of edges, see data.wire.iter_ndjson.
+    """
+    if conf is not None:
+        conf = conf.dict(exclude_unset=True)
+        logger.debug(f'Graph stream request included config: {conf}')
+    tracer = Tracer()
+    lines = await cache.get_graph_stream(urls=urls, article_ids=article_ids, conf=conf,
+                                         override_cache=override_cache, ignore_cache=ignore_cache,
+                                         chunk_size=max(1, chunk_size), tracer=tracer)
+    return StreamingResponse(lines, media_type=wire.GRAPH_NDJSON,
+                             headers={'Server-Timing': tracer.server_timing()})
+
+
+@router.post('/jobs', response_model=m.GraphJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_graph_job(article_ids: List[int] = None,
+                           urls: List[HttpUrl] = None,
+                           override_cache: bool = False, ignore_cache: bool = False,
+                           conf: GraphConfig = None):
+    """
+    Builds the graph in the background, same parameters as POST /api/graph/.
+    Poll GET /api/graph/jobs/{job_id} or subscribe to /api/graph/jobs/{job_id}/ws for progress and fetch the
+    graph from GET /api/graph/jobs/{job_id}/result once the job is DONE.
+    Submitting the same articles with the same config again returns the existing job.
+    """
+    if conf is not None:
+        conf = conf.dict(exclude_unset=True)
+    try:
+        job = await jobs.queue.submit(urls=urls, article_ids=article_ids, conf=conf,
+                                      override_cache=override_cache, ignore_cache=ignore_cache)
+    except jobs.JobQueueFullException as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=except2str(e, logger))
+    return job.status(jobs.queue.position(job))
+
+
+def get_job(job_id: str) -> jobs.GraphJob:
+    job = jobs.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'No graph job {job_id}')
+    return job
+
+
+@router.get('/jobs/{job_id}', response_model=m.GraphJobStatus)
+async def get_graph_job(job_id: str):
+    job = get_job(job_id)
+    return job.status(jobs.queue.position(job))
+
+
+@router.get('/jobs/{job_id}/result', response_model=Graph)
+async def get_graph_job_result(response: Response, job_id: str, debug: bool = False, accept: str = Header(None)):
+    """
+    The graph once the job is DONE (negotiated and traced like POST /api/graph/), the job status with 202 before.
+    """
+    job = get_job(job_id)
+    if job.state == m.GraphJobState.FAILED:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=job.error)
+    if job.state != m.GraphJobState.DONE:
+        return JSONResponse(json.loads(job.status(jobs.queue.position(job)).json()),
+                            status_code=status.HTTP_202_ACCEPTED)
+    return graph_response(job.result.copy(), accept, response, job.tracer, debug)
+
+
+@router.websocket('/jobs/{job_id}/ws')
+async def graph_job_progress(websocket: WebSocket, job_id: str):
+    """
+    Sends the job status (as in GET /api/graph/jobs/{job_id}) whenever it changes and closes once it finished.
+    """
+    await websocket.accept()
+    job = jobs.queue.get(job_id)
+    if job is None:
+        await websocket.close(code=4404)
+        return
+    while True:
+        changed = job.changed
+        await websocket.send_text(job.status(jobs.queue.position(job)).json())
+        if job.is_finished:
+            break
+        await changed.wait()
+    await websocket.close()
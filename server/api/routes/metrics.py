@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from common import init_logging
+from data.metrics import REGISTRY, CONTENT_TYPE
+
+logger = init_logging('comex.api.route.metrics')
+router = APIRouter()
+
+logger.debug('Setup comex.api.route.metrics router')
+
+
+@router.get('/')
+async def _metrics():
+    """
+    Counters and histograms of graph cache, scrapers, database and graph build stages
+    in the Prometheus text format, see data.metrics.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
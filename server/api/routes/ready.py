@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette import status
+from common import init_logging, model_registry
+
+logger = init_logging('comex.api.route.ready')
+router = APIRouter()
+
+logger.debug('Setup comex.api.route.ready router')
+
+
+@router.get('/')
+async def _ready():
+    """
+    Load state and timing of all models, responds with 503 until the models configured
+    in [models] preload are loaded and warmed up.
+    """
+    ready = model_registry.is_ready
+    return JSONResponse({'ready': ready, 'models': model_registry.status()},
+                        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
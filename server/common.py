@@ -4,14 +4,14 @@ import logging
 import logging.config
 import yaml
 import math
+import threading
+import time
 import traceback
+from typing import Any, Callable, Dict, List, Optional
 from uvicorn.logging import AccessFormatter, DefaultFormatter
-from tensorflow.keras.models import load_model as load_keras_model
-from fasttext import load_model as load_fasttext_model
 
 config = None
-fasttext_model = None
-toxicity_model = None
+logger = logging.getLogger('comex.models')
 
 
 def init_config(override_args=None):
@@ -78,19 +78,148 @@ def except2str(e, logger=None):
     return f'{type(e).__name__}: {e}'
 
 
+class ModelRegistry:
+    """
+    Loads models on first use. Loaders import their (heavy) libraries themselves, so TensorFlow and fastText
+    are only imported by processes that actually need them, not by every entry point importing this module.
+    Models can be preloaded in the background at startup, `status` reports their load state and timing.
+    """
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Optional[Callable[[Any], Any]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._status: Dict[str, dict] = {}
+        self._preload: List[str] = []
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Callable[[Any], Any] = None):
+        """
+        :param name: name used to get the model
+        :param loader: returns the loaded model
+        :param warmup: runs a dummy inference on the loaded model when it is preloaded
+        """
+        self._loaders[name] = loader
+        self._warmups[name] = warmup
+        self._locks[name] = threading.Lock()
+        self._status[name] = {'state': 'not_loaded', 'load_seconds': None, 'warmup_seconds': None, 'error': None}
+
+    def get(self, name: str) -> Any:
+        if name not in self._models:
+            # graphs are built in worker threads, so make sure every model is loaded only once
+            with self._locks[name]:
+                if name not in self._models:
+                    self._models[name] = self._timed(name, 'load_seconds', 'loading', self._loaders[name])
+                    self._status[name]['state'] = 'loaded'
+        return self._models[name]
+
+    def _timed(self, name: str, key: str, state: str, func: Callable[[], Any]) -> Any:
+        self._status[name]['state'] = state
+        start = time.perf_counter()
+        try:
+            return func()
+        except Exception as e:
+            self._status[name].update(state='failed', error=f'{type(e).__name__}: {e}')
+            raise
+        finally:
+            self._status[name][key] = round(time.perf_counter() - start, 3)
+
+    def warm_up(self, name: str):
+        model = self.get(name)
+        if self._warmups[name] is not None:
+            self._timed(name, 'warmup_seconds', 'warming_up', lambda: self._warmups[name](model))
+        self._status[name]['state'] = 'ready'
+
+    def preload(self, names: List[str]) -> threading.Thread:
+        """
+        Loads and warms up the given models one after another in a background thread.
+        """
+        self._preload = list(names)
+
+        def run():
+            for name in self._preload:
+                try:
+                    self.warm_up(name)
+                    logger.info(f'Preloaded {name}: {self._status[name]}')
+                except Exception as e:
+                    logger.error(f'Failed to preload {name}: {e}')
+
+        thread = threading.Thread(target=run, name='model-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    @property
+    def is_ready(self) -> bool:
+        return all(self._status[name]['state'] == 'ready' for name in self._preload)
+
+    def status(self) -> Dict[str, dict]:
+        return {name: {**status, 'preload': name in self._preload} for name, status in self._status.items()}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._loaders.keys())
+
+
+def _load_fasttext_model():
+    from fasttext import load_model
+    return load_model(config.get('TextProcessing', 'fasttext_path'))
+
+
+def _load_word_vectors():
+    path = config.get('TextProcessing', 'word_vectors_path', fallback=None)
+    if not path:
+        return model_registry.get('fasttext')
+    from data.processors.word_vectors import WordVectors
+    return WordVectors(path)
+
+
+def _load_toxicity_model():
+    from tensorflow.keras.models import load_model
+    return load_model(config.get('TextProcessing', 'toxicity_path'))
+
+
+def _warm_up_word_vectors(model):
+    return model.get_sentence_vector('Ein Kommentar zum Aufwärmen')
+
+
+def _warm_up_toxicity_model(model):
+    import numpy as np
+    dimension = model_registry.get('word_vectors').get_dimension()
+    return model.predict(np.zeros((1, config.getint('ToxicityRanker', 'window_length'), dimension),
+                                  dtype='float32'))
+
+
+model_registry = ModelRegistry()
+model_registry.register('fasttext', _load_fasttext_model, _warm_up_word_vectors)
+model_registry.register('word_vectors', _load_word_vectors, _warm_up_word_vectors)
+model_registry.register('toxicity', _load_toxicity_model, _warm_up_toxicity_model)
+
+
+def init_models(app):
+    @app.on_event("startup")
+    async def startup():
+        preload = [name.strip() for name in config.get('models', 'preload', fallback='').split(',') if name.strip()]
+        if preload:
+            model_registry.preload(preload)
+
+
 def init_or_get_fasttext_model():
-    global fasttext_model
-    if fasttext_model is None:
-        fasttext_model = load_fasttext_model(config.get('TextProcessing', 'fasttext_path'))
-    return fasttext_model
+    return model_registry.get('fasttext')
+
+
+def init_or_get_word_vectors():
+    """
+    Word vectors from the shared memory mapped store if configured, the fastText model otherwise.
+    Both provide get_dimension, get_word_vector and get_sentence_vector.
+    """
+    return model_registry.get('word_vectors')
 
 
 def init_or_get_toxicity_model():
-    global toxicity_model
-    if toxicity_model is None:
-        toxicity_model = load_keras_model(config.get('TextProcessing', 'toxicity_path'))
-    return toxicity_model
+    return model_registry.get('toxicity')
 
 
 __all__ = ['get_logger_config', 'config', 'init_logging', 'init_config', 'except2str', 'init_or_get_fasttext_model',
-           'init_or_get_toxicity_model']
+           'init_or_get_word_vectors', 'init_or_get_toxicity_model', 'ModelRegistry', 'model_registry', 'init_models']
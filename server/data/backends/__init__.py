@@ -0,0 +1,97 @@
+from abc import ABC, abstractmethod
+from configparser import ConfigParser
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+import logging
+
+logger = logging.getLogger('data.db')
+
+
+class NoBackendException(Exception):
+    pass
+
+
+class StorageBackend(ABC):
+    """
+    Dialect specific parts of the cache DB. Everything else in data.database is plain SQL shared by all backends,
+    executed on `database`, which implements (a subset of) the API of `databases.Database`.
+    """
+    # SQL expression selecting comments.text for the columnar fetch
+    TEXT_COLUMN = 'text'
+    # SQL query selecting ids of graphs that contain :article_id
+    GRAPHS_OF_ARTICLE = None
+
+    def __init__(self, url: str, conf: ConfigParser):
+        self.url = url
+        self.conf = conf
+        self.database = None
+
+    @staticmethod
+    @abstractmethod
+    def assert_url(url: str) -> bool:
+        """
+        This function will return true if this backend can deal with the given `[cache] db_url`.
+        :param url:
+        :return: bool
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def connect(self):
+        """
+        Connects to the database and creates or migrates the schema if necessary.
+        """
+        raise NotImplementedError
+
+    async def disconnect(self):
+        await self.database.disconnect()
+
+    def to_db_datetime(self, value: Optional[datetime]) -> Any:
+        return value
+
+    def to_db_article_ids(self, article_ids: List[int]) -> Any:
+        """
+        :param article_ids: sorted article ids of a graph
+        :return: value stored in graphs.article_ids
+        """
+        return article_ids
+
+    def from_db_article_ids(self, value: Any) -> List[int]:
+        return list(value)
+
+    @abstractmethod
+    async def insert_returning_id(self, table: str, columns: List[str], values: dict) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_insert(self, table: str, columns: List[str], rows: Sequence[tuple]):
+        """
+        Inserts many rows at once, values have to be prepared with to_db_datetime.
+        Joins the transaction of the caller if there is one.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fetch_tuples(self, query: str) -> List[tuple]:
+        raise NotImplementedError
+
+
+from data.backends.sqlite import SQLiteBackend
+from data.backends.postgres import PostgresBackend
+
+BACKENDS = [
+    SQLiteBackend,
+    PostgresBackend
+]
+
+
+def create_backend(url: str, conf: ConfigParser) -> StorageBackend:
+    for backend in BACKENDS:
+        if backend.assert_url(url):
+            logger.debug(f'Using storage backend {backend.__name__} for {url}')
+            return backend(url, conf)
+    raise NoBackendException(f'No storage backend for: {url}')
+
+
+__all__ = ['StorageBackend', 'BACKENDS', 'create_backend', 'NoBackendException']
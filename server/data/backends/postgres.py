@@ -0,0 +1,75 @@
+from sqlalchemy import Index
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+import databases
+import logging
+
+from data.backends import StorageBackend
+from data.backends.schema import metadata, graphs_table
+
+logger = logging.getLogger('data.db.postgres')
+
+# containment queries (article_ids @> ARRAY[...]) for deleting all graphs of an article
+GIN_INDEXES = [
+    Index('ix_graphs_article_ids_gin', graphs_table.c.article_ids, postgresql_using='gin')
+]
+
+# arbitrary key of the advisory lock held while the schema is created, so that several API nodes can start at once
+SCHEMA_LOCK = 4711
+
+
+class PostgresBackend(StorageBackend):
+    GRAPHS_OF_ARTICLE = 'SELECT id FROM graphs WHERE article_ids @> ARRAY[CAST(:article_id AS INTEGER)]'
+
+    def __init__(self, url, conf):
+        super().__init__(url, conf)
+        options = {}
+        url = databases.DatabaseURL(url)
+        # libpq style URLs for unix sockets, e.g. postgresql://user@/comex?host=/var/run/postgresql
+        if 'host' in url.options:
+            options['host'] = url.options['host']
+        self.database = databases.Database(url, **options)
+
+    @staticmethod
+    def assert_url(url):
+        return url.startswith('postgres')
+
+    async def connect(self):
+        await self.database.connect()
+        await self._create_schema()
+
+    async def _create_schema(self):
+        # DDL is compiled and executed on the async connection, so no sync driver is needed
+        dialect = postgresql.dialect()
+        async with self.database.transaction():
+            await self.database.execute(f'SELECT pg_advisory_xact_lock({SCHEMA_LOCK})')
+            for table in metadata.sorted_tables:
+                if await self.database.fetch_val('SELECT to_regclass(:table) IS NOT NULL', {'table': table.name}):
+                    continue
+                logger.info(f'Creating table {table.name}')
+                await self.database.execute(str(CreateTable(table).compile(dialect=dialect)))
+                for index in table.indexes:
+                    await self.database.execute(str(CreateIndex(index).compile(dialect=dialect)))
+
+            for index in GIN_INDEXES:
+                if not await self.database.fetch_val('SELECT to_regclass(:index) IS NOT NULL', {'index': index.name}):
+                    await self.database.execute(str(CreateIndex(index).compile(dialect=dialect)))
+
+    def to_db_datetime(self, value):
+        # columns are TIMESTAMP WITHOUT TIME ZONE, store the local time like SQLite does
+        if value is None:
+            return value
+        return value.replace(tzinfo=None)
+
+    async def insert_returning_id(self, table, columns, values):
+        return await self.database.fetch_val(f'INSERT INTO {table} ({", ".join(columns)}) '
+                                             f'VALUES ({", ".join(":" + column for column in columns)}) '
+                                             'RETURNING id', values)
+
+    async def bulk_insert(self, table, columns, rows):
+        async with self.database.connection() as connection:
+            await connection.raw_connection.copy_records_to_table(table, records=rows, columns=columns)
+
+    async def fetch_tuples(self, query):
+        async with self.database.connection() as connection:
+            return [tuple(record) for record in await connection.raw_connection.fetch(query)]
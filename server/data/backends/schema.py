@@ -0,0 +1,83 @@
+from sqlalchemy import Column, ForeignKey, Index, MetaData, Table
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.types import DateTime, Integer, String
+
+# schema of the cache DB shared by all storage backends, dialect specific types are declared as variants
+metadata = MetaData()
+
+articles_table = Table(
+    'articles',
+    metadata,
+    Column('id', Integer, primary_key=True, index=True),
+    Column('url', String, index=True, unique=True),
+    Column('title', String),
+    Column('subtitle', String, nullable=True),
+    Column('summary', String, nullable=True),
+    Column('author', String, nullable=True),
+    Column('text', String, nullable=False),
+    Column('published_time', DateTime),
+    Column('scrape_time', DateTime),
+    Column('scraper', String)
+)
+
+comments_table = Table(
+    'comments',
+    metadata,
+
+    Column('id', Integer, primary_key=True, index=True),
+    Column('article_id', Integer, ForeignKey('articles.id'), nullable=False),
+    Column('comment_id', String, index=True, nullable=False),
+    Column('username', String),
+    Column('timestamp', DateTime),
+    Column('text', String),
+    # comment_id of the parent, only unique per article (see reply_to_id)
+    Column('reply_to', String, nullable=True),
+    # database id of the comment referenced by reply_to, resolved once at insert time
+    Column('reply_to_id', Integer, nullable=True),
+
+    # Optional details from FAZ and TAZ
+    Column('num_replies', Integer, nullable=True),
+    Column('user_id', String, nullable=True),
+
+    # Optional details from SPON
+    Column('upvotes', Integer, nullable=True),
+    Column('downvotes', Integer, nullable=True),
+    Column('love', Integer, nullable=True),
+
+    # Optional details from Welt
+    Column('likes', Integer, nullable=True),
+    Column('recommended', Integer, nullable=True),
+    Column('child_count', Integer, nullable=True),
+
+    # Optional details from ZON
+    Column('leseempfehlungen', Integer, nullable=True),
+
+    # Optional details from Tagesschau
+    Column('title', String, nullable=True),
+
+    # range scan over all comments of an article (ordered by id, which is the rowid in SQLite)
+    Index('ix_comments_article_id', 'article_id'),
+    # resolves reply_to -> reply_to_id within an article
+    Index('ix_comments_article_id_comment_id', 'article_id', 'comment_id'),
+)
+
+graphs_table = Table(
+    'graphs',
+    metadata,
+    Column('id', Integer, primary_key=True, index=True),
+    # sorted article_ids, JSON array in SQLite and integer[] in PostgreSQL
+    Column('article_ids', String().with_variant(ARRAY(Integer), 'postgresql'), index=True),
+    # JSON dump of models.Graph
+    Column('graph', String().with_variant(JSONB, 'postgresql'))
+)
+
+# column order used for raw inserts into the articles and comments table
+ARTICLE_COLUMNS = [column.name for column in articles_table.columns if column.name != 'id']
+COMMENT_COLUMNS = [column.name for column in comments_table.columns if column.name not in ('id', 'reply_to_id')]
+
+RESOLVE_REPLY_TO_IDS = ('UPDATE comments '
+                        'SET reply_to_id = ('
+                        '    SELECT MIN(parent.id) '
+                        '    FROM comments parent '
+                        '    WHERE parent.article_id = comments.article_id AND parent.comment_id = comments.reply_to) '
+                        'WHERE reply_to IS NOT NULL')
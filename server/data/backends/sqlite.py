@@ -0,0 +1,222 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from itertools import cycle
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+from sqlalchemy import create_engine, inspect
+import asyncio
+import aiosqlite
+import databases
+import json
+import logging
+
+from data.backends import StorageBackend
+from data.backends.schema import metadata, comments_table, RESOLVE_REPLY_TO_IDS
+
+logger = logging.getLogger('data.db.sqlite')
+
+Values = Optional[Union[Mapping[str, Any], Sequence[Any]]]
+
+
+class SQLiteDatabase:
+    def __init__(self, path: str, pragmas: Dict[str, Any] = None, journal_mode: str = 'WAL', readers: int = 4):
+        """
+        Async access to a SQLite file with a single writer connection and a pool of read-only connections.
+        Implements the subset of `databases.Database` used in data.database, so both can be used interchangeably.
+        With WAL journaling readers never wait for the writer and vice versa, writes are serialised in-process.
+        :param path: path to the database file
+        :param pragmas: connection level pragmas applied to every connection, e.g. {'synchronous': 'NORMAL'}
+        :param journal_mode: journal mode of the database file
+        :param readers: number of read-only connections
+        """
+        self.path = path
+        self.pragmas = pragmas or {}
+        self.journal_mode = journal_mode
+        self.num_readers = readers
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._readers = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        # set while the current task holds the writer within a transaction
+        self._transaction: ContextVar[Optional[aiosqlite.Connection]] = ContextVar('transaction', default=None)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None
+
+    async def _open(self, query_only: bool = False) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.path, isolation_level=None)
+        for pragma, value in self.pragmas.items():
+            await connection.execute(f'PRAGMA {pragma} = {value}')
+        if query_only:
+            await connection.execute('PRAGMA query_only = ON')
+        return connection
+
+    async def connect(self):
+        if self.is_connected:
+            return
+        self._writer = await self._open()
+        async with self._writer.execute(f'PRAGMA journal_mode = {self.journal_mode}') as cursor:
+            journal_mode = (await cursor.fetchone())[0]
+        self._write_lock = asyncio.Lock()
+
+        self._reader_connections = [await self._open(query_only=True) for _ in range(self.num_readers)]
+        # readers are handed out round robin, asyncio.Lock queues waiters fairly (unlike asyncio.Queue)
+        self._readers = cycle([(connection, asyncio.Lock()) for connection in self._reader_connections])
+
+        logger.debug(f'Opened {self.path} in {journal_mode} mode with {self.num_readers} readers, '
+                     f'pragmas: {self.pragmas}')
+
+    async def disconnect(self):
+        if not self.is_connected:
+            return
+        async with self._write_lock:
+            for connection in self._reader_connections:
+                await connection.close()
+            await self._writer.close()
+        self._writer = None
+        self._readers = None
+        self._reader_connections = []
+
+    @asynccontextmanager
+    async def reader(self):
+        # reads within a transaction have to see its uncommitted writes
+        connection = self._transaction.get()
+        if connection is not None:
+            yield connection
+            return
+
+        connection, lock = next(self._readers)
+        async with lock:
+            yield connection
+
+    @asynccontextmanager
+    async def writer(self):
+        connection = self._transaction.get()
+        if connection is not None:
+            yield connection
+            return
+
+        async with self._write_lock:
+            yield self._writer
+
+    @asynccontextmanager
+    async def transaction(self):
+        if self._transaction.get() is not None:
+            # nested transactions are folded into the outer one
+            yield
+            return
+
+        async with self._write_lock:
+            token = self._transaction.set(self._writer)
+            await self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                await self._writer.execute('ROLLBACK')
+                raise
+            else:
+                await self._writer.execute('COMMIT')
+            finally:
+                self._transaction.reset(token)
+
+    async def fetch_all(self, query: str, values: Values = None) -> List[Dict[str, Any]]:
+        async with self.reader() as connection:
+            async with connection.execute(query, values or ()) as cursor:
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+    async def fetch_one(self, query: str, values: Values = None) -> Optional[Dict[str, Any]]:
+        async with self.reader() as connection:
+            async with connection.execute(query, values or ()) as cursor:
+                row = await cursor.fetchone()
+                if row is None:
+                    return None
+                return dict(zip([column[0] for column in cursor.description], row))
+
+    async def fetch_tuples(self, query: str, values: Values = None) -> List[tuple]:
+        """
+        Like fetch_all, but returns plain tuples without building a mapping per row.
+        """
+        async with self.reader() as connection:
+            async with connection.execute(query, values or ()) as cursor:
+                return list(await cursor.fetchall())
+
+    async def execute(self, query: str, values: Values = None) -> int:
+        async with self.writer() as connection:
+            async with connection.execute(query, values or ()) as cursor:
+                return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
+
+    async def execute_many(self, query: str, values: Sequence[Values]):
+        async with self.writer() as connection:
+            await connection.executemany(query, values)
+
+
+class SQLiteBackend(StorageBackend):
+    TEXT_COLUMN = 'CAST(text AS BLOB)'
+    GRAPHS_OF_ARTICLE = ('SELECT graphs.id '
+                         'FROM graphs, json_each(graphs.article_ids) as article_ids '
+                         'WHERE article_ids.value = :article_id')
+
+    def __init__(self, url, conf):
+        super().__init__(url, conf)
+        # single writer and a pool of readers on a WAL journaled file, see [cache] section of the config
+        self.database = SQLiteDatabase(databases.DatabaseURL(url).database,
+                                       journal_mode=conf.get('cache', 'journal_mode'),
+                                       readers=conf.getint('cache', 'readers'),
+                                       pragmas={
+                                           'synchronous': conf.get('cache', 'synchronous'),
+                                           'cache_size': conf.getint('cache', 'cache_size'),
+                                           'mmap_size': conf.getint('cache', 'mmap_size'),
+                                           'busy_timeout': conf.getint('cache', 'busy_timeout'),
+                                           'temp_store': 'MEMORY'
+                                       })
+
+    @staticmethod
+    def assert_url(url):
+        return url.startswith('sqlite')
+
+    async def connect(self):
+        if not self.database.is_connected:
+            self._create_schema()
+        await self.database.connect()
+
+    def _create_schema(self):
+        engine = create_engine(self.url)
+        metadata.create_all(bind=engine)
+
+        # caches created before reply_to_id was stored lack the column and the composite indexes
+        inspector = inspect(engine)
+        if 'reply_to_id' not in [column['name'] for column in inspector.get_columns('comments')]:
+            logger.info('Adding comments.reply_to_id to existing cache DB, resolving replies...')
+            engine.execute('ALTER TABLE comments ADD COLUMN reply_to_id INTEGER')
+            engine.execute(RESOLVE_REPLY_TO_IDS)
+
+        existing_indexes = {index['name'] for index in inspector.get_indexes('comments')}
+        for index in comments_table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+        engine.dispose()
+
+    def to_db_datetime(self, value):
+        # same storage format SQLAlchemy uses for DateTime columns on SQLite
+        if value is None:
+            return value
+        return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+    def to_db_article_ids(self, article_ids):
+        return json.dumps(article_ids)
+
+    def from_db_article_ids(self, value):
+        return json.loads(value)
+
+    async def insert_returning_id(self, table, columns, values):
+        return await self.database.execute(f'INSERT INTO {table} ({", ".join(columns)}) '
+                                           f'VALUES ({", ".join(":" + column for column in columns)})', values)
+
+    async def bulk_insert(self, table, columns, rows):
+        await self.database.execute_many(f'INSERT INTO {table} ({", ".join(columns)}) '
+                                         f'VALUES ({", ".join("?" for _ in columns)})', rows)
+
+    async def fetch_tuples(self, query):
+        return await self.database.fetch_tuples(query)
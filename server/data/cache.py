@@ -1,65 +1,141 @@
-from configparser import ConfigParser
-from common import config
 import data.database as db
 import data.models as models
+import data.wire as wire
+from common import config
+from data.metrics import GRAPH_CACHE, GRAPH_STAGE_SECONDS
 from fastapi import Depends
-from typing import Union, Optional, Tuple, List
+from starlette.concurrency import run_in_threadpool
+from typing import Union, Optional, Tuple, List, Iterator
 
 from data.scrapers import scrape, prepare_url, get_matching_scraper, \
     NoScraperException, ScraperWarning, NoCommentsWarning
-from data.processors.graph import GraphRepresentation
-from data.processors.graph_testing import GraphRepresentation as GraphBenchmark
+from data.processors import explain
+from data.processors.graph import GraphRepresentation, ProgressCallback
+from data.processors.text import split_comment
+from data.processors.tracing import Tracer
 import logging
 
 logger = logging.getLogger('data.cache')
 
 
 async def get_graph(urls: List[str] = None, article_ids: List[int] = None, conf: dict = None,
-                    override_cache: bool = False, ignore_cache: bool = False) -> models.Graph:
+                    override_cache: bool = False, ignore_cache: bool = False,
+                    progress: Optional[ProgressCallback] = None, tracer: Optional[Tracer] = None) -> models.Graph:
+    """
+    Cached graph of the articles, otherwise builds (and caches) it in a worker thread.
+    :param progress: called from the worker thread with the stages of the build, see data.processors.graph
+    :param tracer: collects the time spent looking up, loading, building and storing the graph
+    """
+    tracer = tracer or Tracer()
     if urls:
         article_ids = [await db.get_article_id(url) for url in urls]
 
     if not ignore_cache and not override_cache:
-        graph = await db.get_graph(article_ids)
+        with tracer.span('cache'):
+            graph = await db.get_graph(article_ids)
         if graph:
             logger.debug(f'Found graph cache entry with {len(graph.edges)} edges '
                          f'for article_ids: {article_ids} | urls: {urls}')
+            GRAPH_CACHE.inc(result='hit')
             return graph
         else:
             logger.debug(f'No cached graph found for article_ids: {article_ids} | urls: {urls}')
+            GRAPH_CACHE.inc(result='miss')
     else:
         logger.debug('Ignoring cache for graph request.')
-
-    comments = await db.get_comments(article_ids)
-
-    config_parser = ConfigParser()
-    config_parser.read_dict(config)
-
-    use_benchmark_mode = config_parser.getboolean('mode', 'benchmark')
-
-    if use_benchmark_mode:
-        logger.info(f'Started benchmark mode.')
-        graph_rep = GraphBenchmark(comments, conf=conf)
-    else:
-        graph_rep = GraphRepresentation(comments, conf=conf)
+        GRAPH_CACHE.inc(result='ignored')
+
+    return await _build_graph(article_ids, conf, override_cache, ignore_cache, progress, tracer)
+
+
+async def _build_graph(article_ids: List[int], conf: Optional[dict], override_cache: bool, ignore_cache: bool,
+                       progress: Optional[ProgressCallback], tracer: Tracer) -> models.Graph:
+    # the cache was already looked up (or is ignored), builds and stores the graph
+
+    # comments in the cache are already validated, the graph only needs a few columns of them
+    with tracer.span('load'):
+        comments = (await db.get_comment_columns(article_ids)).rows()
+
+    splits = None
+    if config.get('Explain', 'policy', fallback='off') != 'off':
+        # split once, the admission counts the splits and the build uses them
+        with tracer.span('split'):
+            splits = await run_in_threadpool(lambda: [split_comment(comment) for comment in comments])
+        with tracer.span('admission'):
+            explanation = await run_in_threadpool(explain.explain, comments, conf, splits=splits)
+        if explanation.admission == models.GraphAdmission.REJECTED:
+            raise explain.OverBudgetException(explanation)
+        if explanation.downgrades:
+            logger.info(f'Graph of article_ids: {article_ids} downgraded: {explanation.downgrades}')
+        conf = explanation.conf
+
+    graph_rep = await run_in_threadpool(GraphRepresentation, comments, conf=conf, progress=progress, tracer=tracer,
+                                        splits=splits)
     graph = models.Graph(**graph_rep.__dict__())
 
-    logger.debug(f'Constructed graph with {len(graph.edges)} edges '
-                 f'for article_ids: {article_ids} | urls: {urls}')
+    logger.debug(f'Constructed graph with {len(graph.edges)} edges for article_ids: {article_ids}')
 
     if not ignore_cache:
-        if override_cache:
-            old_graph_id = await db.get_graph_id(article_ids)
-            if old_graph_id is not None:
-                await db.delete_edges(graph_id=old_graph_id)
-        graph_id = await db.store_graph(article_ids, graph)
+        with tracer.span('store'):
+            if override_cache:
+                old_graph_id = await db.get_graph_id(article_ids)
+                if old_graph_id is not None:
+                    await db.delete_edges(graph_id=old_graph_id)
+            graph_id = await db.store_graph(article_ids, graph)
         graph.graph_id = graph_id
         graph.article_ids = article_ids
 
+    for span in tracer.spans:
+        GRAPH_STAGE_SECONDS.observe(span.wall, stage=span.name)
 
     return graph
 
 
+async def explain_graph(urls: List[str] = None, article_ids: List[int] = None,
+                        conf: dict = None) -> models.GraphExplain:
+    """
+    Stages and estimated pairs, edges, memory and time of building the graph of the articles and whether
+    get_graph would build it (see data.processors.explain), without building it.
+    """
+    if urls:
+        article_ids = [await db.get_article_id(url) for url in urls]
+    comments = (await db.get_comment_columns(article_ids)).rows()
+    explanation = await run_in_threadpool(explain.explain, comments, conf)
+    explanation.article_ids = article_ids
+    explanation.cached = await db.get_graph_id(article_ids) is not None
+    return explanation
+
+
+async def get_graph_stream(urls: List[str] = None, article_ids: List[int] = None, conf: dict = None,
+                           override_cache: bool = False, ignore_cache: bool = False,
+                           chunk_size: int = 1000, tracer: Optional[Tracer] = None) -> Iterator[bytes]:
+    """
+    Same as get_graph, but returns the graph as NDJSON lines (see data.wire.iter_ndjson).
+    Only the serialisation is chunked: a cached graph is one JSON document in the store, it is loaded as a whole
+    (as plain dicts, without building models.Graph), a graph that isn't cached is built completely before the
+    first line is sent.
+    """
+    if urls:
+        article_ids = [await db.get_article_id(url) for url in urls]
+
+    tracer = tracer or Tracer()
+    if not ignore_cache and not override_cache:
+        with tracer.span('cache'):
+            graph = await db.get_graph_dict(article_ids)
+        if graph:
+            logger.debug(f'Streaming graph cache entry with {len(graph["edges"])} edges for article_ids: {article_ids}')
+            GRAPH_CACHE.inc(result='hit')
+            return wire.iter_ndjson(graph, chunk_size)
+        logger.debug(f'No cached graph found for article_ids: {article_ids} | urls: {urls}')
+        GRAPH_CACHE.inc(result='miss')
+    else:
+        logger.debug('Ignoring cache for graph stream request.')
+        GRAPH_CACHE.inc(result='ignored')
+
+    graph = await _build_graph(article_ids, conf, override_cache, ignore_cache, None, tracer)
+    return wire.iter_ndjson(graph, chunk_size)
+
+
 async def get_stored_article(article_id: int):
     return await db.get_article_with_comments(article_id=article_id)
 
@@ -86,7 +162,6 @@ async def get_article(url: str, override_cache=False, ignore_cache=False):
     if override_cache:
         await db.delete_article(url=url, recursive=True)
 
-    article_id = await db.insert_article(article)
-    await db.insert_comments(comments, article_id)
+    await db.insert_article_with_comments(article, comments)
 
     return await db.get_article_with_comments(url=url)
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from math import isnan
+from typing import List, Optional, Sequence, Union
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+
+# columns of the comments table the graph engine works with, in the order they are fetched
+COLUMNS = ['id', 'article_id', 'reply_to_id', 'timestamp',
+           'upvotes', 'downvotes', 'love', 'likes', 'recommended', 'leseempfehlungen']
+VOTE_COLUMNS = COLUMNS[4:]
+
+
+class TextColumn:
+    """
+    Comment texts as raw UTF-8 bytes, decoded on first access only.
+    Backends that can't hand out raw bytes may pass str, which is used as is.
+    """
+    def __init__(self, raw: List[Union[bytes, str, None]]):
+        self._raw = raw
+        self._decoded: List[Optional[str]] = [None] * len(raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        text = self._decoded[i]
+        if text is None and self._raw[i] is not None:
+            text = self._raw[i]
+            if isinstance(text, bytes):
+                text = text.decode('utf-8')
+            self._decoded[i] = text
+        return text
+
+
+class CommentColumns:
+    """
+    Comments of one or more articles as struct of arrays.
+    - ids, article_ids: int64
+    - reply_to_ids: int64, -1 if the comment is no reply
+    - timestamps: float64, seconds since epoch, NaN if the comment has no timestamp
+    - vote columns (upvotes, downvotes, ...): int64, 0 if the platform does not provide them
+    - texts: TextColumn
+    """
+    def __init__(self, rows: Sequence[Sequence], texts: List[Union[bytes, str, None]]):
+        columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        self.ids = np.array(columns[0], dtype=np.int64)
+        self.article_ids = np.array(columns[1], dtype=np.int64)
+        self.reply_to_ids = np.array([-1 if i is None else i for i in columns[2]], dtype=np.int64)
+        # NULL becomes NaT, whose int64 is the minimum, so it is masked as NaN
+        timestamps = np.array(columns[3], dtype='datetime64[us]')
+        self.timestamps = np.where(np.isnat(timestamps), np.nan, timestamps.astype(np.int64) / 1e6)
+        for name, values in zip(VOTE_COLUMNS, columns[4:]):
+            setattr(self, name, np.array([v or 0 for v in values], dtype=np.int64))
+        self.texts = TextColumn(texts)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self) -> List['CommentRow']:
+        """
+        Lightweight per-comment views with the attributes of models.CommentCached used by the graph engine.
+        """
+        columns = [self.ids, self.article_ids, self.reply_to_ids, self.timestamps] + \
+                  [getattr(self, name) for name in VOTE_COLUMNS]
+        return [CommentRow(self.texts, i, *values)
+                for i, values in enumerate(zip(*[column.tolist() for column in columns]))]
+
+
+class CommentRow:
+    __slots__ = ['_texts', '_idx', 'id', 'article_id', 'reply_to_id', 'epoch', '_timestamp'] + VOTE_COLUMNS
+
+    def __init__(self, texts: TextColumn, idx: int, id: int, article_id: int, reply_to_id: int, epoch: float,
+                 *votes: int):
+        self._texts = texts
+        self._idx = idx
+        self.id = id
+        self.article_id = article_id
+        self.reply_to_id = None if reply_to_id < 0 else reply_to_id
+        self.epoch = epoch
+        self._timestamp = None
+        for name, value in zip(VOTE_COLUMNS, votes):
+            setattr(self, name, value)
+
+    @property
+    def text(self) -> Optional[str]:
+        return self._texts[self._idx]
+
+    @property
+    def timestamp(self) -> Optional[datetime]:
+        if self._timestamp is None and not isnan(self.epoch):
+            self._timestamp = EPOCH + timedelta(seconds=self.epoch)
+        return self._timestamp
+
+    def __repr__(self):
+        return f'CommentRow(id={self.id}, article_id={self.article_id}, reply_to_id={self.reply_to_id})'
@@ -1,121 +1,106 @@
-from sqlalchemy import create_engine, Column, ForeignKey, MetaData, Table
-from sqlalchemy.types import DateTime, Boolean, Integer, String
-from sqlalchemy.ext.declarative import declarative_base
-import databases
 from typing import List, Optional, Mapping, Union
 import logging
 import json
 
 import data.models as models
+from data.backends import create_backend
+from data.backends.schema import metadata, articles_table, comments_table, graphs_table, \
+    ARTICLE_COLUMNS, COMMENT_COLUMNS, RESOLVE_REPLY_TO_IDS
+from data.columnar import CommentColumns, COLUMNS as COMMENT_ARRAY_COLUMNS
+from data.metrics import timed_query
 from common import config
 
 logger = logging.getLogger('data.db')
 
 DATABASE_URL = config.get('cache', 'db_url')
 
-database = databases.Database(DATABASE_URL)
-metadata = MetaData()
+# SQLite or PostgreSQL, depending on the scheme of the db_url
+backend = create_backend(DATABASE_URL, config)
+database = backend.database
 
-engine = create_engine(DATABASE_URL,
-                       connect_args={
-                           # has to be set to False if sqlite is used
-                           "check_same_thread": not DATABASE_URL.startswith('sqlite')
-                       })
 
-Base = declarative_base(metadata=metadata)
+async def connect():
+    await backend.connect()
+    logger.debug('Database connected')
+
+
+async def disconnect():
+    await backend.disconnect()
+    logger.debug('Database connection closed')
 
 
 def init_db(app):
-    @app.on_event("startup")
-    async def startup():
-        await database.connect()
-        logger.debug('Database connected')
-
-    @app.on_event("shutdown")
-    async def shutdown():
-        await database.disconnect()
-        logger.debug('Database connection closed')
-
-
-articles_table = Table(
-    'articles',
-    metadata,
-    Column('id', Integer, primary_key=True, index=True),
-    Column('url', String, index=True, unique=True),
-    Column('title', String),
-    Column('subtitle', String, nullable=True),
-    Column('summary', String, nullable=True),
-    Column('author', String, nullable=True),
-    Column('text', String, nullable=False),
-    Column('published_time', DateTime),
-    Column('scrape_time', DateTime),
-    Column('scraper', String)
-)
-
-comments_table = Table(
-    'comments',
-    metadata,
-
-    Column('id', Integer, primary_key=True, index=True),
-    Column('article_id', Integer, ForeignKey('articles.id'), nullable=False),
-    Column('comment_id', String, index=True, nullable=False),
-    Column('username', String),
-    Column('timestamp', DateTime),
-    Column('text', String),
-    Column('reply_to', String, ForeignKey('comments.comment_id'), nullable=True),
-
-    # Optional details from FAZ and TAZ
-    Column('num_replies', Integer, nullable=True),
-    Column('user_id', String, nullable=True),
-
-    # Optional details from SPON
-    Column('upvotes', Integer, nullable=True),
-    Column('downvotes', Integer, nullable=True),
-    Column('love', Integer, nullable=True),
-
-    # Optional details from Welt
-    Column('likes', Integer, nullable=True),
-    Column('recommended', Integer, nullable=True),
-    Column('child_count', Integer, nullable=True),
-
-    # Optional details from ZON
-    Column('leseempfehlungen', Integer, nullable=True),
-
-    # Optional details from Tagesschau
-    Column('title', String, nullable=True),
-)
-
-graphs_table = Table(
-    'graphs',
-    metadata,
-    Column('id', Integer, primary_key=True, index=True),
-    # Comma separated list of article_ids (JSON array)
-    Column('article_ids', String, index=True),
-    # JSON dump of models.Graph
-    Column('graph', String)
-)
-
-Base.metadata.create_all(bind=engine)
+    app.on_event("startup")(connect)
+    app.on_event("shutdown")(disconnect)
+
+
+def _comment_row(comment: models.CommentScraped, article_id: int) -> tuple:
+    # read field values directly to avoid the overhead of comment.dict() per row
+    values = comment.__dict__
+    return tuple(article_id if column == 'article_id' else
+                 backend.to_db_datetime(values.get(column)) if column == 'timestamp' else
+                 values.get(column)
+                 for column in COMMENT_COLUMNS)
 
 
+@timed_query
 async def insert_article(article: models.ArticleScraped):
-    last_record_id = await database.execute(articles_table.insert().values(**article.dict()))
+    values = article.dict()
+    values = {column: backend.to_db_datetime(values.get(column)) if column.endswith('_time') else values.get(column)
+              for column in ARTICLE_COLUMNS}
+    last_record_id = await backend.insert_returning_id('articles', ARTICLE_COLUMNS, values)
     logger.debug(f'INSERTed article to DB with ID: {last_record_id}!')
     return last_record_id
 
 
+@timed_query
 async def insert_comment(comment: models.CommentScraped, article_id: int) -> int:
-    last_record_id = await database.execute(
-        comments_table.insert().values(article_id=article_id, **comment.dict()))
+    async with database.transaction():
+        last_record_id = await backend.insert_returning_id('comments', COMMENT_COLUMNS,
+                                                           dict(zip(COMMENT_COLUMNS, _comment_row(comment, article_id))))
+        await _resolve_reply_to_ids(article_id)
     return last_record_id
 
 
+@timed_query
 async def insert_comments(comments: List[models.CommentScraped], article_id: int):
-    values = [{**comment.dict(), 'article_id': article_id} for comment in comments]
-    await database.execute_many(comments_table.insert(), values=values)
+    async with database.transaction():
+        await _bulk_insert_comments(comments, article_id)
     logger.debug(f'INSERTed {len(comments)} comments into DB!')
 
 
+@timed_query
+async def _bulk_insert_comments(comments: List[models.CommentScraped], article_id: int):
+    await backend.bulk_insert('comments', COMMENT_COLUMNS, [_comment_row(comment, article_id) for comment in comments])
+
+    await _resolve_reply_to_ids(article_id)
+
+
+@timed_query
+async def _resolve_reply_to_ids(article_id: int):
+    # replies may be scraped before their parent, so resolve after all comments of the article are stored
+    await database.execute(f'{RESOLVE_REPLY_TO_IDS} AND article_id = :article_id', {'article_id': article_id})
+
+
+@timed_query
+async def insert_article_with_comments(article: models.ArticleScraped,
+                                       comments: List[models.CommentScraped]) -> int:
+    """
+    Inserts an article and all its comments within a single transaction.
+    Either everything is stored or nothing, so a failed ingest never leaves an article without comments.
+    :param article: scraped article
+    :param comments: scraped comments of that article
+    :return: database id of the article
+    """
+    async with database.transaction():
+        article_id = await insert_article(article)
+        await _bulk_insert_comments(comments, article_id)
+
+    logger.debug(f'INSERTed article {article_id} with {len(comments)} comments into DB!')
+    return article_id
+
+
+@timed_query
 async def get_article_id(url: str) -> int:
     logger.debug(f'Get article id for url: {url}')
     query = 'SELECT id FROM articles WHERE url = :url'
@@ -123,6 +108,7 @@ async def get_article_id(url: str) -> int:
     return article_id['id']
 
 
+@timed_query
 async def delete_article(url: str = None, article_id: int = None, recursive=False):
     logger.debug(f'DELETE article from DB: id: {article_id}, url: {url}')
     assert url or article_id
@@ -142,6 +128,7 @@ async def delete_article(url: str = None, article_id: int = None, recursive=Fals
                            {'article_id': article_id})
 
 
+@timed_query
 async def delete_comments(url: str = None, article_id: int = None):
     logger.debug(f'DELETE all comments related to article id: {article_id}, url: {url}')
     assert url or article_id
@@ -153,6 +140,7 @@ async def delete_comments(url: str = None, article_id: int = None):
                            {'article_id': article_id})
 
 
+@timed_query
 async def delete_edges(graph_id: int = None, article_id: int = None):
     logger.debug(f'DELETE all graphs for graph.id: {graph_id}, article_id: {article_id}')
     assert graph_id or article_id
@@ -162,14 +150,11 @@ async def delete_edges(graph_id: int = None, article_id: int = None):
                                'WHERE id = :graph_id',
                                {'graph_id': graph_id})
     else:
-        await database.execute('DELETE FROM graphs '
-                               'WHERE id in ('
-                               '    SELECT graphs.id '
-                               '    FROM graphs, json_each(graphs.article_ids) as article_ids'
-                               '    WHERE article_ids.value = :article_id)',
+        await database.execute(f'DELETE FROM graphs WHERE id IN ({backend.GRAPHS_OF_ARTICLE})',
                                {'article_id': article_id})
 
 
+@timed_query
 async def get_article(url: str = None, article_id: int = None) -> Mapping:
     logger.debug(f'Get article from DB: id: {article_id}, url: {url}')
     assert url or article_id
@@ -181,23 +166,44 @@ async def get_article(url: str = None, article_id: int = None) -> Mapping:
     return await database.fetch_one(query, {'article_id': article_id})
 
 
-async def get_comments(article_ids: Union[List[int], int]) -> List[models.CommentCached]:
+def _article_ids_sql(article_ids: Union[List[int], int]) -> str:
     # can be called for a single article_id, so wrap it.
     if isinstance(article_ids, int):
         article_ids = [article_ids]
 
     # make it save to inject into sql query
-    article_ids = ','.join([str(i) for i in article_ids if isinstance(i, int)])
+    return ','.join([str(i) for i in article_ids if isinstance(i, int)])
+
+
+@timed_query
+async def get_comments(article_ids: Union[List[int], int]) -> List[models.CommentCached]:
+    article_ids = _article_ids_sql(article_ids)
 
-    comments = await database.fetch_all('SELECT c1.*, c2.id as reply_to_id '
-                                        'FROM comments c1 '
-                                        'LEFT JOIN comments c2 ON c1.reply_to = c2.comment_id AND'
-                                        '                         c1.article_id = c2.article_id '
-                                        f'WHERE c1.article_id IN ({article_ids});')
+    comments = await database.fetch_all('SELECT * FROM comments '
+                                        f'WHERE article_id IN ({article_ids}) '
+                                        'ORDER BY article_id, id;')
     logger.debug(f'Found {len(comments)} comments for article_ids: {article_ids}')
     return [models.CommentCached(**comment) for comment in comments]
 
 
+@timed_query
+async def get_comment_columns(article_ids: Union[List[int], int]) -> CommentColumns:
+    """
+    Fetches the comments of the given articles as columns, skipping pydantic validation of every row.
+    Only contains the fields needed to build a graph, texts are decoded lazily.
+    """
+    article_ids = _article_ids_sql(article_ids)
+    # same order as get_comments
+    rows = await backend.fetch_tuples(f'SELECT {", ".join(COMMENT_ARRAY_COLUMNS)}, {backend.TEXT_COLUMN} '
+                                      'FROM comments '
+                                      f'WHERE article_id IN ({article_ids}) '
+                                      'ORDER BY article_id, id;')
+
+    logger.debug(f'Found {len(rows)} comments for article_ids: {article_ids}')
+    return CommentColumns([row[:-1] for row in rows], [row[-1] for row in rows])
+
+
+@timed_query
 async def get_article_with_comments(url: str = None, article_id: int = None) -> models.ArticleCached:
     article = await get_article(url, article_id)
     assert bool(article)
@@ -209,37 +215,51 @@ async def get_article_with_comments(url: str = None, article_id: int = None) ->
     return article
 
 
+@timed_query
 async def get_graph_id(article_ids: List[int]) -> int:
     article_ids = [i for i in sorted(article_ids) if isinstance(i, int)]
     result = await database.fetch_one('SELECT id FROM graphs WHERE article_ids = :article_ids',
-                                      {'article_ids': json.dumps(article_ids)})
-    return result.get('id', None)
+                                      {'article_ids': backend.to_db_article_ids(article_ids)})
+    return None if result is None else result.get('id', None)
 
 
-async def get_graph(article_ids: List[int]) -> models.Graph:
+@timed_query
+async def get_graph_dict(article_ids: List[int]) -> Optional[dict]:
+    """
+    Stored graph as plain dicts and lists with the fields of models.Graph, without validating every edge.
+    """
     # make it save to inject into sql query
     article_ids = [i for i in sorted(article_ids) if isinstance(i, int)]
 
     result = await database.fetch_one('SELECT * FROM graphs WHERE article_ids = :article_ids',
-                                      {'article_ids': json.dumps(article_ids)})
+                                      {'article_ids': backend.to_db_article_ids(article_ids)})
     if result:
         graph = json.loads(result['graph'])
         logger.debug(f'Retrieved graph id: {result["id"]} for {article_ids}')
-        return models.Graph(article_ids=json.loads(result['article_ids']),
-                            graph_id=result['id'],
-                            comments=graph['comments'],
-                            id2idx=graph['id2idx'],
-                            edges=graph['edges'])
+        return {'article_ids': backend.from_db_article_ids(result['article_ids']),
+                'graph_id': result['id'],
+                'comments': graph['comments'],
+                'id2idx': graph['id2idx'],
+                'edges': graph['edges'],
+                'groups': graph.get('groups', [])}
+
+
+@timed_query
+async def get_graph(article_ids: List[int]) -> models.Graph:
+    graph = await get_graph_dict(article_ids)
+    if graph:
+        return models.Graph(**graph)
 
 
+@timed_query
 async def store_graph(article_ids: List[int], graph: models.Graph):
     # make it save to inject into sql query
-    article_ids = json.dumps([i for i in sorted(article_ids) if isinstance(i, int)])
-    graph = graph.json(exclude={'articles_id', 'graph_id'})
+    article_ids = [i for i in sorted(article_ids) if isinstance(i, int)]
+    graph = graph.json(exclude={'articles_id', 'graph_id', 'debug'})
 
-    last_record_id = await database.execute(graphs_table.insert().values({
+    last_record_id = await backend.insert_returning_id('graphs', ['graph', 'article_ids'], {
         'graph': graph,
-        'article_ids': article_ids
-    }))
+        'article_ids': backend.to_db_article_ids(article_ids)
+    })
     logger.debug(f'INSERTed graph for {article_ids} to DB with ID: {last_record_id}!')
     return last_record_id
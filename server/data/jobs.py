@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from common import config, except2str
+import data.cache as cache
+import data.database as db
+import data.models as models
+from data.processors.tracing import Tracer
+import asyncio
+import hashlib
+import json
+import uuid
+import logging
+
+logger = logging.getLogger('data.jobs')
+
+
+class JobQueueFullException(Exception):
+    pass
+
+
+def job_key(article_ids: List[int], conf: Optional[dict], override_cache: bool, ignore_cache: bool) -> str:
+    """
+    Jobs for the same articles (in any order) with the same config and cache flags build the same graph.
+    """
+    return hashlib.sha1(json.dumps([sorted(article_ids), conf or {}, override_cache, ignore_cache],
+                                   sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class GraphJob:
+    def __init__(self, key: str, article_ids: List[int], conf: Optional[dict],
+                 override_cache: bool, ignore_cache: bool):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.article_ids = article_ids
+        self.conf = conf
+        self.override_cache = override_cache
+        self.ignore_cache = ignore_cache
+
+        self.state = models.GraphJobState.QUEUED
+        self.stages: Dict[str, models.GraphJobStage] = {}
+        self.error: Optional[str] = None
+        self.result: Optional[models.Graph] = None
+        self.tracer = Tracer()
+        self.created = datetime.utcnow()
+        self.started: Optional[datetime] = None
+        self.finished: Optional[datetime] = None
+        self.changed = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (models.GraphJobState.DONE, models.GraphJobState.FAILED)
+
+    def notify(self):
+        # wakes everyone waiting on the current event, later waiters get a fresh one
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def update(self, stage: str, done: int, total: int):
+        self.stages[stage] = models.GraphJobStage(stage=stage, done=done, total=total)
+        self.notify()
+
+    def status(self, position: Optional[int] = None) -> models.GraphJobStatus:
+        return models.GraphJobStatus(job_id=self.id, state=self.state, article_ids=self.article_ids,
+                                     position=position, stages=list(self.stages.values()), error=self.error,
+                                     created=self.created, started=self.started, finished=self.finished)
+
+
+class GraphJobQueue:
+    """
+    Builds graphs in the background. At most `max_concurrent` jobs run at a time, at most `max_queued` wait.
+    Submitting a job equal to a queued, running or retained one returns that job instead of a new one.
+    Finished jobs and their results are kept for `retention` seconds.
+    """
+    def __init__(self, max_concurrent: int = 2, max_queued: int = 32, retention: float = 600.):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retention = timedelta(seconds=retention)
+        self.jobs: Dict[str, GraphJob] = {}
+        self.keys: Dict[str, GraphJob] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+
+    def _expire(self):
+        now = datetime.utcnow()
+        for job in list(self.jobs.values()):
+            if job.is_finished and now - job.finished > self.retention:
+                del self.jobs[job.id]
+                if self.keys.get(job.key) is job:
+                    del self.keys[job.key]
+
+    def get(self, job_id: str) -> Optional[GraphJob]:
+        self._expire()
+        return self.jobs.get(job_id)
+
+    def position(self, job: GraphJob) -> Optional[int]:
+        if job.state != models.GraphJobState.QUEUED:
+            return None
+        return sum(1 for other in self.jobs.values()
+                   if other.state == models.GraphJobState.QUEUED and other.created < job.created)
+
+    async def submit(self, urls: List[str] = None, article_ids: List[int] = None, conf: dict = None,
+                     override_cache: bool = False, ignore_cache: bool = False) -> GraphJob:
+        if urls:
+            article_ids = [await db.get_article_id(url) for url in urls]
+        self._expire()
+
+        key = job_key(article_ids, conf, override_cache, ignore_cache)
+        job = self.keys.get(key)
+        if job is not None and job.state != models.GraphJobState.FAILED:
+            logger.debug(f'Graph job {job.id} already covers article_ids: {article_ids}')
+            return job
+
+        if sum(1 for job in self.jobs.values() if job.state == models.GraphJobState.QUEUED) >= self.max_queued:
+            raise JobQueueFullException(f'{self.max_queued} graph jobs are already waiting')
+
+        job = GraphJob(key, article_ids, conf, override_cache, ignore_cache)
+        self.jobs[job.id] = job
+        self.keys[key] = job
+        logger.debug(f'Queued graph job {job.id} for article_ids: {article_ids}')
+
+        # keep a reference, the event loop only keeps weak ones
+        task = asyncio.ensure_future(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: GraphJob):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            job.state = models.GraphJobState.RUNNING
+            job.started = datetime.utcnow()
+            job.notify()
+
+            loop = asyncio.get_event_loop()
+
+            def progress(stage: str, done: int, total: int):
+                # called from the worker thread building the graph
+                loop.call_soon_threadsafe(job.update, stage, done, total)
+
+            try:
+                job.result = await cache.get_graph(article_ids=job.article_ids, conf=job.conf,
+                                                   override_cache=job.override_cache,
+                                                   ignore_cache=job.ignore_cache, progress=progress,
+                                                   tracer=job.tracer)
+                job.state = models.GraphJobState.DONE
+            except Exception as e:
+                job.error = except2str(e, logger)
+                job.state = models.GraphJobState.FAILED
+            job.finished = datetime.utcnow()
+            logger.debug(f'Graph job {job.id} {job.state.value} after {job.finished - job.started}')
+            # progress callbacks scheduled before the build returned run first
+            loop.call_soon(job.notify)
+
+
+queue = GraphJobQueue(max_concurrent=config.getint('jobs', 'max_concurrent', fallback=2),
+                      max_queued=config.getint('jobs', 'max_queued', fallback=32),
+                      retention=config.getfloat('jobs', 'retention', fallback=600.))
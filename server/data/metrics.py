@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+import functools
+import math
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, 'Metric'] = {}
+
+    def register(self, metric: 'Metric'):
+        assert metric.name not in self.metrics, f'Metric {metric.name} is already registered'
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines += metric.samples()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Metric:
+    """
+    Values per combination of label values, updates are cheap: one lock and a dict lookup.
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple, **extra) -> List[Tuple[str, str]]:
+        return list(zip(self.labelnames, key)) + list(extra.items())
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1., **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self._labels(key))} {_format_value(value)}'
+                for key, value in values]
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: MetricsRegistry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # counts per bucket (not cumulative) plus one for +Inf, sum
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.]
+            counts[0][i] += 1
+            counts[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """
+        Decorator observing the duration of every call of an async function.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def get(self, **labels) -> Tuple[int, float]:
+        """
+        Number and sum of the observations
+        """
+        counts = self._values.get(self._key(labels))
+        return (0, 0.) if counts is None else (sum(counts[0]), counts[1])
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(f'{self.name}_bucket{_format_labels(self._labels(key, le=_format_value(bound)))} '
+                               f'{cumulative}')
+            samples.append(f'{self.name}_sum{_format_labels(self._labels(key))} {_format_value(total)}')
+            samples.append(f'{self.name}_count{_format_labels(self._labels(key))} {cumulative}')
+        return samples
+
+
+# metrics of the application, updated where the work happens
+GRAPH_CACHE = Counter('comex_graph_cache_requests_total',
+                      'Graph requests by cache result (hit, miss, ignored)', ['result'])
+GRAPH_STAGE_SECONDS = Histogram('comex_graph_stage_seconds',
+                                'Wall time of the stages of graph builds (comparators, modifiers, ...)', ['stage'])
+SCRAPE_SECONDS = Histogram('comex_scrape_seconds', 'Duration of scrapes by scraper', ['scraper'],
+                           buckets=(.1, .25, .5, 1., 2.5, 5., 10., 30., 60., 120.))
+SCRAPE_COMMENTS = Histogram('comex_scrape_comments', 'Comments per successful scrape by scraper', ['scraper'],
+                            buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+SCRAPE_ERRORS = Counter('comex_scrape_errors_total', 'Failed scrapes by scraper and exception',
+                        ['scraper', 'error'])
+DB_QUERY_SECONDS = Histogram('comex_db_query_seconds', 'Duration of cache database operations', ['query'],
+                             buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5))
+
+
+def timed_query(func):
+    """
+    Observes the duration of a data.database operation in DB_QUERY_SECONDS, labelled with its name.
+    """
+    return DB_QUERY_SECONDS.timed(query=func.__name__)(func)
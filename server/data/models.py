@@ -119,6 +119,7 @@ class SameCommentComparatorConfig(ComparatorConfigBase):
 class SameArticleComparatorConfig(ComparatorConfigBase):
     base_weight: float = 1.0
     only_root: bool = True
+    implicit: bool = True
 
 
 class ReplyToComparatorConfig(ComparatorConfigBase):
@@ -470,6 +471,13 @@ class GenericSingleEdgeAdderConfig(ComparatorConfigBase):
     node_weight_type: NodeWeightType = NodeWeightType.RECENCY
 
 
+class GraphRepresentationConfig(BaseModel):
+    # comma separated SplitWeights the response needs, * for all
+    node_weights: str = '*'
+    # reuse the graph after stages of recent builds with the same comments and settings
+    memo: bool = True
+
+
 class GraphConfig(BaseModel):
     SameCommentComparator: Optional[SameCommentComparatorConfig]
     SameCommentComparator: Optional[SameCommentComparatorConfig]
@@ -528,6 +536,7 @@ class GraphConfig(BaseModel):
     TemporalClusterer: Optional[TemporalClustererConfig]
     MultiEdgeTypeClusterer: Optional[MultiEdgeTypeClustererConfig]
     GenericSingleEdgeAdder: Optional[GenericSingleEdgeAdderConfig]
+    GraphRepresentation: Optional[GraphRepresentationConfig]
 
 
 class SplitWeights(BaseModel):
@@ -620,6 +629,15 @@ class Edge(BaseModel):
     wgts: EdgeWeights
 
 
+class EdgeGroup(BaseModel):
+    # implicit edges: every two nodes of the group share an edge with weight {tp: wgt}, unless there is an edge
+    # between them in Graph.edges (with all its weights) or the pair is excluded, see data.processors.implicit
+    tp: str  # EdgeWeightType
+    wgt: float
+    nodes: List[Tuple[int, int]]
+    excluded: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+
+
 class Graph(BaseModel):
     article_ids: Optional[List[int]]
     graph_id: Optional[int]
@@ -627,3 +645,60 @@ class Graph(BaseModel):
     comments: List[SplitComment]
     id2idx: dict
     edges: List[Edge]
+    groups: List[EdgeGroup] = []
+
+    # spans of the graph build, only if requested with debug, see data.processors.tracing
+    debug: Optional[dict]
+
+
+class GraphJobState(str, Enum):
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+
+class GraphJobStage(BaseModel):
+    stage: str
+    done: int
+    total: int
+
+
+class GraphJobStatus(BaseModel):
+    job_id: str
+    state: GraphJobState
+    article_ids: List[int]
+    position: Optional[int]  # number of jobs waiting before this one while queued
+    stages: List[GraphJobStage] = []  # in the order they started, the last one is the current stage
+    error: Optional[str]
+    created: datetime
+    started: Optional[datetime]
+    finished: Optional[datetime]
+
+
+class GraphStageEstimate(BaseModel):
+    stage: str
+    units: float  # pairs of splits for the comparisons, work of the stage otherwise (see data.processors.explain)
+    seconds: float
+
+
+class GraphAdmission(str, Enum):
+    ADMITTED = 'ADMITTED'
+    DOWNGRADED = 'DOWNGRADED'
+    REJECTED = 'REJECTED'
+
+
+class GraphExplain(BaseModel):
+    article_ids: List[int] = []
+    cached: bool = False  # a graph of the articles is cached, nothing would be built
+    comments: int
+    splits: int
+    pairs: int
+    edges: int  # after the comparisons, before any filter
+    implicit_edges: int
+    memory: int  # peak bytes
+    seconds: float
+    stages: List[GraphStageEstimate]
+    admission: GraphAdmission
+    downgrades: List[str] = []
+    conf: Optional[dict]  # config the graph is built with, downgrades included
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from common import config
 import data.models as models
-from typing import List, Union, Optional
+from typing import Callable, List, Union, Optional, Set
 import logging
 
 logger = logging.getLogger('data.processor')
@@ -16,6 +16,8 @@ class GraphRepresentationType(ABC):
         self.comments: List[models.SplitComment] = []
         self.id2idx = {}
         self.edges: List[models.Edge] = []
+        # implicit edges, see data.processors.implicit
+        self.groups: List[models.EdgeGroup] = []
         # self.nodes = []
 
 
@@ -58,6 +60,20 @@ class Comparator(ABC):
             self._set_weight(edge_weights, weight)
             # logger.debug(f'setting weight {weight} from {self.__class__.__name__} - {edge_weights}')
 
+    def settings(self) -> dict:
+        """
+        The config section of the comparator, part of the keys of memoized stages (see data.processors.memo)
+        """
+        name = self.__class__.__name__
+        return dict(self.conf[name]) if self.conf is not None and self.conf.has_section(name) else {}
+
+    def groups(self, graph: GraphRepresentationType) -> List[models.EdgeGroup]:
+        """
+        Implicit edges of the comparator (see data.processors.implicit), pairs of splits it gives the weight of a
+        group and no other comparator a weight get no edge of their own
+        """
+        return []
+
     @abstractmethod
     def _set_weight(self, edge: models.EdgeWeights, weight: float):
         raise NotImplementedError
@@ -80,6 +96,13 @@ class Comparator(ABC):
 
 
 class Modifier(ABC):
+    # whether the result depends on which edges the graph has (rankers over edges, top-k filters, mergers, ...),
+    # filters with an edge predicate can't be applied before modifiers that do
+    depends_on_edges = True
+    # whether modify changes the edges (filters, adders), modifiers that only write weights of splits run only if
+    # a later modifier or the response needs them (see Plan._demanded)
+    changes_edges = True
+
     def __init__(self, conf=None):
         self.conf = conf
 
@@ -107,6 +130,39 @@ class Modifier(ABC):
             return param
         return self.conf.get(self.__class__.__name__, key)
 
+    def settings(self) -> dict:
+        """
+        The config section of the modifier, part of the keys of memoized stages (see data.processors.memo)
+        """
+        name = self.__class__.__name__
+        return dict(self.conf[name]) if self.conf is not None and self.conf.has_section(name) else {}
+
+    def produces(self) -> Set[str]:
+        """
+        Weight types (fields of SplitWeights or EdgeWeights) modify writes
+        """
+        return set()
+
+    def consumes(self) -> Set[str]:
+        """
+        Weight types modify reads
+        """
+        return set()
+
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        """
+        Whether modify works on the implicit edges of `graph` (see data.processors.implicit) as they are,
+        otherwise the graph turns them into edges before
+        """
+        return False
+
+    def edge_predicate(self) -> Optional[Callable[[models.EdgeWeights], bool]]:
+        """
+        Filters that keep or remove each edge on its own weights return that test, the graph applies it while
+        creating the edges instead of running the filter (see Plan._push_down)
+        """
+        return None
+
     @abstractmethod
     def modify(self, graph: GraphRepresentationType):
         """
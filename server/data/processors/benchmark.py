@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import json
+import platform
+import time
+import logging
+
+import numpy as np
+
+import data.models as models
+from common import except2str
+from data.processors.memo import STAGES
+from data.processors.graph import GraphRepresentation, COMPARATORS, MODIFIERS
+from data.processors.tracing import Tracer
+
+logger = logging.getLogger('data.processors.benchmark')
+
+Configuration = Tuple[str, dict]
+
+
+def isolate(conf: dict) -> dict:
+    """
+    Graph config in which only the comparators and modifiers listed in `conf` are active.
+    """
+    isolated = {processor.__name__: {'active': False} for processor in COMPARATORS + MODIFIERS}
+    for section, values in conf.items():
+        isolated[section] = {**values, 'active': True}
+    return isolated
+
+
+def load_fixture(path: str) -> Tuple[str, List[models.CommentCached]]:
+    """
+    Comment thread saved with `save_fixture`: {"name": ..., "comments": [CommentCached, ...]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+    return fixture['name'], [models.CommentCached(**comment) for comment in fixture['comments']]
+
+
+def save_fixture(path: str, name: str, comments: List[models.CommentCached]):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'name': name, 'comments': [json.loads(comment.json()) for comment in comments]},
+                           ensure_ascii=False))
+
+
+def summary(values: List[float]) -> dict:
+    return {'median': float(np.median(values)), 'p90': float(np.percentile(values, 90)),
+            'p99': float(np.percentile(values, 99)), 'min': min(values), 'max': max(values), 'runs': len(values)}
+
+
+def benchmark(comments: List[models.CommentCached], conf: dict = None,
+              repetitions: int = 5, warmup: int = 1, memory: bool = False, memo: bool = False) -> dict:
+    """
+    Builds the graph `warmup + repetitions` times from the same comments, GraphRepresentation never modifies them,
+    so no run needs a copy. Wall times are summarised over the repetitions, per build and per stage.
+    With `memory` two more builds measure the peak memory of the whole build and of every stage,
+    tracemalloc would distort the timings of the others.
+    With `memo` the stages are kept like in the server (data.processors.memo), but every run starts with none kept,
+    i.e. the overhead of memoization on builds that restore nothing.
+    """
+    # every run builds all stages, none restored from earlier runs
+    section = (conf or {}).get('GraphRepresentation', {})
+    conf = {**(conf or {}), 'GraphRepresentation': {**section, 'memo': memo}}
+
+    def build(tracer: Tracer = None) -> GraphRepresentation:
+        if memo:
+            STAGES.clear()
+        return GraphRepresentation(comments, conf=conf, tracer=tracer)
+
+    walls, tracers = [], []
+    graph = None
+    for run in range(warmup + repetitions):
+        tracer = Tracer(comparators=True)
+        start = time.perf_counter()
+        graph = build(tracer)
+        if run >= warmup:
+            walls.append(time.perf_counter() - start)
+            tracers.append(tracer)
+
+    stages = {}
+    for span in tracers[-1].spans:
+        stages[span.name] = {'edges_in': span.edges_in, 'edges_out': span.edges_out}
+    for name, stage in stages.items():
+        spans = [span for tracer in tracers for span in tracer.spans if span.name == name]
+        stage['wall'] = summary([span.wall for span in spans])
+        if spans[0].cpu is not None:
+            stage['cpu_median'] = float(np.median([span.cpu for span in spans]))
+
+    result = {
+        'comments': len(comments),
+        'splits': sum(len(comment.splits) for comment in graph.comments),
+        'edges': len(graph.edges),
+        'wall': summary(walls),
+        'stages': stages
+    }
+
+    if memory:
+        whole = Tracer(memory=True)
+        with whole.span('build'):
+            build()
+        result['memory_peak'] = whole.spans[0].memory
+        tracer = Tracer(memory=True)
+        build(tracer)
+        for span in tracer.spans:
+            if span.memory is not None:
+                stages[span.name]['memory_peak'] = span.memory
+    return result
+
+
+def run_suite(fixtures: Dict[str, List[models.CommentCached]], configurations: List[Configuration],
+              repetitions: int = 5, warmup: int = 1, memory: bool = False, isolated: bool = True,
+              memo: bool = False) -> dict:
+    """
+    Benchmarks every configuration on every fixture. A failing configuration is recorded with its error.
+    :param isolated: only the comparators and modifiers of a configuration are active, see `isolate`
+    """
+    results = []
+    for fixture, comments in fixtures.items():
+        for name, conf in configurations:
+            logger.info(f'Benchmark {name} on {fixture} ({len(comments)} comments)')
+            entry = {'fixture': fixture, 'configuration': name, 'conf': conf}
+            try:
+                entry.update(benchmark(comments, isolate(conf) if isolated else conf,
+                                       repetitions=repetitions, warmup=warmup, memory=memory, memo=memo))
+            except Exception as e:
+                entry['error'] = except2str(e, logger)
+            results.append(entry)
+    return {
+        'meta': {'created': datetime.utcnow().isoformat(), 'python': platform.python_version(),
+                 'machine': platform.machine(), 'repetitions': repetitions, 'warmup': warmup, 'memory': memory,
+                 'memo': memo},
+        'results': results
+    }
+
+
+def compare(baseline: dict, results: dict) -> List[dict]:
+    """
+    Median wall time of every fixture and configuration in both result sets, ratio > 1 is slower than baseline.
+    """
+    before = {(r['fixture'], r['configuration']): r for r in baseline['results'] if 'wall' in r}
+    rows = []
+    for result in results['results']:
+        old: Optional[dict] = before.get((result['fixture'], result['configuration']))
+        if old is None or 'wall' not in result or not old['wall']['median']:
+            continue
+        rows.append({'fixture': result['fixture'], 'configuration': result['configuration'],
+                     'baseline': old['wall']['median'], 'median': result['wall']['median'],
+                     'ratio': result['wall']['median'] / old['wall']['median'],
+                     'edges_changed': old['edges'] != result['edges']})
+    return rows
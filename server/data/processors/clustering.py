@@ -1,9 +1,9 @@
 import operator
 from collections import defaultdict
-from typing import Tuple
+from typing import Set, Tuple
 
 from data import models
-from data.processors import Modifier, GraphRepresentationType
+from data.processors import Modifier, GraphRepresentationType, implicit
 from data.processors.ranking import build_edge_dict
 import logging
 import networkx as nx
@@ -31,6 +31,15 @@ class GenericSingleEdgeAdder(Modifier):
                      f'edge_weight_type={self.edge_weight_type}, edge_weight_type={self.node_weight_type} '
                      f'and base_weight={self.base_weight}')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {self.edge_weight_type}
+
+    def consumes(self) -> Set[str]:
+        return {self.node_weight_type}
+
     def modify(self, graph: GraphRepresentationType):
         def get_closest_node_to(node: Tuple[int, int]) -> Tuple[int, int]:
             this_relation_value = graph.comments[node[0]].splits[node[1]].wgts[self.node_weight_type]
@@ -44,11 +53,12 @@ class GenericSingleEdgeAdder(Modifier):
             return min(distances)[1]
 
         edge_dict = build_edge_dict(graph)
+        implicit_degrees = implicit.degrees(graph)
         for comment in graph.comments:
             for j, comment_split in enumerate(comment.splits):
                 this_node = (graph.id2idx[comment.id], j)
                 node_edges = edge_dict[this_node]
-                if node_edges is None or len(node_edges) == 0:
+                if (node_edges is None or len(node_edges) == 0) and not implicit_degrees.get(this_node):
                     if j > 0:
                         other_node = (graph.id2idx[comment.id], 0)
                     else:
@@ -59,6 +69,8 @@ class GenericSingleEdgeAdder(Modifier):
 
 
 class GenericNodeMerger(Modifier):
+    changes_edges = False
+
     def __init__(self, *args, threshold: float = None, smaller_as: bool = None, edge_weight_type: str = None, **kwargs):
         """
         Merges Nodes sharing edges with weights in filter condition
@@ -77,6 +89,16 @@ class GenericNodeMerger(Modifier):
                      f'threshold={self.threshold}, smaller_as={self.smaller_as} '
                      f'and edge_weight_type={self.edge_weight_type}')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        # implicit edges of other types don't have the weight
+        return all(group.tp != self.edge_weight_type for group in graph.groups)
+
+    def produces(self) -> Set[str]:
+        return {'MERGE_ID'}
+
+    def consumes(self) -> Set[str]:
+        return {self.edge_weight_type}
+
     def modify(self, graph: GraphRepresentationType):
         if self.smaller_as:
             operator_filter = operator.le
@@ -168,6 +190,8 @@ class TemporalNodeMerger(GenericNodeMerger):
 
 
 class MultiNodeMerger(Modifier):
+    changes_edges = False
+
     def __init__(self, *args, reply_to_threshold=None, same_comment_threshold=None, same_article_threshold=None,
                  similarity_threshold=None, same_group_threshold=None, temporal_threshold=None, smaller_as=None,
                  conj_or=None, **kwargs):
@@ -209,6 +233,12 @@ class MultiNodeMerger(Modifier):
                      f'conj_or={self.conj_or}, smaller_as={self.smaller_as} '
                      f'and thresholds={self.threshold_dict}')
 
+    def produces(self) -> Set[str]:
+        return {'MERGE_ID'}
+
+    def consumes(self) -> Set[str]:
+        return set(self.threshold_dict)
+
     def modify(self, graph: GraphRepresentationType):
         def loop_further_boolean(e):
             for weight_type, threshold in self.threshold_dict.items():
@@ -292,6 +322,8 @@ class MultiNodeMerger(Modifier):
 
 
 class GenericClusterer(Modifier):
+    changes_edges = False
+
     def __init__(self, *args, edge_weight_type: str = None, algorithm: str = None, **kwargs):
         """
         Clusters nodes with the specified algorithm.
@@ -308,6 +340,12 @@ class GenericClusterer(Modifier):
                      f'algorithm={self.algorithm} '
                      f'and edge_weight_type={self.edge_weight_type}')
 
+    def produces(self) -> Set[str]:
+        return {'CLUSTER_ID'}
+
+    def consumes(self) -> Set[str]:
+        return {self.edge_weight_type}
+
     def modify(self, graph: GraphRepresentationType):
         look_up = {}
         reverse_look_up = defaultdict(set)
@@ -379,6 +417,8 @@ class TemporalClusterer(GenericClusterer):
 
 
 class MultiEdgeTypeClusterer(Modifier):
+    changes_edges = False
+
     def __init__(self, *args, use_reply_to: bool = None, use_same_comment: bool = None, use_same_article: bool = None,
                  use_similarity: bool = None, use_same_group: bool = None, use_temporal: bool = None,
                  algorithm: str = None, **kwargs):
@@ -420,6 +460,12 @@ class MultiEdgeTypeClusterer(Modifier):
         logger.debug(f'{self.__class__.__name__} initialised with '
                      f'algorithm={self.algorithm}')
 
+    def produces(self) -> Set[str]:
+        return {'CLUSTER_ID'}
+
+    def consumes(self) -> Set[str]:
+        return set(self.use_edge_types)
+
     def modify(self, graph: GraphRepresentationType):
         look_up = {}
         reverse_look_up = defaultdict(set)
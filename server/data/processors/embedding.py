@@ -1,17 +1,15 @@
 import numpy as np
-import fasttext as ft
 from typing import List, Dict
 from data.processors import Comparator, Modifier, GraphRepresentationType
 import data.models as models
 import logging
-from common import config, init_or_get_fasttext_model
+from common import init_or_get_fasttext_model, init_or_get_word_vectors
 
-FASTTEXT_PATH = config.get('TextProcessing', 'fasttext_path')
 logger = logging.getLogger('data.graph.embedding')
 
 
 def load_fasttext_model():
-    return ft.load_model(FASTTEXT_PATH)
+    return init_or_get_fasttext_model()
 
 
 def vectorize_sentence(model, sentence: str) -> List[float]:
@@ -20,7 +18,7 @@ def vectorize_sentence(model, sentence: str) -> List[float]:
 
 def vectorize_comments(model, comment_texts: List[str]) -> Dict[int, List[float]]:
     if not model:
-        model = init_or_get_fasttext_model()
+        model = init_or_get_word_vectors()
     vectorized_documents = {i: vectorize_sentence(model, comment_text.replace("\n", " "))
                             for i, comment_text in enumerate(comment_texts)}
 
@@ -55,9 +53,9 @@ class SimilarityComparator(Comparator):
         self.only_root = self.conf_getboolean('only_root', only_root)
 
         logger.debug(f'{self.__class__.__name__} initialised with max_similarity: {self.max_similarity} '
-                     f'base_weight: {self.base_weight} and only_root: {self.only_root}, load fasttext model...')
-        self.model = init_or_get_fasttext_model()
-        logger.debug(f'loaded fast text model')
+                     f'base_weight: {self.base_weight} and only_root: {self.only_root}, load word vectors...')
+        self.model = init_or_get_word_vectors()
+        logger.debug(f'loaded word vectors')
 
     def _set_weight(self, edge: models.EdgeWeights, weight: float):
         edge.SIMILARITY = weight
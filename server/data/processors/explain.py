@@ -0,0 +1,268 @@
+from configparser import ConfigParser
+from math import log2
+from statistics import median
+from typing import List, Optional, Tuple
+import json
+import logging
+
+import numpy as np
+
+import data.models as models
+from common import config
+from data.processors import Modifier
+from data.processors.clustering import GenericClusterer, GenericSingleEdgeAdder, MultiEdgeTypeClusterer
+from data.processors.graph import Plan, compile_plan, graph_config, COMPARATORS, MODIFIERS
+from data.processors.ranking import PageRanker
+from data.processors.structure import SameArticleComparator, SameCommentComparator, ReplyToComparator, \
+    TemporalComparator
+from data.processors.text import split_comment
+
+logger = logging.getLogger('data.processors.explain')
+
+# Cost models of a graph build: the comparisons take time per pair of splits (the loop itself and every active
+# comparator), a modifier per unit of its work (see units) on the edges after the comparisons, filters aren't
+# accounted for, so estimates are upper bounds. Memory is held by the splits and edges. The defaults are rough values,
+# calibrate turns benchmark results (see scripts/benchmark_graph.py --calibrate) into costs of the machine.
+DEFAULT_COSTS = {
+    'pair_seconds': 7e-6,
+    'comparator_seconds': {'SameCommentComparator': 8e-7, 'SameArticleComparator': 1e-6, 'ReplyToComparator': 8e-7,
+                           'TemporalComparator': 1.7e-6, 'SimilarityComparator': 3e-5},
+    # pairs a comparator gives a weight, for those without a model of their edges (see _comparator_edges)
+    'edge_rates': {'SimilarityComparator': 1.},
+    'unit_seconds': 2e-6,
+    'modifier_seconds': {'PageRanker': 1e-7, 'CentralityDegreeCalculator': 1.5e-6, 'SizeRanker': 4e-8,
+                         'VotesRanker': 4e-8, 'RecencyRanker': 4e-8, 'VotesFilter': 1e-5,
+                         'GenericSingleEdgeAdder': 4e-6},
+    'split_bytes': 1200,
+    'edge_bytes': 1200
+}
+
+# comparators whose edges are counted from the structure of the comments
+STRUCTURE = [SameCommentComparator, SameArticleComparator, ReplyToComparator, TemporalComparator]
+
+_costs: Optional[dict] = None
+
+
+class OverBudgetException(Exception):
+    def __init__(self, explanation: models.GraphExplain):
+        super().__init__(f'Graph estimated to take {explanation.seconds:.0f}s and '
+                         f'{explanation.memory / 2 ** 20:.0f} MB, over the budget of the server')
+        self.explanation = explanation
+
+
+def costs() -> dict:
+    """
+    Costs calibrated for this server ([Explain] calibration_path) on top of the defaults, loaded once.
+    """
+    global _costs
+    if _costs is None:
+        path = config.get('Explain', 'calibration_path', fallback='').strip()
+        calibrated = {}
+        if path:
+            with open(path, 'r') as f:
+                calibrated = json.load(f)
+            logger.info(f'Loaded calibrated costs from {path}')
+        _costs = {key: {**value, **calibrated.get(key, {})} if isinstance(value, dict) else calibrated.get(key, value)
+                  for key, value in DEFAULT_COSTS.items()}
+    return _costs
+
+
+def units(modifier: Modifier, nodes: int, edges: int) -> float:
+    """
+    Work of a modifier on a graph with `nodes` splits and `edges` edges, in the unit its seconds are calibrated in.
+    """
+    if isinstance(modifier, PageRanker):
+        return modifier.num_iterations * (nodes + edges)
+    if isinstance(modifier, (GenericClusterer, MultiEdgeTypeClusterer)):
+        if modifier.algorithm.lower().endswith('girvannewman'):
+            # edge betweenness of the whole graph after removing every edge, until it falls apart
+            return float(nodes) * edges * edges
+        return edges * log2(nodes + 2) + nodes
+    if isinstance(modifier, GenericSingleEdgeAdder):
+        # splits without edges look for the closest of all splits
+        return float(nodes) * nodes
+    return nodes + edges
+
+
+class SplitCounts:
+    """
+    Splits of every comment and the structure of the comments, all the edge models of the comparators need.
+    :param splits: the comments already split (in the same order), otherwise they are split here
+    """
+    def __init__(self, comments: List[models.CommentCached], splits: Optional[List[models.SplitComment]] = None):
+        splits = splits if splits is not None else [split_comment(comment) for comment in comments]
+        self.splits = np.array([len(comment.splits) for comment in splits], dtype=np.int64)
+        index = {comment.id: i for i, comment in enumerate(comments)}
+        self.parents = np.array([index.get(comment.reply_to_id, -1) for comment in comments], dtype=np.int64)
+        self.articles = np.array([comment.article_id for comment in comments], dtype=np.int64)
+        # comments without a timestamp have no time (NaN), nothing is close in time to them
+        start = next((comment.timestamp for comment in comments if comment.timestamp is not None), None)
+        self.times = np.array([np.nan if comment.timestamp is None else (comment.timestamp - start).total_seconds()
+                               for comment in comments], dtype=np.float64)
+
+    @property
+    def pairs(self) -> int:
+        num_splits = int(self.splits.sum())
+        return num_splits * (num_splits - 1) // 2
+
+    def article_pairs(self, only_root: bool) -> int:
+        splits = np.minimum(self.splits, 1) if only_root else self.splits
+        per_article = np.bincount(np.unique(self.articles, return_inverse=True)[1], weights=splits) \
+            if len(splits) else np.zeros(0)
+        return int((per_article * (per_article - 1) // 2).sum())
+
+    def temporal_pairs(self, max_time: float) -> int:
+        # pairs of splits less than max_time apart, within a comment all of them
+        dated = ~np.isnan(self.times)
+        order = np.argsort(self.times[dated], kind='stable')
+        times, splits = self.times[dated][order], self.splits[dated][order]
+        cumulative = np.concatenate([[0], np.cumsum(splits)])
+        end = np.searchsorted(times, times + max_time, side='left')
+        later = cumulative[end] - cumulative[np.arange(len(times)) + 1]
+        return int((splits * later).sum() + (splits * (splits - 1) // 2).sum())
+
+
+def _comparator_edges(comparator_type: type, conf: ConfigParser, counts: SplitCounts) -> Tuple[int, int]:
+    """
+    :return: explicit and implicit edges the comparator gives a weight
+    """
+    if comparator_type not in STRUCTURE:
+        return int(counts.pairs * costs()['edge_rates'].get(comparator_type.__name__, 1.)), 0
+    # cheap to create, they read their settings like in the build
+    comparator = comparator_type(conf=conf)
+    if isinstance(comparator, SameCommentComparator):
+        splits = counts.splits
+        per_comment = np.maximum(splits - 1, 0) if comparator.only_consecutive else splits * (splits - 1) // 2
+        return int(per_comment.sum()), 0
+    if isinstance(comparator, SameArticleComparator):
+        pairs = counts.article_pairs(comparator.only_root)
+        return (0, pairs) if comparator.implicit and comparator.base_weight else (pairs, 0)
+    if isinstance(comparator, ReplyToComparator):
+        replies = counts.parents >= 0
+        splits, parent_splits = counts.splits[replies], counts.splits[counts.parents[replies]]
+        if comparator.only_root:
+            return int(((splits > 0) & (parent_splits > 0)).sum()), 0
+        return int((splits * parent_splits).sum()), 0
+    return counts.temporal_pairs(comparator.max_time), 0
+
+
+def estimate(counts: SplitCounts, plan: Plan) -> dict:
+    """
+    Pairs, edges, memory and seconds of the build of `plan` and seconds of every stage.
+    """
+    cost = costs()
+    nodes, pairs = int(counts.splits.sum()), counts.pairs
+    edges = implicit_edges = 0
+    for comparator in plan.comparator_types:
+        explicit, implicit = _comparator_edges(comparator, plan.conf, counts)
+        edges += explicit
+        implicit_edges += implicit
+    # pairs several comparators give a weight are one edge
+    edges = min(edges, pairs)
+    pair_seconds = cost['pair_seconds'] + sum(cost['comparator_seconds'].get(comparator.__name__, 0.)
+                                              for comparator in plan.comparator_types)
+    stages = [models.GraphStageEstimate(stage='comparisons', units=pairs, seconds=pairs * pair_seconds)]
+    for modifier in [modifier for wave in plan.waves for modifier in wave]:
+        name = modifier.__class__.__name__
+        work = units(modifier, nodes, edges + implicit_edges)
+        stages.append(models.GraphStageEstimate(
+            stage=name, units=work, seconds=work * cost['modifier_seconds'].get(name, cost['unit_seconds'])))
+    return {'comments': len(counts.splits), 'splits': nodes, 'pairs': pairs, 'edges': edges,
+            'implicit_edges': implicit_edges, 'memory': int(nodes * cost['split_bytes'] + edges * cost['edge_bytes']),
+            'seconds': sum(stage.seconds for stage in stages), 'stages': stages}
+
+
+def _over_budget(estimated: dict) -> bool:
+    return estimated['seconds'] > config.getfloat('Explain', 'max_seconds', fallback=float('inf')) or \
+        estimated['memory'] > config.getfloat('Explain', 'max_memory_mb', fallback=float('inf')) * 2 ** 20
+
+
+def _downgrade(plan: Plan, estimated: dict) -> Optional[Tuple[str, dict]]:
+    """
+    The next downgrade of an over budget plan: clustering with greedy modularity instead of Girvan-Newman, otherwise
+    leaving out the most expensive modifier that only writes weights no other modifier reads.
+    :return: its description and the config sections it changes
+    """
+    modifiers = [modifier for wave in plan.waves for modifier in wave]
+    for modifier in modifiers:
+        if getattr(modifier, 'algorithm', '').lower().endswith('girvannewman'):
+            name = modifier.__class__.__name__
+            return f'{name} uses greedyModularityCommunities', {name: {'algorithm': 'greedyModularityCommunities'}}
+    seconds = {stage.stage: stage.seconds for stage in estimated['stages']}
+    consumed = set().union(*[modifier.consumes() for modifier in modifiers])
+    optional = [modifier for modifier in modifiers
+                if not modifier.changes_edges and not {str(tp).split('.')[-1] for tp in modifier.produces()} & consumed]
+    if not optional:
+        return None
+    name = max(optional, key=lambda modifier: seconds.get(modifier.__class__.__name__, 0.)).__class__.__name__
+    return f'{name} left out', {name: {'active': False}}
+
+
+def explain(comments: List[models.CommentCached], conf: dict = None, policy: str = None,
+            splits: Optional[List[models.SplitComment]] = None) -> models.GraphExplain:
+    """
+    Estimates the build of the graph of `comments` with `conf` and decides whether to build it, see [Explain] policy:
+    off admits every graph, reject rejects graphs over budget, downgrade downgrades them until they are within,
+    rejecting them if that isn't possible.
+    :param splits: the comments already split, e.g. to pass them on to the build, see SplitCounts
+    """
+    policy = policy or config.get('Explain', 'policy', fallback='off')
+    counts = SplitCounts(comments, splits)
+    plan = compile_plan(conf)
+    estimated = estimate(counts, plan)
+    downgrades = []
+    while policy == 'downgrade' and _over_budget(estimated):
+        downgrade = _downgrade(plan, estimated)
+        if downgrade is None:
+            break
+        description, sections = downgrade
+        logger.debug(f'Downgrade: {description}')
+        downgrades.append(description)
+        conf = {**(conf or {}), **{section: {**(conf or {}).get(section, {}), **values}
+                                   for section, values in sections.items()}}
+        plan = compile_plan(conf)
+        estimated = estimate(counts, plan)
+
+    if policy == 'off' or not _over_budget(estimated):
+        admission = models.GraphAdmission.DOWNGRADED if downgrades else models.GraphAdmission.ADMITTED
+    else:
+        admission = models.GraphAdmission.REJECTED
+    return models.GraphExplain(**estimated, admission=admission, downgrades=downgrades, conf=conf)
+
+
+def calibrate(results: dict) -> dict:
+    """
+    Costs of the machine benchmark.run_suite ran on (medians over all fixtures and configurations), only those
+    the results have stages for.
+    """
+    comparators, modifiers = {c.__name__ for c in COMPARATORS}, {m.__name__: m for m in MODIFIERS}
+    samples = {'pair_seconds': [], 'comparator_seconds': {}, 'edge_rates': {}, 'modifier_seconds': {},
+               'split_bytes': [], 'edge_bytes': []}
+    for result in results['results']:
+        if 'stages' not in result:
+            continue
+        stages, nodes = result['stages'], result['splits']
+        pairs = nodes * (nodes - 1) // 2
+        if 'comparisons' in stages and pairs:
+            comparing = sum(stage['wall']['median'] for name, stage in stages.items() if name in comparators)
+            samples['pair_seconds'].append(max(stages['comparisons']['wall']['median'] - comparing, 0.) / pairs)
+            if stages['comparisons'].get('memory_peak') and stages['comparisons']['edges_out']:
+                samples['edge_bytes'].append(stages['comparisons']['memory_peak'] / stages['comparisons']['edges_out'])
+        if stages.get('split', {}).get('memory_peak') and nodes:
+            samples['split_bytes'].append(stages['split']['memory_peak'] / nodes)
+        conf = graph_config(result['conf'])
+        for name, stage in stages.items():
+            if name in comparators and stage['edges_in']:
+                samples['comparator_seconds'].setdefault(name, []).append(stage['wall']['median'] / stage['edges_in'])
+                samples['edge_rates'].setdefault(name, []).append(stage['edges_out'] / stage['edges_in'])
+            elif name in modifiers and stage['edges_in'] is not None:
+                work = units(modifiers[name](conf=conf), nodes, stage['edges_in'])
+                if work:
+                    samples['modifier_seconds'].setdefault(name, []).append(stage['wall']['median'] / work)
+    calibrated = {}
+    for key, values in samples.items():
+        if isinstance(values, dict):
+            calibrated[key] = {name: median(v) for name, v in values.items()}
+        elif values:
+            calibrated[key] = median(values)
+    return calibrated
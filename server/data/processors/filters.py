@@ -1,5 +1,7 @@
 import logging
-from data.processors import Modifier, GraphRepresentationType
+from typing import Dict, List, Set
+import numpy as np
+from data.processors import Modifier, GraphRepresentationType, implicit
 from data.processors.ranking import build_edge_dict
 import operator
 
@@ -10,7 +12,19 @@ logger = logging.getLogger('data.graph.filters')
 # Edge Filters
 #
 
+def edge_columns(edges, weight_types) -> Dict[str, np.ndarray]:
+    """
+    The weights of the edges as one column per weight type, NaN where not set, built in one pass over the edges
+    """
+    fields = [str(weight_type).split('.')[-1] for weight_type in weight_types]
+    values = np.array([[edge.wgts.__dict__[field] for field in fields] for edge in edges],
+                      dtype='float64').reshape(len(edges), len(fields))
+    return {weight_type: values[:, k] for k, weight_type in enumerate(weight_types)}
+
+
 class GenericEdgeFilter(Modifier):
+    depends_on_edges = False
+
     def __init__(self, *args, threshold: float = None, edge_type: str = None, smaller_as: bool = None, **kwargs):
         """
         Removes all edges of the specific type below a threshold
@@ -30,14 +44,34 @@ class GenericEdgeFilter(Modifier):
                      f'smaller_as={self.smaller_as} '
                      f'and edge_type={self.edge_type}')
 
-    def modify(self, graph: GraphRepresentationType):
+    def edge_predicate(self):
         if self.smaller_as:
             operator_filter = operator.le
         else:
             operator_filter = operator.ge
 
-        graph.edges = [edge for edge in graph.edges
-                       if edge.wgts[self.edge_type] and operator_filter(edge.wgts[self.edge_type], self.threshold)]
+        def keep(wgts):
+            weight = wgts[self.edge_type]
+            return bool(weight) and operator_filter(weight, self.threshold)
+        return keep
+
+    def edge_mask(self, columns: Dict[str, np.ndarray], size: int) -> np.ndarray:
+        """
+        edge_predicate over the columns of all edges, see edge_columns
+        """
+        operator_filter = operator.le if self.smaller_as else operator.ge
+        weights = columns[self.edge_type]
+        # NaN compares false
+        return (weights != 0) & operator_filter(weights, self.threshold)
+
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def consumes(self) -> Set[str]:
+        return {self.edge_type}
+
+    def modify(self, graph: GraphRepresentationType):
+        implicit.filter_edges(graph, self.edge_predicate())
         return graph
 
 
@@ -72,6 +106,8 @@ class TemporalEdgeFilter(GenericEdgeFilter):
 
 
 class OrEdgeFilter(Modifier):
+    depends_on_edges = False
+
     def __init__(self, *args, reply_to_threshold: float = None, same_comment_threshold: float = None,
                  same_article_threshold: float = None, similarity_threshold: float = None,
                  same_group_threshold: float = None, temporal_threshold: float = None, **kwargs):
@@ -105,21 +141,84 @@ class OrEdgeFilter(Modifier):
                      f'temporal_threshold={self.temporal_threshold} '
                      )
 
+    def edge_predicate(self):
+        def keep(wgts):
+            return bool((wgts.REPLY_TO and 0 < self.reply_to_threshold < wgts.REPLY_TO and wgts.REPLY_TO)
+                        or (wgts.SAME_COMMENT and 0 < self.same_comment_threshold < wgts.SAME_COMMENT
+                            and wgts.SAME_COMMENT)
+                        or (wgts.SAME_ARTICLE and 0 < self.same_article_threshold < wgts.SAME_ARTICLE
+                            and wgts.SAME_ARTICLE)
+                        or (wgts.SIMILARITY and 0 < self.similarity_threshold < wgts.SIMILARITY and wgts.SIMILARITY)
+                        or (wgts.SAME_GROUP and 0 < self.same_group_threshold < wgts.SAME_GROUP and wgts.SAME_GROUP)
+                        or (wgts.TEMPORAL and 0 < wgts.TEMPORAL < self.temporal_threshold and wgts.TEMPORAL))
+        return keep
+
+    def edge_mask(self, columns: Dict[str, np.ndarray], size: int) -> np.ndarray:
+        mask = np.zeros(size, dtype=bool)
+        for weight_type, threshold in [('REPLY_TO', self.reply_to_threshold),
+                                       ('SAME_COMMENT', self.same_comment_threshold),
+                                       ('SAME_ARTICLE', self.same_article_threshold),
+                                       ('SIMILARITY', self.similarity_threshold),
+                                       ('SAME_GROUP', self.same_group_threshold)]:
+            if threshold > 0:
+                mask |= columns[weight_type] > threshold
+        if self.temporal_threshold > 0:
+            weights = columns['TEMPORAL']
+            mask |= (0 < weights) & (weights < self.temporal_threshold)
+        return mask
+
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def consumes(self) -> Set[str]:
+        return {weight_type for weight_type, threshold in [
+            ('REPLY_TO', self.reply_to_threshold), ('SAME_COMMENT', self.same_comment_threshold),
+            ('SAME_ARTICLE', self.same_article_threshold), ('SIMILARITY', self.similarity_threshold),
+            ('SAME_GROUP', self.same_group_threshold), ('TEMPORAL', self.temporal_threshold)] if threshold > 0}
+
     def modify(self, graph: GraphRepresentationType):
-        graph.edges = [edge for edge in graph.edges
-                       if (edge.wgts.REPLY_TO and 0 < self.reply_to_threshold < edge.wgts.REPLY_TO
-                           and edge.wgts.REPLY_TO)
-                       or (edge.wgts.SAME_COMMENT and 0 < self.same_comment_threshold < edge.wgts.SAME_COMMENT
-                           and edge.wgts.SAME_COMMENT)
-                       or (edge.wgts.SAME_ARTICLE and 0 < self.same_article_threshold < edge.wgts.SAME_ARTICLE
-                           and edge.wgts.SAME_ARTICLE)
-                       or (edge.wgts.SIMILARITY and 0 < self.similarity_threshold < edge.wgts.SIMILARITY
-                           and edge.wgts.SIMILARITY)
-                       or (edge.wgts.SAME_GROUP and 0 < self.same_group_threshold < edge.wgts.SAME_GROUP
-                           and edge.wgts.SAME_GROUP)
-                       or (edge.wgts.TEMPORAL and 0 < edge.wgts.TEMPORAL < self.temporal_threshold
-                           and edge.wgts.TEMPORAL)
-                       ]
+        implicit.filter_edges(graph, self.edge_predicate())
+        return graph
+
+
+class FusedEdgeFilter(Modifier):
+    depends_on_edges = False
+
+    def __init__(self, filters: List[Modifier], *args, **kwargs):
+        """
+        Consecutive edge filters as one, an edge is kept if all of them keep it. Their conditions are evaluated
+        together over columns of the edge weights and the edges filtered once (see Plan._fuse)
+        :param filters: filters with edge_predicate and edge_mask
+        """
+        super().__init__(*args, **kwargs)
+        self.filters = filters
+
+        logger.debug(f'{self.__class__.__name__} initialised with '
+                     f'filters={[f.__class__.__name__ for f in self.filters]}')
+
+    def consumes(self) -> Set[str]:
+        return set().union(*[f.consumes() for f in self.filters])
+
+    def settings(self) -> dict:
+        return {f.__class__.__name__: f.settings() for f in self.filters}
+
+    def edge_predicate(self):
+        predicates = [f.edge_predicate() for f in self.filters]
+
+        def keep(wgts):
+            return all(predicate(wgts) for predicate in predicates)
+        return keep
+
+    def edge_mask(self, columns: Dict[str, np.ndarray], size: int) -> np.ndarray:
+        return np.logical_and.reduce([f.edge_mask(columns, size) for f in self.filters])
+
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def modify(self, graph: GraphRepresentationType):
+        columns = edge_columns(graph.edges, sorted(self.consumes()))
+        mask = self.edge_mask(columns, len(graph.edges))
+        implicit.filter_edges(graph, self.edge_predicate(), mask=mask.tolist())
         return graph
 
 
@@ -143,6 +242,9 @@ class GenericBottomEdgeFilter(Modifier):
                      f'for edge_type={self.edge_type} '
                      f'with descending_order={self.descending_order}')
 
+    def consumes(self) -> Set[str]:
+        return {self.edge_type}
+
     def modify(self, graph: GraphRepresentationType):
         def filter_none(wgt_type):
             if wgt_type is None:
@@ -207,6 +309,9 @@ class BottomSameGroupEdgeFilter(GenericBottomEdgeFilter):
 # Node Filters
 #
 class GenericNodeWeightFilter(Modifier):
+    # decides every edge on the weights of its nodes, which don't depend on edges themselves
+    depends_on_edges = False
+
     def __init__(self, *args, threshold: float = None, node_weight_type: str = None, strict: bool = None,
                  smaller_as: bool = None, **kwargs):
         """
@@ -230,6 +335,12 @@ class GenericNodeWeightFilter(Modifier):
                      f'smaller_as={self.smaller_as} '
                      f'and node_weight_type={self.node_weight_type}')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def consumes(self) -> Set[str]:
+        return {self.node_weight_type}
+
     def modify(self, graph: GraphRepresentationType):
 
         if self.smaller_as:
@@ -247,6 +358,7 @@ class GenericNodeWeightFilter(Modifier):
         else:
             graph.edges = [edge for edge in graph.edges
                            if edge.src in relevant_nodes and edge.tgt in relevant_nodes]
+        implicit.restrict(graph, set(relevant_nodes))
 
         return graph
 
@@ -288,6 +400,9 @@ class ToxicityFilter(GenericNodeWeightFilter):
 
 
 class GenericNodeWeightBottomFilter(Modifier):
+    # decides every edge on the weights of its nodes, which don't depend on edges themselves
+    depends_on_edges = False
+
     def __init__(self, *args, top_k: int = None, node_weight_type: str = None, strict: bool = None,
                  descending_order: bool = None, **kwargs):
         """
@@ -310,6 +425,13 @@ class GenericNodeWeightBottomFilter(Modifier):
                      f'on {self.node_weight_type} '
                      f'with descending_order={self.descending_order}')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        # edges of a group between one top-k node and another node are no group anymore
+        return self.strict
+
+    def consumes(self) -> Set[str]:
+        return {self.node_weight_type}
+
     def modify(self, graph: GraphRepresentationType):
         weights = {(graph.id2idx[comment.id], j): split.wgts[self.node_weight_type]
                    for comment in graph.comments for j, split in enumerate(comment.splits)}
@@ -318,6 +440,7 @@ class GenericNodeWeightBottomFilter(Modifier):
         if self.strict:
             graph.edges = [edge for edge in graph.edges
                            if edge.src in filtered_ranks and edge.tgt in filtered_ranks]
+            implicit.restrict(graph, filtered_ranks)
         else:
             graph.edges = [edge for edge in graph.edges
                            if edge.src in filtered_ranks or edge.tgt in filtered_ranks]
@@ -2,16 +2,22 @@ from data.processors import ranking
 from data.processors.clustering import *
 from data.processors.text import split_comment
 import data.models as models
-from typing import List
-from data.processors import GraphRepresentationType
+from typing import Iterable, List, Callable, Optional, Sequence, Set, Tuple, Union
+from data.processors import GraphRepresentationType, Comparator, Modifier, implicit, memo
 from data.processors.structure import SameArticleComparator, SameCommentComparator, ReplyToComparator, \
     TemporalComparator
 from data.processors.embedding import SimilarityComparator
 from data.processors.ranking import PageRanker, CentralityDegreeCalculator, SizeRanker, VotesRanker, RecencyRanker, \
     ToxicityRanker
 from data.processors.filters import *
+from data.processors.tracing import Tracer
+from data.columnar import CommentRow
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from configparser import ConfigParser
+import hashlib
+import json
 from common import config
 import logging
 
@@ -55,47 +61,304 @@ MODIFIERS = [
 logger = logging.getLogger('data.processors.graph')
 
 
+# progress(stage, done, total) reports the graph construction: 'index' (comments), 'comparisons' (pairs of splits,
+# after every comment) and one stage per active modifier named after its class (0/1 before, 1/1 after it ran),
+# consecutive edge filters run as one FusedEdgeFilter stage
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def graph_config(conf: dict = None) -> ConfigParser:
+    """
+    Temporary copy of the global config with `conf` on top.
+    """
+    merged = ConfigParser()
+    merged.read_dict(config)
+    if conf is not None:
+        merged.read_dict(conf)
+    return merged
+
+
+def _weight_types(types: Iterable[str]) -> Set[str]:
+    # weight types set from a request config are 'NodeWeightType.VOTES' in the config
+    return {str(weight_type).split('.')[-1] for weight_type in types}
+
+
+def _access(modifier: Modifier) -> Tuple[Set[str], Set[str]]:
+    # what a modifier reads and writes, 'edges' stands for the edges and groups
+    reads = _weight_types(modifier.consumes())
+    writes = _weight_types(modifier.produces())
+    if modifier.depends_on_edges or modifier.changes_edges:
+        reads.add('edges')
+    if modifier.changes_edges:
+        writes.add('edges')
+    return reads, writes
+
+
+class Plan:
+    """
+    The configured stages of a build: active comparators, the filters applied while creating the edges and the
+    waves of modifiers, compiled once per effective config (see compile_plan). Stages keep no state between builds,
+    so all builds with the same config share them.
+    """
+    def __init__(self, conf: ConfigParser):
+        self.conf = conf
+        self.workers = conf.getint('GraphRepresentation', 'workers', fallback=1)
+        self.memo = memo.STAGES.size > 0 and conf.getboolean('GraphRepresentation', 'memo', fallback=True)
+        self.comparator_types = [comparator for comparator in COMPARATORS if comparator.is_on(conf)]
+        modifiers = self._demanded([modifier(conf=conf) for modifier in MODIFIERS if modifier.is_on(conf)])
+        remaining, self.pushed = self._push_down(modifiers)
+        self.predicates = [modifier.edge_predicate() for modifier in self.pushed]
+        self.waves = self._schedule(self._fuse(remaining))
+        # comparisons built without modifiers (see data.processors.sweep) had no filters applied
+        self.reuse_waves = self._schedule(self._fuse(modifiers))
+        # a graph kept before the i-th wave (or restored to continue with it) only needs its own copy of the splits
+        # if a wave from there on writes their weights, see data.processors.memo
+        writes = [bool(set().union(*[modifier.produces() for modifier in wave]) & set(models.SplitWeights.__fields__))
+                  for wave in self.waves]
+        self.copy_splits = [any(writes[i:]) for i in range(len(self.waves) + 1)]
+
+    @cached_property
+    def comparators(self) -> List[Comparator]:
+        # created by the first build, not when a plan is only estimated (SimilarityComparator loads the word vectors)
+        return [comparator(conf=self.conf) for comparator in self.comparator_types]
+
+    def stage_keys(self, comments: Sequence[Union[models.CommentCached, CommentRow]]) -> List[str]:
+        """
+        Keys of the graph after the comparisons and after every wave (see data.processors.memo), the comparisons
+        depend on the active comparators and the filters applied while creating the edges. Waves chain the keys of
+        their modifiers in order, so with and without workers the graph after a wave has the same key.
+        """
+        settings = {comparator.__class__.__name__: comparator.settings() for comparator in self.comparators}
+        settings['pushed'] = [[modifier.__class__.__name__, modifier.settings()] for modifier in self.pushed]
+        keys = [memo.stage_key(memo.fingerprint(comments), 'comparisons', settings)]
+        for wave in self.waves:
+            key = keys[-1]
+            for modifier in wave:
+                key = memo.stage_key(key, modifier.__class__.__name__, modifier.settings())
+            keys.append(key)
+        return keys
+
+    def _demanded(self, modifiers: List[Modifier]) -> List[Modifier]:
+        """
+        Modifiers that only write weights of splits (rankers, mergers, clusterers) are left out if neither a later
+        modifier nor the response needs those weights, [GraphRepresentation] node_weights lists the ones of the
+        response (* for all).
+        """
+        node_weights = self.conf.get('GraphRepresentation', 'node_weights', fallback='*').strip()
+        if node_weights == '*':
+            needed = set(models.SplitWeights.__fields__)
+        else:
+            needed = {weight.strip() for weight in node_weights.split(',') if weight.strip()}
+        demanded = []
+        for modifier in reversed(modifiers):
+            produces = _weight_types(modifier.produces())
+            if not modifier.changes_edges:
+                if not produces & needed:
+                    logger.debug(f'{modifier.__class__.__name__} skipped, {produces} not needed')
+                    continue
+                # weights of every split are written, earlier modifiers writing them aren't needed for them
+                needed -= produces
+            needed |= _weight_types(modifier.consumes())
+            demanded.append(modifier)
+        return demanded[::-1]
+
+    @staticmethod
+    def _push_down(modifiers: List[Modifier]) -> Tuple[List[Modifier], List[Modifier]]:
+        """
+        Edge filters that only look at the weights of each edge are applied while creating the edges, as long as
+        no modifier running before them depends on the edges (the graph is the same as filtering afterwards).
+        Their stages are reported done once the comparisons are.
+        :return: the modifiers left to run and the filters applied while creating the edges
+        """
+        remaining, pushed = [], []
+        pushable = True
+        for modifier in modifiers:
+            if pushable and modifier.edge_predicate() is not None:
+                logger.debug(f'{modifier.__class__.__name__} is applied while creating the edges')
+                pushed.append(modifier)
+                continue
+            pushable = pushable and not modifier.depends_on_edges
+            remaining.append(modifier)
+        return remaining, pushed
+
+    def _fuse(self, modifiers: List[Modifier]) -> List[Modifier]:
+        """
+        Consecutive edge filters (those with an edge predicate) run as one FusedEdgeFilter, which filters the edges
+        in a single pass instead of one per filter.
+        """
+        fused, run = [], []
+        for modifier in modifiers + [None]:
+            if modifier is not None and modifier.edge_predicate() is not None:
+                run.append(modifier)
+                continue
+            if len(run) > 1:
+                logger.debug(f'{[f.__class__.__name__ for f in run]} are fused')
+                fused.append(FusedEdgeFilter(run, conf=self.conf))
+            else:
+                fused += run
+            run = []
+            if modifier is not None:
+                fused.append(modifier)
+        return fused
+
+    @staticmethod
+    def _waves(modifiers: List[Modifier]) -> List[List[Modifier]]:
+        """
+        Modifiers in waves of their dependency DAG: a modifier depends on every earlier one that writes what it reads
+        or reads or writes what it writes, weight types and the edges (see _access). A wave only depends on earlier
+        waves, so its modifiers can run at the same time.
+        """
+        accesses = [_access(modifier) for modifier in modifiers]
+        levels = []
+        for i, (reads, writes) in enumerate(accesses):
+            levels.append(max([levels[j] + 1 for j, (other_reads, other_writes) in enumerate(accesses[:i])
+                               if writes & (other_reads | other_writes) or reads & other_writes], default=0))
+        return [[modifier for modifier, level in zip(modifiers, levels) if level == wave]
+                for wave in range(max(levels, default=-1) + 1)]
+
+    def _schedule(self, modifiers: List[Modifier]) -> List[List[Modifier]]:
+        # with a single worker every modifier runs on its own, in order
+        return self._waves(modifiers) if self.workers > 1 else [[modifier] for modifier in modifiers]
+
+
+def plan_key(conf: dict = None) -> str:
+    """
+    Equal for request configs giving the same effective config, ConfigParser turns every value into a string and
+    every option into lower case.
+    """
+    sections = {section: {str(key).lower(): None if value is None else str(value) for key, value in values.items()}
+                for section, values in (conf or {}).items()}
+    return hashlib.sha1(json.dumps(sections, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+PLANS = memo.LRUCache(config.getint('GraphRepresentation', 'plans', fallback=64))
+
+
+def compile_plan(conf: dict = None) -> Plan:
+    """
+    The plan of `conf` on top of the global config, compiled if none of the recently used plans has the same key.
+    """
+    key = plan_key(conf)
+    plan = PLANS.get(key)
+    if plan is None:
+        plan = Plan(graph_config(conf))
+        PLANS.put(key, plan)
+    return plan
+
+
 class GraphRepresentation(GraphRepresentationType):
-    def __init__(self, comments: List[models.CommentCached], conf: dict = None):
+    """
+    :param comparisons: graph of the same comments, built with the same comparators but no modifiers
+                        (see data.processors.sweep), its splits and edges are used instead of comparing again
+    :param splits: the comments already split with split_comment (in the same order), e.g. for the admission
+                   (see data.cache), used instead of splitting them again. The build writes their weights.
+    """
+    def __init__(self, comments: Sequence[Union[models.CommentCached, CommentRow]], conf: dict = None,
+                 progress: Optional[ProgressCallback] = None, tracer: Optional[Tracer] = None,
+                 comparisons: Optional[GraphRepresentationType] = None,
+                 splits: Optional[List[models.SplitComment]] = None):
         super().__init__(comments)
+        self.progress = progress or (lambda stage, done, total: None)
+        self.tracer = tracer or Tracer()
+        self.plan = compile_plan(conf)
+        self.conf = self.plan.conf
 
-        # create a temporary copy of the global config
-        self.conf = ConfigParser()
-        self.conf.read_dict(config)
-        if conf is not None:
-            self.conf.read_dict(conf)
-        self.comments: List[models.SplitComment] = [split_comment(comment) for comment in comments]
+        if comparisons is not None:
+            with self.tracer.span('reuse', self):
+                self._reuse(comparisons)
+            logger.info(f'Modify graph...')
+            self._modify(self.plan.reuse_waves)
+            return
 
         # config: configuration from DEFAULT.ini
         # self.conf: configuration from code
         # delete, due this is only for testing purposes because the code config overrides the configuration from file
         # self.conf = config
 
+        keys = self.plan.stage_keys(comments) if self.plan.memo else None
+        restored = self._restore(keys) if keys else None
+        if restored is not None:
+            logger.info(f'Modify graph...')
+            self._modify(self.plan.waves[restored:], keys[restored + 1:])
+            logger.info(f'Graph processing completed.')
+            return
+
+        if splits is None:
+            with self.tracer.span('split'):
+                splits = [split_comment(comment) for comment in comments]
+        self.comments: List[models.SplitComment] = splits
+
         logger.debug(f'{len(self.comments)} comments turned '
                      f'into {len([s for c in self.comments for s in c.splits])} splits')
 
         # construct graph
         logger.info(f'Build index...')
-        self._build_index()
+        with self.tracer.span('index'):
+            self._build_index()
         logger.info(f'Calculate edges...')
-        self._pairwise_comparisons()
+        with self.tracer.span('comparisons', self):
+            self._pairwise_comparisons()
+        if keys:
+            memo.STAGES.put(keys[0], memo.snapshot(self, self.plan.copy_splits[0]))
+        for modifier in self.plan.pushed:
+            self.progress(modifier.__class__.__name__, 1, 1)
         logger.info(f'Modify graph...')
-        self._modify()
+        self._modify(self.plan.waves, keys[1:] if keys else None)
         logger.info(f'Graph processing completed.')
 
     def __dict__(self) -> models.Graph.__dict__:
         return {
             'comments': self.comments,
             'id2idx': self.id2idx,
-            'edges': self.edges
+            'edges': self.edges,
+            'groups': self.groups
         }
 
+    def _reuse(self, comparisons: GraphRepresentationType):
+        self.comments = memo.copy_comments(comparisons.comments)
+        self.id2idx = comparisons.id2idx
+        self.edges = list(comparisons.edges)
+        self.groups = list(comparisons.groups)
+
+    def _restore(self, keys: List[str]) -> Optional[int]:
+        """
+        Restores the graph after the latest stage in memo.STAGES and reports it and all before as done.
+        :return: the number of waves restored (0 for only the comparisons) or None if no stage was found
+        """
+        for restored in reversed(range(len(keys))):
+            state = memo.STAGES.get(keys[restored])
+            if state is None:
+                continue
+            logger.debug(f'Graph restored after {restored} waves')
+            with self.tracer.span('memo', self):
+                memo.restore(self, state, self.plan.copy_splits[restored])
+            self.progress('index', len(self.comments), len(self.comments))
+            self.progress('comparisons', 1, 1)
+            for modifier in self.plan.pushed + [modifier for wave in self.plan.waves[:restored] for modifier in wave]:
+                self.progress(modifier.__class__.__name__, 1, 1)
+            return restored
+        return None
+
     def _build_index(self):
+        self.progress('index', 0, len(self.comments))
         for i, comment in enumerate(self.comments):
             self.id2idx[comment.id] = i
+        self.progress('index', len(self.comments), len(self.comments))
 
     def _pairwise_comparisons(self):
-        comparators = [comparator(conf=self.conf) for comparator in COMPARATORS if comparator.is_on(self.conf)]
+        comparators, predicates = self.plan.comparators, self.plan.predicates
+        self._build_groups(comparators, predicates)
+        # pairs with only the weight of a group are its implicit edges
+        implicit_types = {group.tp for group in self.groups}
+        members = {node: g for g, group in enumerate(self.groups) for node in group.nodes}
+        excluded = [[] for _ in self.groups]
+        if self.tracer.comparators:
+            comparators = [self.tracer.comparator(comparator) for comparator in comparators]
+        # every split is compared to all later splits, progress is counted in pairs of splits
+        num_splits = sum(len(comment.splits) for comment in self.comments)
+        num_pairs = num_splits * (num_splits - 1) // 2
+        pairs_done = split_idx = 0
+        self.progress('comparisons', pairs_done, num_pairs)
         for i in (range(len(self.comments))):
             comment_i = self.comments[i]
             orig_comment_i = self.orig_comments[i]
@@ -111,18 +374,58 @@ class GraphRepresentation(GraphRepresentationType):
                             comparator.update_edge_weights(edge_weights,
                                                            orig_comment_i, comment_i,
                                                            orig_comment_j, comment_j, si, sj)
-                        if edge_weights.dict(exclude_unset=True):
+                        weight_types = edge_weights.__fields_set__
+                        if not weight_types or weight_types <= implicit_types:
+                            continue
+                        if all(predicate(edge_weights) for predicate in predicates):
                             self.edges.append(models.Edge(src=[i, si],
                                                           tgt=[j, sj],
                                                           wgts=edge_weights))
+                        elif members.get((i, si), -1) == members.get((j, sj)):
+                            # filtered, but the group would still have an implicit edge between them
+                            excluded[members[(i, si)]].append(((i, si), (j, sj)))
+                split_idx += 1
+                pairs_done += num_splits - split_idx
+            self.progress('comparisons', pairs_done, num_pairs)
+        self.groups = [group.copy(update={'excluded': pairs}) if pairs else group
+                       for group, pairs in zip(self.groups, excluded)]
+
+    def _build_groups(self, comparators: List[Comparator], predicates: List[Callable]):
+        # groups whose implicit edges don't pass the filters applied while creating the edges are left out
+        self.groups = [group for comparator in comparators for group in comparator.groups(self)
+                       if all(predicate(implicit.group_weights(group)) for predicate in predicates)]
+        if self.groups:
+            logger.debug(f'{len(self.groups)} groups with {sum(len(group.nodes) for group in self.groups)} nodes')
 
-    def _modify(self):
-        modifiers = [modifier(conf=self.conf) for modifier in MODIFIERS if modifier.is_on(self.conf)]
-        logger.debug(modifiers)
+    def _modify(self, waves: List[List[Modifier]], keys: Optional[List[str]] = None):
+        """
+        :param keys: key of the graph after each wave, it's kept in memo.STAGES under it. Not after the last wave:
+                     that graph is the result of the build, no build with other settings continues from it.
+        """
+        logger.debug(waves)
 
         nr_unfiltered = len(self.edges)
-        for modifier in modifiers:
-            logger.debug(f'Currently {len(self.edges)} # edges. {modifier.__class__} started modification...')
-            modifier.modify(self)
+        workers = self.plan.workers
+        for w, wave in enumerate(waves):
+            if self.groups and not all(modifier.handles_groups(self) for modifier in wave):
+                with self.tracer.span('expand', self):
+                    implicit.expand(self)
+            if len(wave) == 1:
+                self._run(wave[0])
+            else:
+                logger.debug(f'{[modifier.__class__.__name__ for modifier in wave]} run at the same time')
+                with ThreadPoolExecutor(max_workers=min(workers, len(wave)), thread_name_prefix='modifier') as pool:
+                    for future in [pool.submit(self._run, modifier) for modifier in wave]:
+                        future.result()
+            if keys and w + 1 < len(waves):
+                done = len(self.plan.waves) - len(waves) + w + 1
+                memo.STAGES.put(keys[w], memo.snapshot(self, self.plan.copy_splits[done]))
 
         logger.debug(f'{nr_unfiltered - len(self.edges)} edges removed')
+
+    def _run(self, modifier: Modifier):
+        logger.debug(f'Currently {len(self.edges)} # edges. {modifier.__class__} started modification...')
+        self.progress(modifier.__class__.__name__, 0, 1)
+        with self.tracer.span(modifier.__class__.__name__, self):
+            modifier.modify(self)
+        self.progress(modifier.__class__.__name__, 1, 1)
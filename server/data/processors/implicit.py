@@ -0,0 +1,123 @@
+from collections import defaultdict
+from heapq import merge
+from itertools import combinations
+from typing import Callable, Container, Dict, List, Sequence, Set, Tuple
+import logging
+
+import data.models as models
+from data.processors import GraphRepresentationType
+
+logger = logging.getLogger('data.processors.implicit')
+
+# Implicit edges: a models.EdgeGroup stands for an edge with weight {tp: wgt} between every two of its nodes, e.g.
+# one group per article instead of an edge between every two of its splits. A pair of the group with more weights
+# has an explicit edge in graph.edges (with all its weights), excluded pairs have no edge at all.
+# Groups are disjoint, their nodes sorted, so implicit edges point from the smaller to the larger node like the edges
+# of the comparisons. Modifiers that can't work on groups get the expanded graph, see GraphRepresentation._modify.
+
+Node = Tuple[int, int]
+Pair = Tuple[Node, Node]
+
+
+def pair(a: Node, b: Node) -> Pair:
+    a, b = tuple(a), tuple(b)
+    return (a, b) if a <= b else (b, a)
+
+
+def group_weights(group: models.EdgeGroup) -> models.EdgeWeights:
+    """
+    Weights of the implicit edges of the group
+    """
+    weights = models.EdgeWeights()
+    weights[group.tp] = group.wgt
+    return weights
+
+
+def _members(groups: List[models.EdgeGroup]) -> Dict[Node, int]:
+    return {node: g for g, group in enumerate(groups) for node in group.nodes}
+
+
+def _covered(graph: GraphRepresentationType) -> List[Set[Pair]]:
+    # pairs of every group without an implicit edge: explicit edges between two of its nodes and excluded pairs
+    members = _members(graph.groups)
+    covered = [set(group.excluded) for group in graph.groups]
+    for edge in graph.edges:
+        g = members.get(edge.src)
+        if g is not None and members.get(edge.tgt) == g:
+            covered[g].add(pair(edge.src, edge.tgt))
+    return covered
+
+
+def implicit_edges(graph: GraphRepresentationType) -> List[models.Edge]:
+    """
+    The implicit edges of all groups as edges, sorted by source and target.
+    """
+    edges = []
+    for group, covered in zip(graph.groups, _covered(graph)):
+        weights = group_weights(group)
+        edges += [models.Edge.construct(src=src, tgt=tgt, wgts=weights.copy())
+                  for src, tgt in combinations(group.nodes, 2) if (src, tgt) not in covered]
+    edges.sort(key=lambda edge: (edge.src, edge.tgt))
+    return edges
+
+
+def expand(graph: GraphRepresentationType) -> GraphRepresentationType:
+    """
+    Turns the groups into edges, merged into graph.edges in the order the comparisons would have created them.
+    """
+    edges = implicit_edges(graph)
+    logger.debug(f'Expanded {len(graph.groups)} groups into {len(edges)} edges')
+    graph.edges = list(merge(graph.edges, edges, key=lambda edge: (edge.src, edge.tgt)))
+    graph.groups = []
+    return graph
+
+
+def degrees(graph: GraphRepresentationType) -> Dict[Node, int]:
+    """
+    Number of implicit edges of every node.
+    """
+    degree = defaultdict(int)
+    for group, covered in zip(graph.groups, _covered(graph)):
+        for node in group.nodes:
+            degree[node] += len(group.nodes) - 1
+        for src, tgt in covered:
+            degree[src] -= 1
+            degree[tgt] -= 1
+    return degree
+
+
+def restrict(graph: GraphRepresentationType, nodes: Container[Node]):
+    """
+    Removes the implicit edges of all nodes not in `nodes`.
+    """
+    groups = []
+    for group in graph.groups:
+        kept = [node for node in group.nodes if node in nodes]
+        if len(kept) > 1:
+            groups.append(group.copy(update={'nodes': kept,
+                                             'excluded': [(src, tgt) for src, tgt in group.excluded
+                                                          if src in nodes and tgt in nodes]}))
+    graph.groups = groups
+
+
+def filter_edges(graph: GraphRepresentationType, keep: Callable[[models.EdgeWeights], bool],
+                 mask: Sequence[bool] = None):
+    """
+    Keeps the edges, explicit and implicit, whose weights pass `keep`. The implicit edges of a group all have the
+    same weights, so a group is kept or removed as a whole, removed explicit edges of a kept group are excluded.
+    :param mask: whether `keep` passes for each of graph.edges, if already known
+    """
+    members = _members(graph.groups)
+    kept_groups = [keep(group_weights(group)) for group in graph.groups]
+    excluded = defaultdict(list)
+    edges = []
+    for i, edge in enumerate(graph.edges):
+        if keep(edge.wgts) if mask is None else mask[i]:
+            edges.append(edge)
+            continue
+        g = members.get(edge.src)
+        if g is not None and kept_groups[g] and members.get(edge.tgt) == g:
+            excluded[g].append(pair(edge.src, edge.tgt))
+    graph.edges = edges
+    graph.groups = [group.copy(update={'excluded': group.excluded + excluded[g]}) if g in excluded else group
+                    for g, group in enumerate(graph.groups) if kept_groups[g]]
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import hashlib
+import json
+import logging
+
+import data.models as models
+from common import config
+from data.columnar import CommentRow, VOTE_COLUMNS
+from data.processors import GraphRepresentationType
+
+logger = logging.getLogger('data.processors.memo')
+
+# Stage memoization: the graph after the comparisons and after every wave of modifiers but the last is kept, keyed by
+# the key of its input and the settings of the stage. The first key is a fingerprint of the comments, every later one
+# chains the previous key, so two builds share a key as long as they ran the same stages with the same settings on the
+# same comments. A build restores the latest stage it finds and only runs the ones after it, e.g. changing the
+# threshold of a late filter reuses the comparisons and rankers. The graph after the last wave is the result of the
+# build (data.cache stores it), no build with other settings continues from it.
+
+# comments with their splits, id2idx, edges, groups
+Snapshot = Tuple[List[models.SplitComment], Dict[int, int], List[models.Edge], List[models.EdgeGroup]]
+
+
+def copy_comments(comments: List[models.SplitComment]) -> List[models.SplitComment]:
+    # modifiers never change an edge or group, only the lists (filters replace them, adders append to them),
+    # but rankers and clusterers write the weights of splits, so only those are copied
+    return [comment.copy(update={'splits': [split.copy(update={'wgts': split.wgts.copy()})
+                                            for split in comment.splits]})
+            for comment in comments]
+
+
+def snapshot(graph: GraphRepresentationType, copy: bool = True) -> Snapshot:
+    """
+    :param copy: copy the splits, unless no later stage of the build writes their weights
+    """
+    comments = copy_comments(graph.comments) if copy else list(graph.comments)
+    return comments, graph.id2idx, list(graph.edges), list(graph.groups)
+
+
+def restore(graph: GraphRepresentationType, state: Snapshot, copy: bool = True):
+    """
+    :param copy: copy the splits, unless no stage the build continues with writes their weights
+    """
+    comments, graph.id2idx, edges, groups = state
+    graph.comments = copy_comments(comments) if copy else list(comments)
+    graph.edges = list(edges)
+    graph.groups = list(groups)
+
+
+def fingerprint(comments: Sequence[Union[models.CommentCached, CommentRow]]) -> str:
+    """
+    Fingerprint of the fields of the comments a build reads, only those both models.CommentCached and the rows
+    data.cache loads (data.columnar.CommentRow) have.
+    """
+    digest = hashlib.sha1()
+    for comment in comments:
+        fields = [comment.id, comment.article_id, comment.reply_to_id, str(comment.timestamp)] + \
+                 [getattr(comment, name) or 0 for name in VOTE_COLUMNS] + [comment.text]
+        digest.update(json.dumps(fields).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stage_key(previous: str, stage: str, settings: dict) -> str:
+    """
+    Key of the graph after `stage` with `settings` ran on the graph of `previous`.
+    """
+    return hashlib.sha1(json.dumps([previous, stage, settings], sort_keys=True, default=str)
+                        .encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """
+    Values by their key, e.g. snapshots of graphs after stages, the most recently used `size` are kept (0 keeps none).
+    Graphs are built in threads of the server, so access is locked.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.values: Dict[str, Any] = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            value = self.values.get(key)
+            if value is not None:
+                self.values.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any):
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.values[key] = value
+            self.values.move_to_end(key)
+            while len(self.values) > self.size:
+                self.values.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+STAGES = LRUCache(config.getint('GraphRepresentation', 'memo_size', fallback=0))
@@ -1,11 +1,11 @@
 import logging
 import re
 from collections import defaultdict
-from typing import List, Callable, Tuple
+from typing import List, Callable, Set, Tuple
 import numpy as np
 import data.models as models
-from common import init_or_get_fasttext_model, init_or_get_toxicity_model
-from data.processors import Modifier, GraphRepresentationType
+from common import init_or_get_word_vectors, init_or_get_toxicity_model
+from data.processors import Modifier, GraphRepresentationType, implicit
 from scipy import sparse
 from fast_pagerank import pagerank, pagerank_power
 
@@ -24,6 +24,9 @@ def build_edge_dict(graph):
 
 
 class SizeRanker(Modifier):
+    depends_on_edges = False
+    changes_edges = False
+
     def __init__(self, *args, **kwargs):
         """
         Returns a graph with size ranked node weights
@@ -34,6 +37,12 @@ class SizeRanker(Modifier):
 
         logger.debug(f'{self.__class__.__name__} initialised')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {'SIZE'}
+
     def modify(self, graph: GraphRepresentationType):
         for comment in graph.comments:
             for split in comment.splits:
@@ -41,6 +50,9 @@ class SizeRanker(Modifier):
 
 
 class VotesRanker(Modifier):
+    depends_on_edges = False
+    changes_edges = False
+
     def __init__(self, *args, use_upvotes: bool = None, use_downvotes: bool = None, **kwargs):
         """
         Returns a graph with vote ranked node weights
@@ -56,6 +68,12 @@ class VotesRanker(Modifier):
                      f'use_upvotes={self.use_upvotes}'
                      f'use_downvotes={self.use_downvotes}')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {'VOTES'}
+
     def modify(self, graph: GraphRepresentationType):
         for comment in graph.comments:
             vote_sum = 0
@@ -80,6 +98,9 @@ class VotesRanker(Modifier):
 
 
 class RecencyRanker(Modifier):
+    depends_on_edges = False
+    changes_edges = False
+
     def __init__(self, *args, use_youngest: bool = None, **kwargs):
         """
         Returns a graph with time ranked node weights
@@ -91,6 +112,12 @@ class RecencyRanker(Modifier):
         self.use_yongest = self.conf_getboolean('use_yongest', use_youngest)
         logger.debug(f'{self.__class__.__name__} initialised')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {'RECENCY'}
+
     def modify(self, graph: GraphRepresentationType):
         if self.use_yongest:
             agr_timestamp = max([graph.orig_comments[graph.id2idx[comment.id]].timestamp for comment in graph.comments])
@@ -106,6 +133,8 @@ class RecencyRanker(Modifier):
 
 
 class PageRanker(Modifier):
+    changes_edges = False
+
     def __init__(self, *args, num_iterations: int = None, d: float = None, edge_type: str = None,
                  user_power_mode: bool = None, **kwargs):
         """
@@ -126,6 +155,15 @@ class PageRanker(Modifier):
         logger.debug(f'{self.__class__.__name__} initialised with '
                      f'num_iterations={self.num_iterations}, d={self.d} and use_power_mode={self.use_power_mode}')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {'PAGERANK'}
+
+    def consumes(self) -> Set[str]:
+        return {self.edge_type}
+
     def page_rank_fast(self, graph: GraphRepresentationType):
         def edge_list_to_adjacency_list(edge_type):
             adjacency_weights = []
@@ -142,6 +180,13 @@ class PageRanker(Modifier):
                 if weight:
                     adjacency_edges.append([node_index[e.src], node_index[e.tgt]])
                     adjacency_weights.append(weight)
+            # implicit edges of the type only add to the matrix, their order doesn't matter
+            if any(group.tp == edge_type for group in graph.groups):
+                for e in implicit.implicit_edges(graph):
+                    weight = e.wgts[edge_type]
+                    if weight:
+                        adjacency_edges.append([node_index[e.src], node_index[e.tgt]])
+                        adjacency_weights.append(weight)
 
             return np.array(adjacency_edges), adjacency_weights, node_index
 
@@ -166,6 +211,8 @@ class PageRanker(Modifier):
 
 
 class CentralityDegreeCalculator(Modifier):
+    changes_edges = False
+
     def __init__(self, *args, **kwargs):
         """
         Returns a graph with centrality degree ranked node weights
@@ -176,8 +223,14 @@ class CentralityDegreeCalculator(Modifier):
 
         logger.debug(f'{self.__class__.__name__} initialised')
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {'DEGREE_CENTRALITY'}
+
     def modify(self, graph: GraphRepresentationType):
-        counter_dict = defaultdict(int)
+        counter_dict = defaultdict(int, implicit.degrees(graph))
         for edge in graph.edges:
             counter_dict[edge.tgt] += 1
             counter_dict[edge.src] += 1
@@ -188,6 +241,9 @@ class CentralityDegreeCalculator(Modifier):
 
 
 class ToxicityRanker(Modifier):
+    depends_on_edges = False
+    changes_edges = False
+
     def __init__(self, *args, window_length: int = None, whole_comment: bool = None, **kwargs):
         """
         Returns a graph with toxicity ranked node weights
@@ -202,11 +258,11 @@ class ToxicityRanker(Modifier):
         logger.debug(f'{self.__class__.__name__} initialised with '
                      f'window_length={self.window_length} and '
                      f'whole_comment={self.whole_comment}. '
-                     f'Load ft model...')
-        ft_model = init_or_get_fasttext_model()
+                     f'Load word vectors...')
+        ft_model = init_or_get_word_vectors()
         self.ft_model = ft_model
         self.n_features = ft_model.get_dimension()
-        logger.debug(f'ft model loaded with {self.n_features} features. '
+        logger.debug(f'word vectors loaded with {self.n_features} features. '
                      f'Load toxicity model...')
         self.toxicity_model = init_or_get_toxicity_model()
         logger.debug(f'toxicity model loaded.')
@@ -263,6 +319,12 @@ class ToxicityRanker(Modifier):
                 index += 1
         return x
 
+    def handles_groups(self, graph: GraphRepresentationType) -> bool:
+        return True
+
+    def produces(self) -> Set[str]:
+        return {'TOXICITY'}
+
     def modify(self, graph: GraphRepresentationType):
         # for orig_comments
         if self.whole_comment:
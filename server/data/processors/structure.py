@@ -1,6 +1,8 @@
 import logging
+from collections import defaultdict
+from typing import List
 import data.models as models
-from data.processors import Comparator
+from data.processors import Comparator, GraphRepresentationType
 
 logger = logging.getLogger('data.graph.structure')
 
@@ -32,20 +34,32 @@ class SameCommentComparator(Comparator):
 
 
 class SameArticleComparator(Comparator):
-    def __init__(self, *args, base_weight: float = None, only_root: bool = None, **kwargs):
+    def __init__(self, *args, base_weight: float = None, only_root: bool = None, implicit: bool = None, **kwargs):
         """
         Returns base_weight iff split_a and split_b are part of the same article.
         :param args:
         :param base_weight: weight to attach
         :param only_root:
+        :param implicit: one edge group per article instead of an edge for every pair
         :param kwargs:
         """
         super().__init__(*args, **kwargs)
         self.base_weight = self.conf_getfloat('base_weight', base_weight)
         self.only_root = self.conf_getboolean('only_root', only_root)
+        self.implicit = self.conf_getboolean('implicit', implicit)
 
         logger.debug(f'{self.__class__.__name__} initialised with '
-                     f'base_weight: {self.base_weight} and only_root: {self.only_root}')
+                     f'base_weight: {self.base_weight}, only_root: {self.only_root} and implicit: {self.implicit}')
+
+    def groups(self, graph: GraphRepresentationType) -> List[models.EdgeGroup]:
+        if not self.implicit or not self.base_weight:
+            return []
+        nodes = defaultdict(list)
+        for i, comment in enumerate(graph.comments):
+            splits = min(len(comment.splits), 1) if self.only_root else len(comment.splits)
+            nodes[graph.orig_comments[i].article_id] += [(i, j) for j in range(splits)]
+        return [models.EdgeGroup(tp='SAME_ARTICLE', wgt=self.base_weight, nodes=article_nodes)
+                for article_nodes in nodes.values() if len(article_nodes) > 1]
 
     def _set_weight(self, edge: models.EdgeWeights, weight: float):
         edge.SAME_ARTICLE = weight
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from configparser import ConfigParser
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import time
+import logging
+
+import data.models as models
+from common import except2str
+from data.processors.benchmark import Configuration, isolate
+from data.processors.graph import GraphRepresentation, COMPARATORS, MODIFIERS, graph_config
+from data.processors.tracing import Tracer
+
+logger = logging.getLogger('data.processors.sweep')
+
+
+def comparator_key(conf: ConfigParser) -> str:
+    """
+    Equal for configs whose comparators build the same edges: the same comparators active with the same settings.
+    """
+    sections = {comparator.__name__: dict(conf[comparator.__name__]) if conf.has_section(comparator.__name__) else {}
+                for comparator in COMPARATORS if comparator.is_on(conf)}
+    return hashlib.sha1(json.dumps(sections, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ComparisonStore:
+    """
+    Graphs of the same comments without modifiers, one per comparator key, the most recently used `size` are kept.
+    """
+    def __init__(self, comments: List[models.CommentCached], size: int = 4):
+        self.comments = comments
+        self.size = size
+        self.graphs: Dict[str, GraphRepresentation] = OrderedDict()
+
+    def get(self, conf: dict = None) -> Tuple[GraphRepresentation, bool]:
+        """
+        :return: the comparisons of `conf` and whether they were built before
+        """
+        key = comparator_key(graph_config(conf))
+        graph = self.graphs.get(key)
+        if graph is not None:
+            self.graphs.move_to_end(key)
+            return graph, True
+        no_modifiers = {modifier.__name__: {'active': False} for modifier in MODIFIERS}
+        graph = GraphRepresentation(self.comments, conf={**(conf or {}), **no_modifiers})
+        self.graphs[key] = graph
+        if len(self.graphs) > self.size:
+            self.graphs.popitem(last=False)
+        return graph, False
+
+
+def sweep(comments: List[models.CommentCached], configurations: List[Configuration], isolated: bool = True,
+          keep_graphs: bool = False, store: Optional[ComparisonStore] = None) -> List[dict]:
+    """
+    Builds the graph of every configuration, comparing the splits only once per distinct comparator settings.
+    Configurations sharing them run their modifiers on their own view of the same comparisons.
+    :param isolated: only the comparators and modifiers of a configuration are active, see benchmark.isolate
+    :param keep_graphs: add the models.Graph of every configuration to its row
+    :return: one row per configuration with the time to build the comparisons (0 if reused) and to modify them,
+             the number of edges and the modifier stages, or the error
+    """
+    store = store or ComparisonStore(comments, size=len(configurations))
+    rows = []
+    for name, conf in configurations:
+        conf = isolate(conf) if isolated else conf
+        row = {'configuration': name, 'conf': conf}
+        try:
+            start = time.perf_counter()
+            comparisons, reused = store.get(conf)
+            row['comparisons_wall'] = 0. if reused else time.perf_counter() - start
+            row['reused'] = reused
+            tracer = Tracer()
+            start = time.perf_counter()
+            graph = GraphRepresentation(comments, conf=conf, tracer=tracer, comparisons=comparisons)
+            row['modify_wall'] = time.perf_counter() - start
+            row['comparison_edges'] = len(comparisons.edges)
+            row['edges'] = len(graph.edges)
+            row['stages'] = {span.name: span.wall for span in tracer.spans if span.name != 'reuse'}
+            if keep_graphs:
+                row['graph'] = models.Graph(**graph.__dict__())
+        except Exception as e:
+            row['error'] = except2str(e, logger)
+        rows.append(row)
+        logger.debug(f'Sweep {name}: {row.get("edges")} edges{", reused comparisons" if row.get("reused") else ""}')
+    return rows
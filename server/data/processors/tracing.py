@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from typing import List, Optional
+import threading
+import time
+import tracemalloc
+
+# tracemalloc is process wide, it runs as long as one span measures memory (unless it was started elsewhere)
+_memory_lock = threading.Lock()
+_memory_users = 0
+_memory_started = False
+
+
+class Span:
+    """
+    Wall time, CPU time of the building thread, edges before and after, and the peak of newly allocated memory
+    (only if the tracer measures memory) of one stage of a graph build.
+    Comparators run interleaved for every pair of splits, their spans (only if the tracer traces comparators) only
+    count wall time, pairs compared (edges_in) and pairs they set a weight for (edges_out).
+    """
+    __slots__ = ['name', 'wall', 'cpu', 'edges_in', 'edges_out', 'memory']
+
+    def __init__(self, name: str, edges_in: Optional[int] = None):
+        self.name = name
+        self.wall = 0.
+        self.cpu: Optional[float] = None
+        self.edges_in = edges_in
+        self.edges_out: Optional[int] = None
+        self.memory: Optional[int] = None
+
+    def dict(self) -> dict:
+        return {'name': self.name, 'wall_ms': round(self.wall * 1000, 3),
+                'cpu_ms': None if self.cpu is None else round(self.cpu * 1000, 3),
+                'edges_in': self.edges_in, 'edges_out': self.edges_out, 'memory_peak': self.memory}
+
+
+class TracedComparator:
+    """
+    Comparator proxy adding the time of every comparison to a span.
+    """
+    def __init__(self, comparator, span: Span):
+        self.comparator = comparator
+        self.span = span
+        span.edges_in = span.edges_out = 0
+
+    def update_edge_weights(self, edge_weights, *args):
+        weights_set = len(edge_weights.__fields_set__)
+        start = time.perf_counter()
+        self.comparator.update_edge_weights(edge_weights, *args)
+        self.span.wall += time.perf_counter() - start
+        self.span.edges_in += 1
+        if len(edge_weights.__fields_set__) > weights_set:
+            self.span.edges_out += 1
+
+
+class Tracer:
+    """
+    Collects spans of a graph build, see data.processors.graph.GraphRepresentation.
+    :param memory: measure peak memory per span with tracemalloc (Python 3.9+), slows down the build noticeably.
+                   Builds running at the same time show up in each other's peaks.
+    :param comparators: add a span for every comparator, timing every pair of splits slows down the comparisons
+                        about twice. Without it only the comparisons as a whole are timed.
+    """
+    def __init__(self, memory: bool = False, comparators: bool = False):
+        self.spans: List[Span] = []
+        self.memory = memory and hasattr(tracemalloc, 'reset_peak')
+        self.comparators = comparators
+
+    @contextmanager
+    def span(self, name: str, graph=None):
+        """
+        :param graph: GraphRepresentation, to count its edges before and after
+        """
+        span = Span(name, None if graph is None else len(graph.edges))
+        self.spans.append(span)
+        if self.memory:
+            self._start_memory()
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.wall = time.perf_counter() - start
+            span.cpu = time.thread_time() - cpu
+            if self.memory:
+                span.memory = max(0, tracemalloc.get_traced_memory()[1] - memory_before)
+                self._stop_memory()
+            if graph is not None:
+                span.edges_out = len(graph.edges)
+
+    def comparator(self, comparator) -> TracedComparator:
+        span = Span(comparator.__class__.__name__)
+        self.spans.append(span)
+        return TracedComparator(comparator, span)
+
+    @staticmethod
+    def _start_memory():
+        global _memory_users, _memory_started
+        with _memory_lock:
+            if _memory_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _memory_started = True
+            _memory_users += 1
+
+    @staticmethod
+    def _stop_memory():
+        global _memory_users, _memory_started
+        with _memory_lock:
+            _memory_users -= 1
+            if _memory_users == 0 and _memory_started:
+                tracemalloc.stop()
+                _memory_started = False
+
+    def server_timing(self) -> str:
+        """
+        Spans as value of a Server-Timing header, durations in milliseconds.
+        """
+        return ', '.join(f'{span.name};dur={span.wall * 1000:.3f}' for span in self.spans)
+
+    def debug(self) -> dict:
+        return {'spans': [span.dict() for span in self.spans]}
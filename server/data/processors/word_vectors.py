@@ -0,0 +1,171 @@
+from functools import lru_cache
+from typing import List
+import numpy as np
+import json
+import os
+import re
+import logging
+
+logger = logging.getLogger('data.graph.word_vectors')
+
+# fastText splits sentences at ASCII whitespace only (std::istream >>)
+WHITESPACE = re.compile(r'[ \t\n\v\f\r]+')
+BOW, EOW = '<', '>'
+EMPTY = -1
+
+
+def fasttext_hash(word: bytes) -> int:
+    # FNV-1a as in fastText's Dictionary::hash, including the sign extension of non-ASCII bytes
+    h = 2166136261
+    for b in word:
+        h = ((h ^ (b if b < 128 else b | 0xFFFFFF00)) * 16777619) & 0xFFFFFFFF
+    return h
+
+
+def char_ngrams(word: bytes, minn: int, maxn: int) -> List[bytes]:
+    """
+    Character n-grams of a word wrapped in BOW/EOW, same as fastText's Dictionary::computeSubwords.
+    Counts UTF-8 characters, not bytes. The single characters BOW and EOW are no n-grams.
+    """
+    ngrams = []
+    for i in range(len(word)):
+        if word[i] & 0xC0 == 0x80:
+            continue
+        ngram = bytearray()
+        j = i
+        n = 1
+        while j < len(word) and n <= maxn:
+            ngram.append(word[j])
+            j += 1
+            while j < len(word) and word[j] & 0xC0 == 0x80:
+                ngram.append(word[j])
+                j += 1
+            if n >= minn and not (n == 1 and (i == 0 or j == len(word))):
+                ngrams.append(bytes(ngram))
+            n += 1
+    return ngrams
+
+
+class WordVectors:
+    """
+    Read-only, memory mapped word and subword vectors exported from a fastText model with `export`.
+    All processes mapping the same store share one copy in the page cache.
+    Implements get_dimension, get_word_vector and get_sentence_vector with the results of the fastText model,
+    so it can be used wherever the fastText model is used.
+    """
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        self.path = path
+        self.dim = meta['dim']
+        self.minn = meta['minn']
+        self.maxn = meta['maxn']
+        self.bucket = meta['bucket']
+        self.nwords = meta['nwords']
+
+        self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.words = np.load(os.path.join(path, 'words.npy'), mmap_mode='r')
+        self.word_offsets = np.load(os.path.join(path, 'word_offsets.npy'), mmap_mode='r')
+        self.word_table = np.load(os.path.join(path, 'word_table.npy'), mmap_mode='r')
+        self._mask = len(self.word_table) - 1
+
+        logger.debug(f'Mapped {self.nwords} words and {self.bucket if meta["subwords"] else 0} subword buckets '
+                     f'({self.vectors.dtype}, {self.dim} dimensions) from {path}')
+
+    def get_dimension(self) -> int:
+        return self.dim
+
+    def _word(self, i: int) -> bytes:
+        return self.words[self.word_offsets[i]:self.word_offsets[i + 1]].tobytes()
+
+    def get_word_id(self, word: str) -> int:
+        word = word.encode('utf-8')
+        h = fasttext_hash(word) & self._mask
+        while self.word_table[h] != EMPTY and self._word(self.word_table[h]) != word:
+            h = (h + 1) & self._mask
+        return int(self.word_table[h])
+
+    @lru_cache(maxsize=2 ** 16)
+    def get_subwords(self, word: str) -> tuple:
+        """
+        Rows of `vectors` making up the vector of a word: the word itself if it is in the vocabulary and
+        the hash buckets of its character n-grams (if the store contains them).
+        """
+        subwords = []
+        word_id = self.get_word_id(word)
+        if word_id != EMPTY:
+            subwords.append(word_id)
+        if word != '</s>' and self.maxn > 0 and len(self.vectors) > self.nwords:
+            ngrams = char_ngrams(f'{BOW}{word}{EOW}'.encode('utf-8'), self.minn, self.maxn)
+            subwords += [self.nwords + fasttext_hash(ngram) % self.bucket for ngram in ngrams]
+        return tuple(subwords)
+
+    def get_word_vector(self, word: str) -> np.ndarray:
+        subwords = self.get_subwords(word)
+        if not subwords:
+            return np.zeros(self.dim, dtype=np.float32)
+        return self.vectors[list(subwords)].astype(np.float32).mean(axis=0)
+
+    def get_sentence_vector(self, text: str) -> np.ndarray:
+        # average of the normalised word vectors, like fastText does for unsupervised models
+        vector = np.zeros(self.dim, dtype=np.float32)
+        count = 0
+        for word in WHITESPACE.split(text):
+            if not word:
+                continue
+            word_vector = self.get_word_vector(word)
+            norm = np.linalg.norm(word_vector)
+            if norm > 0:
+                vector += word_vector / norm
+                count += 1
+        if count > 0:
+            vector /= count
+        return vector
+
+
+def export(model, path: str, dtype: str = 'float32', max_words: int = None, subwords: bool = True):
+    """
+    Exports the input vectors of a fastText model into a store for `WordVectors`.
+    :param model: loaded fastText model (unsupervised, not quantized)
+    :param path: directory to write the store to
+    :param dtype: float32 or float16 for half the size
+    :param max_words: only keep the most frequent words
+    :param subwords: keep the subword buckets, without them unknown words get a zero vector
+    """
+    args = model.f.getArgs()
+    words = model.get_words()
+    nwords = len(words) if max_words is None else min(max_words, len(words))
+    words = words[:nwords]
+    os.makedirs(path, exist_ok=True)
+
+    input_matrix = model.get_input_matrix()
+    rows = [input_matrix[:nwords]]
+    if subwords:
+        rows.append(input_matrix[len(model.get_words()):])
+    vectors = np.lib.format.open_memmap(os.path.join(path, 'vectors.npy'), mode='w+', dtype=dtype,
+                                        shape=(sum(len(r) for r in rows), args.dim))
+    offset = 0
+    for r in rows:
+        vectors[offset:offset + len(r)] = r
+        offset += len(r)
+    vectors.flush()
+    del vectors
+
+    encoded = [word.encode('utf-8') for word in words]
+    np.save(os.path.join(path, 'words.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    np.save(os.path.join(path, 'word_offsets.npy'), np.cumsum([0] + [len(w) for w in encoded], dtype=np.int64))
+
+    # open addressing with linear probing, at most half full
+    table = np.full(1 << max(1, 2 * nwords - 1).bit_length(), EMPTY, dtype=np.int32)
+    mask = len(table) - 1
+    for i, word in enumerate(encoded):
+        h = fasttext_hash(word) & mask
+        while table[h] != EMPTY:
+            h = (h + 1) & mask
+        table[h] = i
+    np.save(os.path.join(path, 'word_table.npy'), table)
+
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'dim': args.dim, 'minn': args.minn, 'maxn': args.maxn, 'bucket': args.bucket,
+                   'nwords': nwords, 'dtype': dtype, 'subwords': subwords}, f)
+    logger.info(f'Exported {nwords} words{" and subwords" if subwords else ""} as {dtype} to {path}')
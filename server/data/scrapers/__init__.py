@@ -6,12 +6,19 @@ import requests
 from datetime import datetime
 from requests.exceptions import HTTPError
 import data.models as models
+from data.metrics import SCRAPE_SECONDS, SCRAPE_COMMENTS, SCRAPE_ERRORS
+from common import config
 from typing import Tuple, List
+import time
 
 import logging
 
 logger = logging.getLogger('scraper')
 
+# every request of the scrapers goes through this session, keeping connections to the platforms alive between
+# pages of comments. data.scrapers.replay mounts its adapters on it to record and replay scrapes.
+http = requests.Session()
+
 
 class NoScraperException(Exception):
     pass
@@ -33,10 +40,17 @@ class Scraper(ABC):
     @classmethod
     def scrape(cls, url) -> Tuple[models.ArticleScraped, List[models.CommentScraped]]:
         url = cls.prepare_url(url)
-        article, comments = cls._scrape(url)
-
-        if not comments:
-            raise NoCommentsWarning(f'No Comments found at {url}!')
+        start = time.perf_counter()
+        try:
+            article, comments = cls._scrape(url)
+            if not comments:
+                raise NoCommentsWarning(f'No Comments found at {url}!')
+        except Exception as e:
+            SCRAPE_ERRORS.inc(scraper=cls.__name__, error=type(e).__name__)
+            raise
+        finally:
+            SCRAPE_SECONDS.observe(time.perf_counter() - start, scraper=cls.__name__)
+        SCRAPE_COMMENTS.observe(len(comments), scraper=cls.__name__)
 
         comments = list(sorted(comments, key=lambda c: c.timestamp))
 
@@ -49,7 +63,7 @@ class Scraper(ABC):
     @classmethod
     def get_html(cls, url):
         try:
-            response = requests.get(url)
+            response = http.get(url)
             response.raise_for_status()
             logger.debug('     - Successfully loaded: ' + url)
             return BeautifulSoup(response.text, 'lxml')
@@ -62,7 +76,7 @@ class Scraper(ABC):
     @classmethod
     def get_json(cls, url, params=None):
         try:
-            response = requests.get(url, params=params)
+            response = http.get(url, params=params)
             response.raise_for_status()
             logger.debug('     - Successfully loaded: ' + url)
             return response.json()
@@ -75,7 +89,7 @@ class Scraper(ABC):
     @classmethod
     def post_json(cls, url, data, headers):
         try:
-            response = requests.post(url, data=data, headers=headers)
+            response = http.post(url, data=data, headers=headers)
             response.raise_for_status()
             logger.debug('     - Successfully loaded: ' + url)
             return response.json()
@@ -154,6 +168,10 @@ SCRAPERS = [
     TAZScraper
 ]
 
+if config.get('scrapers', 'replay_url', fallback=None):
+    from data.scrapers.replay import ForwardAdapter
+    ForwardAdapter(config.get('scrapers', 'replay_url')).mount(http)
+
 
 def get_matching_scraper(url):
     for scraper in SCRAPERS:
@@ -0,0 +1,283 @@
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+import glob
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger('scraper.replay')
+
+# A recording is everything one scrape requested, stored gzipped as JSON:
+# {"scraper": "FAZScraper", "url": ..., "recorded": ..., "comments": 123,
+#  "exchanges": [{"method": "GET", "url": ..., "body": null, "status": 200, "headers": {...}, "content": "..."}]}
+Recording = dict
+Key = Tuple[str, str, Optional[str]]
+
+
+def _body(body) -> Optional[str]:
+    if isinstance(body, bytes):
+        return body.decode('utf-8')
+    return body
+
+
+def exchange_key(method: str, url: str, body=None) -> Key:
+    return method.upper(), url, _body(body)
+
+
+def _exchange(request: requests.PreparedRequest, response: requests.Response) -> dict:
+    return {'method': request.method, 'url': request.url, 'body': _body(request.body),
+            'status': response.status_code, 'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+            'content': response.text}
+
+
+def _response(request: requests.PreparedRequest, exchange: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = exchange['status']
+    response.headers = CaseInsensitiveDict(exchange['headers'])
+    response._content = exchange['content'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def recording_path(directory: str, recording: Recording) -> str:
+    return os.path.join(directory, f'{recording["scraper"]}-'
+                                   f'{hashlib.sha1(recording["url"].encode("utf-8")).hexdigest()[:12]}.json.gz')
+
+
+def save_recording(directory: str, recording: Recording) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = recording_path(directory, recording)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(recording, f, ensure_ascii=False)
+    return path
+
+
+def load_recording(path: str) -> Recording:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_recordings(path: str) -> List[Recording]:
+    """
+    :param path: a recording or a directory of recordings
+    """
+    if os.path.isdir(path):
+        return [load_recording(file) for file in sorted(glob.glob(os.path.join(path, '*.json.gz')))]
+    return [load_recording(path)]
+
+
+def _index(recordings: List[Recording]) -> Dict[Key, dict]:
+    # a request made twice while recording is answered with the later response
+    return {exchange_key(e['method'], e['url'], e['body']): e for r in recordings for e in r['exchanges']}
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Sends requests with `adapter` (by default over the network) and keeps every exchange.
+    """
+    def __init__(self, adapter: BaseAdapter = None):
+        super().__init__()
+        self.adapter = adapter or HTTPAdapter()
+        self.exchanges: List[dict] = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        with self._lock:
+            self.exchanges.append(_exchange(request, response))
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from recordings without touching the network. Requests that weren't recorded fail with a
+    ConnectionError (the scrapers treat it like any failed request), or are sent with `fallback` if given.
+    """
+    def __init__(self, recordings: List[Recording], fallback: BaseAdapter = None):
+        super().__init__()
+        self.exchanges = _index(recordings)
+        self.fallback = fallback
+
+    def send(self, request, **kwargs):
+        exchange = self.exchanges.get(exchange_key(request.method, request.url, request.body))
+        if exchange is None:
+            if self.fallback is not None:
+                return self.fallback.send(request, **kwargs)
+            raise requests.ConnectionError(f'No recorded response for {request.method} {request.url}',
+                                           request=request)
+        return _response(request, exchange)
+
+    def close(self):
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+class ForwardAdapter(HTTPAdapter):
+    """
+    Sends every request to a replay server instead: https://www.faz.net/a.html goes to
+    <base_url>/https/www.faz.net/a.html
+    """
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        scheme, _, rest = request.url.partition('://')
+        request = request.copy()
+        request.url = f'{self.base_url}/{scheme}/{rest}'
+        return super().send(request, **kwargs)
+
+    def mount(self, session: requests.Session):
+        session.mount('http://', self)
+        session.mount('https://', self)
+
+
+@contextmanager
+def mounted(adapter: BaseAdapter, session: requests.Session = None):
+    """
+    Sends all requests of the scrapers with `adapter` until the context exits.
+    Meant for tests and scripts, scrapes running at the same time elsewhere in the process are affected too.
+    """
+    if session is None:
+        from data.scrapers import http as session
+    adapters = session.adapters.copy()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    try:
+        yield adapter
+    finally:
+        session.adapters = adapters
+
+
+def record(url: str) -> Recording:
+    """
+    Scrapes `url` over the network and returns the recording of all requests it took.
+    """
+    from data.scrapers import get_matching_scraper
+    scraper = get_matching_scraper(url)
+    with mounted(RecordingAdapter()) as adapter:
+        article, comments = scraper.scrape(url)
+    return {'scraper': scraper.__name__, 'url': url, 'recorded': datetime.utcnow().isoformat(),
+            'comments': len(comments), 'exchanges': adapter.exchanges}
+
+
+@contextmanager
+def _timed(scraper, names: List[str], times: Dict[str, float]):
+    originals = {name: scraper.__dict__.get(name) for name in names}
+
+    def wrap(name, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                times[name] += time.perf_counter() - start
+        return timed
+
+    for name in names:
+        times[name] = 0.
+        # the bound classmethod, called with the same arguments as by _scrape
+        setattr(scraper, name, staticmethod(wrap(name, getattr(scraper, name))))
+    try:
+        yield times
+    finally:
+        for name, original in originals.items():
+            if original is None:
+                delattr(scraper, name)
+            else:
+                setattr(scraper, name, original)
+
+
+def benchmark(recording: Recording, repetitions: int = 5) -> dict:
+    """
+    Replays the scrape of a recording `repetitions` times and measures how long the scraper takes in total and in
+    `_scrape_article` and `_scrape_comments` (parsing, and requests answered from memory), medians in seconds.
+    """
+    from data.scrapers import get_matching_scraper
+    scraper = get_matching_scraper(recording['url'])
+    runs = []
+    with mounted(ReplayAdapter([recording])):
+        for _ in range(repetitions):
+            times = {}
+            with _timed(scraper, ['_scrape_article', '_scrape_comments'], times):
+                start = time.perf_counter()
+                article, comments = scraper.scrape(recording['url'])
+                times['total'] = time.perf_counter() - start
+            runs.append(times)
+    medians = {name: sorted(run[name] for run in runs)[len(runs) // 2] for name in runs[0]}
+    return {'scraper': scraper.__name__, 'url': recording['url'], 'comments': len(comments),
+            'requests': len(recording['exchanges']), **medians,
+            'per_comment': medians['_scrape_comments'] / max(len(comments), 1)}
+
+
+class ReplayServer:
+    """
+    HTTP server answering from recordings, for anything that should scrape a local server instead of the platforms
+    (e.g. the API under load, with [scrapers] replay_url set). Paths are <scheme>/<original url without scheme>,
+    see ForwardAdapter. Unknown requests get a 404.
+    :param latency: seconds to wait before every response
+    """
+    def __init__(self, recordings: List[Recording], host: str = 'localhost', port: int = 0, latency: float = 0.):
+        exchanges = _index(recordings)
+
+        class Handler(BaseHTTPRequestHandler):
+            def _replay(self):
+                scheme, _, rest = self.path.lstrip('/').partition('/')
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8') if length else None
+                exchange = exchanges.get(exchange_key(self.command, f'{scheme}://{rest}', body))
+                if latency:
+                    time.sleep(latency)
+                if exchange is None:
+                    self.send_error(404, 'Not recorded')
+                    return
+                content = exchange['content'].encode('utf-8')
+                self.send_response(exchange['status'])
+                self.send_header('Content-Type', exchange['headers'].get('Content-Type', ''))
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = _replay
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> 'ReplayServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
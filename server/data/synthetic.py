@@ -0,0 +1,153 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List
+import random
+
+import data.models as models
+
+# small German vocabulary, enough for sentences that split, embed and overlap like real comments
+NOUNS = ['Regierung', 'Bundestag', 'Kanzlerin', 'Partei', 'Wahl', 'Steuer', 'Rente', 'Schule', 'Klima', 'Energie',
+         'Auto', 'Bahn', 'Stadt', 'Land', 'Wirtschaft', 'Arbeit', 'Miete', 'Wohnung', 'Familie', 'Gesellschaft',
+         'Meinung', 'Artikel', 'Zeitung', 'Politik', 'Europa', 'Grenze', 'Polizei', 'Gericht', 'Gesetz', 'Pandemie',
+         'Impfung', 'Maske', 'Krankenhaus', 'Pflege', 'Digitalisierung', 'Internet', 'Zukunft', 'Jugend',
+         'Bildung', 'Forschung', 'Industrie', 'Landwirtschaft', 'Umwelt', 'Verkehr', 'Sicherheit', 'Freiheit',
+         'Demokratie', 'Verantwortung', 'Krise', 'Lösung', 'Problem', 'Frage', 'Antwort', 'Entscheidung']
+VERBS = ['ist', 'wird', 'braucht', 'kostet', 'verändert', 'zeigt', 'verhindert', 'fordert', 'unterstützt',
+         'kritisiert', 'ignoriert', 'übersieht', 'verdient', 'gefährdet', 'rettet', 'bestimmt', 'beeinflusst']
+ADJECTIVES = ['wichtig', 'falsch', 'richtig', 'teuer', 'unfair', 'gerecht', 'notwendig', 'überfällig', 'absurd',
+              'realistisch', 'naiv', 'gefährlich', 'sinnvoll', 'peinlich', 'typisch', 'deutsch', 'sozial']
+ADVERBS = ['leider', 'endlich', 'wieder', 'schon', 'immer', 'nie', 'natürlich', 'eigentlich', 'wirklich',
+           'vielleicht', 'genau', 'kaum', 'offenbar', 'tatsächlich']
+OPENERS = ['Ich finde', 'Meiner Meinung nach', 'Ehrlich gesagt', 'Man muss sagen', 'Wie immer', 'Sorry, aber',
+           'Genau so', 'Im Ernst', 'Mal ehrlich', 'Am Ende']
+REPLY_OPENERS = ['Sehe ich anders.', 'Genau!', 'Quatsch.', 'Danke für den Kommentar.', 'Das stimmt so nicht.',
+                 'Wo ist die Quelle?', 'Sie haben recht.', 'Leider wahr.']
+
+
+class _Text:
+    """
+    Sentences from templates over NOUNS, VERBS, ... with a topic: a few nouns every comment on the article draws
+    from more often, replies reuse nouns of the comment they reply to.
+    """
+    def __init__(self, rnd: random.Random, topic_size: int = 6):
+        self.rnd = rnd
+        self.topic = rnd.sample(NOUNS, topic_size)
+
+    def noun(self, context: List[str]) -> str:
+        r = self.rnd.random()
+        if context and r < .3:
+            return self.rnd.choice(context)
+        if r < .6:
+            return self.rnd.choice(self.topic)
+        return self.rnd.choice(NOUNS)
+
+    def sentence(self, context: List[str]) -> str:
+        rnd = self.rnd
+        noun, other = self.noun(context), self.noun(context)
+        template = rnd.random()
+        if template < .3:
+            text = f'{rnd.choice(OPENERS)}, die {noun} {rnd.choice(VERBS)} {rnd.choice(ADVERBS)} die {other}.'
+        elif template < .55:
+            text = f'Die {noun} ist {rnd.choice(ADVERBS)} {rnd.choice(ADJECTIVES)}.'
+        elif template < .75:
+            text = f'Wer {rnd.choice(VERBS)} eigentlich die {noun}?'
+        elif template < .9:
+            text = f'Ohne {other} {rnd.choice(VERBS)} die {noun} {rnd.choice(ADVERBS)} nichts.'
+        else:
+            text = (f'Die {noun} und die {other} sind {rnd.choice(ADJECTIVES)}, '
+                    f'{rnd.choice(ADVERBS)} {rnd.choice(ADJECTIVES)}.')
+        return text
+
+    def comment(self, context: List[str], reply: bool) -> str:
+        # mostly short comments, a few long ones
+        sentences = min(1 + int(self.rnd.paretovariate(1.5)), 12)
+        texts = [self.sentence(context) for _ in range(sentences)]
+        if reply and self.rnd.random() < .25:
+            texts.insert(0, self.rnd.choice(REPLY_OPENERS))
+        return ' '.join(texts)
+
+
+def _nouns(text: str) -> List[str]:
+    return [word.strip('.,?!') for word in text.split() if word.strip('.,?!') in NOUNS]
+
+
+def generate_thread(num_comments: int, article_id: int = 1, seed: int = 0, first_id: int = 0,
+                    start: datetime = datetime(2020, 4, 1, 8), reply_ratio: float = .6,
+                    users: int = None) -> List[models.CommentCached]:
+    """
+    Comments of one article, the same arguments always give the same thread.
+    - Replies: `reply_ratio` of the comments reply to an earlier one, chosen with preferential attachment
+      (comments with replies get more) and a bias to recent comments, so some deep, some wide discussions.
+    - Timestamps: activity decays over the two days after publication, with bursts of quick comments in between.
+    - Votes: heavy tailed, root comments and early comments get more.
+    - Users: Zipf distributed over `users` names (default a fifth of the comments), a few write a lot.
+    :param first_id: id of the first comment, ids (and comment_ids) are consecutive in timestamp order
+    """
+    rnd = random.Random(f'{seed}-{article_id}')
+    text = _Text(rnd)
+    users = users or max(1, num_comments // 5)
+    user_weights = list(accumulate(1. / (rank + 1) for rank in range(users)))
+
+    comments: List[models.CommentCached] = []
+    nouns: List[List[str]] = []
+    # every comment once plus once per reply it got, drawing uniformly from it is preferential attachment
+    attachment: List[int] = []
+    # the thread is most active right after publication, half of the comments come within the first ~4 hours
+    offsets = sorted(min(rnd.expovariate(1 / 6.), 48.) for _ in range(num_comments))
+    timestamp = start
+    burst = 0
+    for i in range(num_comments):
+        if burst:
+            burst -= 1
+            timestamp += timedelta(seconds=rnd.expovariate(1 / 20.))
+        else:
+            if rnd.random() < .05:
+                burst = rnd.randint(5, 30)
+            timestamp = max(timestamp, start + timedelta(hours=offsets[i]))
+
+        reply_to = None
+        if comments and rnd.random() < reply_ratio:
+            if rnd.random() < .3:
+                reply_to = rnd.randrange(max(0, i - 20), i)
+            else:
+                reply_to = rnd.choice(attachment)
+            attachment.append(reply_to)
+        attachment.append(i)
+
+        comment_text = text.comment(nouns[reply_to] if reply_to is not None else [], reply_to is not None)
+        nouns.append(_nouns(comment_text))
+        age = i / max(num_comments, 1)
+        upvotes = max(0, int(rnd.paretovariate(1.2) * (3 if reply_to is None else 1) * (1.5 - age)) - 1)
+        user = bisect_left(user_weights, rnd.random() * user_weights[-1])
+        comments.append(models.CommentCached(
+            id=first_id + i, article_id=article_id, comment_id=f'{article_id}-{i}',
+            username=f'user{user}', user_id=f'u{user}', timestamp=timestamp, text=comment_text,
+            reply_to=None if reply_to is None else f'{article_id}-{reply_to}',
+            reply_to_id=None if reply_to is None else first_id + reply_to,
+            upvotes=upvotes, downvotes=int(upvotes * rnd.random() * .3)))
+    return comments
+
+
+def generate(num_comments: int, num_articles: int = 1, seed: int = 0, **kwargs) -> List[models.CommentCached]:
+    """
+    `num_comments` comments over `num_articles` articles of different size (like a multi-article graph request),
+    see `generate_thread` for the other arguments. Comment ids are unique over all articles.
+    """
+    rnd = random.Random(seed)
+    weights = [rnd.paretovariate(1.) for _ in range(num_articles)]
+    sizes = [int(num_comments * weight / sum(weights)) for weight in weights]
+    sizes[0] += num_comments - sum(sizes)
+    comments = []
+    for article, size in enumerate(sizes):
+        comments += generate_thread(size, article_id=article + 1, seed=seed, first_id=len(comments),
+                                    start=datetime(2020, 4, 1, 8) + timedelta(hours=article), **kwargs)
+    return comments
+
+
+def fixtures(sizes: List[int], num_articles: int = 1, seed: int = 0) -> Dict[str, List[models.CommentCached]]:
+    """
+    Benchmark fixtures of the given sizes, see data.processors.benchmark.run_suite
+    """
+    return {f'synthetic-{size}x{num_articles}-{seed}': generate(size, num_articles=num_articles, seed=seed)
+            for size in sizes}
@@ -0,0 +1,199 @@
+from typing import Any, Iterable, Iterator, List, Optional, Union
+from pydantic import BaseModel
+import numpy as np
+import json
+import struct
+
+import data.models as models
+
+# media types of /api/graph responses, negotiated via the Accept header
+GRAPH_V1 = 'application/json'
+GRAPH_V2_JSON = 'application/vnd.comex.graph.v2+json'
+GRAPH_V2_BINARY = 'application/vnd.comex.graph.v2+octet-stream'
+GRAPH_MEDIA_TYPES = [GRAPH_V1, GRAPH_V2_JSON, GRAPH_V2_BINARY]
+
+FORMAT = 'comex.graph.v2'
+MAGIC = b'CXG2'
+DTYPES = {'int32': '<i4', 'float64': '<f8'}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Picks the graph media type with the highest quality in the Accept header, v1 JSON if none matches.
+    Media types with q=0 are not acceptable.
+    """
+    best, best_quality = GRAPH_V1, 0.
+    for media_range in (accept or '').split(','):
+        media_type, *params = [part.strip() for part in media_range.split(';')]
+        quality = 1.
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.
+        if media_type in GRAPH_MEDIA_TYPES and quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def _sparse(values: List[Optional[float]], dtype: str) -> Optional[dict]:
+    # nulls are omitted: `idx` lists the positions of the values, it is left out if there are no nulls
+    idx = [i for i, value in enumerate(values) if value is not None]
+    if not idx:
+        return None
+    if len(idx) == len(values):
+        return {'val': np.array(values, dtype=dtype)}
+    return {'idx': np.array(idx, dtype='int32'), 'val': np.array([values[i] for i in idx], dtype=dtype)}
+
+
+def _weights(weights: List[Any], keys: Iterable[str]) -> dict:
+    columns = {key: _sparse([w.__dict__[key] for w in weights], 'float64') for key in keys}
+    return {key: column for key, column in columns.items() if column is not None}
+
+
+def graph_to_columns(graph: models.Graph) -> dict:
+    """
+    Struct of arrays representation of a graph (v2), leaves are numpy arrays.
+    - comments: id, grp_id (sparse), split_offsets (splits of comment i are split_offsets[i]:split_offsets[i+1])
+    - splits: s, e, wgts (sparse per weight)
+    - edges: src_comment, src_split, tgt_comment, tgt_split, wgts (sparse per weight)
+    - groups (only if there are implicit edges, see data.processors.implicit): tp (list), wgt,
+      node_offsets, node_comment, node_split (nodes of group i are node_offsets[i]:node_offsets[i+1]),
+      excluded_offsets, excluded_src_comment, excluded_src_split, excluded_tgt_comment, excluded_tgt_split
+    """
+    splits = [split for comment in graph.comments for split in comment.splits]
+    edges = graph.edges
+    id2idx = {int(k): v for k, v in graph.id2idx.items()}
+    columns = {
+        'format': FORMAT,
+        'article_ids': graph.article_ids,
+        'graph_id': graph.graph_id,
+        'id2idx': {'id': np.array(list(id2idx.keys()), dtype='int32'),
+                   'idx': np.array(list(id2idx.values()), dtype='int32')},
+        'comments': {
+            'id': np.array([comment.id for comment in graph.comments], dtype='int32'),
+            'split_offsets': np.cumsum([0] + [len(comment.splits) for comment in graph.comments], dtype='int32')
+        },
+        'splits': {
+            's': np.array([split.s for split in splits], dtype='int32'),
+            'e': np.array([split.e for split in splits], dtype='int32'),
+            'wgts': _weights([split.wgts for split in splits], models.SplitWeights.__fields__)
+        },
+        'edges': {
+            'src_comment': np.array([edge.src[0] for edge in edges], dtype='int32'),
+            'src_split': np.array([edge.src[1] for edge in edges], dtype='int32'),
+            'tgt_comment': np.array([edge.tgt[0] for edge in edges], dtype='int32'),
+            'tgt_split': np.array([edge.tgt[1] for edge in edges], dtype='int32'),
+            'wgts': _weights([edge.wgts for edge in edges], models.EdgeWeights.__fields__)
+        }
+    }
+    grp_ids = _sparse([comment.grp_id for comment in graph.comments], 'int32')
+    if grp_ids is not None:
+        columns['comments']['grp_id'] = grp_ids
+    if graph.groups:
+        columns['groups'] = _groups(graph.groups)
+    if graph.debug is not None:
+        columns['debug'] = graph.debug
+    return columns
+
+
+def _groups(groups: List[models.EdgeGroup]) -> dict:
+    nodes = [node for group in groups for node in group.nodes]
+    excluded = [pair for group in groups for pair in group.excluded]
+    return {
+        'tp': [group.tp for group in groups],
+        'wgt': np.array([group.wgt for group in groups], dtype='float64'),
+        'node_offsets': np.cumsum([0] + [len(group.nodes) for group in groups], dtype='int32'),
+        'node_comment': np.array([node[0] for node in nodes], dtype='int32'),
+        'node_split': np.array([node[1] for node in nodes], dtype='int32'),
+        'excluded_offsets': np.cumsum([0] + [len(group.excluded) for group in groups], dtype='int32'),
+        'excluded_src_comment': np.array([src[0] for src, tgt in excluded], dtype='int32'),
+        'excluded_src_split': np.array([src[1] for src, tgt in excluded], dtype='int32'),
+        'excluded_tgt_comment': np.array([tgt[0] for src, tgt in excluded], dtype='int32'),
+        'excluded_tgt_split': np.array([tgt[1] for src, tgt in excluded], dtype='int32')
+    }
+
+
+def _to_lists(node):
+    if isinstance(node, np.ndarray):
+        return node.tolist()
+    if isinstance(node, dict):
+        return {key: _to_lists(value) for key, value in node.items()}
+    return node
+
+
+def encode_json(graph: models.Graph) -> bytes:
+    return json.dumps(_to_lists(graph_to_columns(graph)), separators=(',', ':')).encode('utf-8')
+
+
+def encode_binary(graph: models.Graph) -> bytes:
+    """
+    MAGIC, uint32 (little endian) length of the JSON header, header, padding to 8 bytes, array buffers.
+    The header is the v2 JSON with every array replaced by {"$": [dtype, byte offset into the buffers, length]}.
+    Every buffer starts at a multiple of 8 bytes, so clients can view them as typed arrays without copying.
+    """
+    buffers = []
+    offset = 0
+
+    def replace(node):
+        nonlocal offset
+        if isinstance(node, np.ndarray):
+            data = node.astype(DTYPES[node.dtype.name]).tobytes()
+            ref = {'$': [node.dtype.name, offset, len(node)]}
+            buffers.append(data + b'\0' * (-len(data) % 8))
+            offset += len(buffers[-1])
+            return ref
+        if isinstance(node, dict):
+            return {key: replace(value) for key, value in node.items()}
+        return node
+
+    header = json.dumps(replace(graph_to_columns(graph)), separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header] + buffers)
+
+
+def encode(graph: models.Graph, media_type: str) -> bytes:
+    if media_type == GRAPH_V2_BINARY:
+        return encode_binary(graph)
+    return encode_json(graph)
+
+
+GRAPH_NDJSON = 'application/x-ndjson'
+
+
+def _plain(item):
+    return item.dict() if isinstance(item, BaseModel) else item
+
+
+def _line(obj: dict) -> bytes:
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def iter_ndjson(graph: Union[models.Graph, dict], chunk_size: int = 1000) -> Iterator[bytes]:
+    """
+    Graph as newline delimited JSON, nodes first, so clients can start the layout before all edges arrived:
+    - {"type": "meta", "graph_id", "article_ids", "num_comments", "num_edges", "num_groups", "id2idx"}
+    - {"type": "comments", "comments": [...]} chunks of SplitComments (as in v1)
+    - {"type": "edges", "edges": [...]} chunks of Edges (as in v1)
+    - {"type": "groups", "groups": [...]} EdgeGroups (as in v1), only if there are any
+    - {"type": "end"}
+    Only one chunk is serialised at a time.
+    :param graph: models.Graph or the plain dict of a stored graph (see data.database.get_graph_dict)
+    :param chunk_size: comments or edges per line
+    """
+    if isinstance(graph, BaseModel):
+        graph = {key: getattr(graph, key)
+                 for key in ['graph_id', 'article_ids', 'comments', 'id2idx', 'edges', 'groups']}
+    comments, edges, groups = graph['comments'], graph['edges'], graph.get('groups') or []
+
+    yield _line({'type': 'meta', 'graph_id': graph['graph_id'], 'article_ids': graph['article_ids'],
+                 'num_comments': len(comments), 'num_edges': len(edges), 'num_groups': len(groups),
+                 'id2idx': graph['id2idx']})
+    for start in range(0, len(comments), chunk_size):
+        yield _line({'type': 'comments', 'comments': [_plain(c) for c in comments[start:start + chunk_size]]})
+    for start in range(0, len(edges), chunk_size):
+        yield _line({'type': 'edges', 'edges': [_plain(e) for e in edges[start:start + chunk_size]]})
+    if groups:
+        yield _line({'type': 'groups', 'groups': [_plain(g) for g in groups]})
+    yield _line({'type': 'end'})
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from common import init_logging, init_config
+from common import init_logging, init_config, init_models
 
 
 def run(args=None):
@@ -12,9 +12,10 @@ def run(args=None):
     init_logging()
     server = Server()
     init_db(server.app)
+    init_models(server.app)
 
     return server
 
 
 if __name__ == '__main__':
-    run()
+    run().run()
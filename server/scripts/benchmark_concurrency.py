@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Mixed read/write load on the cache DB: one task keeps ingesting articles
+# (like the scrapers do) while several tasks fetch comments of stored articles
+# (like graph builds do). Reports read latency percentiles, throughput and
+# "database is locked" errors.
+#
+# run from the server directory, compare journal modes with --journal-mode:
+#   PYTHONPATH=. python scripts/benchmark_concurrency.py --readers 8 --duration 10
+#   PYTHONPATH=. python scripts/benchmark_concurrency.py --readers 8 --duration 10 --journal-mode DELETE
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import common
+
+parser = argparse.ArgumentParser(description='Benchmark concurrent reads and writes on the cache DB')
+parser.add_argument('--readers', type=int, default=8, help='Number of concurrent reading tasks')
+parser.add_argument('--duration', type=float, default=10., help='Seconds to run the mixed load')
+parser.add_argument('--seed-articles', type=int, default=20, help='Articles stored before the load starts')
+parser.add_argument('--comments', type=int, default=2000, help='Comments per article')
+parser.add_argument('--journal-mode', type=str, default=None, help='Override [cache] journal_mode')
+args = parser.parse_args()
+
+common.init_config(['--config', 'configs/testing.ini'])
+db_file = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+common.config.set('cache', 'db_url', f'sqlite:///{db_file}')
+if args.journal_mode:
+    common.config.set('cache', 'journal_mode', args.journal_mode)
+
+import data.database as db
+import data.models as models
+
+
+def make_article(run: int) -> models.ArticleScraped:
+    return models.ArticleScraped(url=f'https://www.example.com/article-{run}.html',
+                                 title=f'Benchmark article {run}',
+                                 text='Lorem ipsum dolor sit amet.',
+                                 published_time=datetime(2020, 4, 1),
+                                 scraper='benchmark')
+
+
+def make_comments(n: int):
+    start = datetime(2020, 4, 1)
+    return [models.CommentScraped(username=f'user{i % 500}',
+                                  comment_id=f'c{i}',
+                                  timestamp=start + timedelta(seconds=i * 7),
+                                  text=f'Das ist Kommentar Nummer {i}. Er antwortet auf eine andere Meinung.',
+                                  reply_to=f'c{i // 3}' if i % 4 else None,
+                                  upvotes=i % 13)
+            for i in range(n)]
+
+
+class Stats:
+    def __init__(self):
+        self.read_latencies = []
+        self.writes = 0
+        self.locked_errors = 0
+
+
+async def writer(stats: Stats, comments, deadline: float, first_run: int):
+    run = first_run
+    while time.perf_counter() < deadline:
+        try:
+            await db.insert_article_with_comments(make_article(run), comments)
+            stats.writes += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            stats.locked_errors += 1
+        run += 1
+        # yield to the readers between two scrapes
+        await asyncio.sleep(0)
+
+
+async def reader(stats: Stats, article_ids, deadline: float):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await db.get_comment_columns(random.sample(article_ids, 2))
+            stats.read_latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            stats.locked_errors += 1
+
+
+async def main():
+    await db.connect()
+    comments = make_comments(args.comments)
+    article_ids = [await db.insert_article_with_comments(make_article(run), comments)
+                   for run in range(args.seed_articles)]
+
+    stats = Stats()
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(writer(stats, comments, deadline, args.seed_articles),
+                         *[reader(stats, article_ids, deadline) for _ in range(args.readers)])
+    await db.disconnect()
+
+    latencies = np.array(stats.read_latencies) * 1000
+    print(f'journal_mode={common.config.get("cache", "journal_mode")} readers={args.readers} '
+          f'comments/article={args.comments} duration={args.duration}s')
+    print(f'  reads : {len(latencies) / args.duration:8.1f}/s | latency ms '
+          f'p50 {np.percentile(latencies, 50):.1f} p95 {np.percentile(latencies, 95):.1f} '
+          f'max {latencies.max():.1f}')
+    print(f'  writes: {stats.writes / args.duration:8.1f}/s ({stats.writes * args.comments} comments)')
+    print(f'  "database is locked" errors: {stats.locked_errors}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
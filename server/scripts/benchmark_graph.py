@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Graph build benchmark: sweeps configurations over comment threads and reports median and percentile wall time,
+# edge counts and (with --memory) peak memory, per build and per stage (see data.processors.benchmark).
+# Results are saved as JSON, pass an earlier result with --compare to see what got faster or slower.
+#
+# Threads are fixture files (see data.processors.benchmark.save_fixture) or articles in the cache DB,
+# --save-fixtures stores the latter as fixtures so later runs don't need the DB.
+# --synthetic generates threads of the given sizes (see data.synthetic), e.g. for scaling curves without any data.
+#
+# With --sweep every configuration is built once instead, configurations with the same comparator settings share
+# their comparisons (see data.processors.sweep), e.g. to compare filter or ranker settings quickly.
+#
+# --calibrate saves the costs of the stages measured on this machine for the estimates of POST /api/graph/explain
+# and the admission of graph builds, set [Explain] calibration_path to the file (see data.processors.explain).
+#
+# run from the server directory:
+#   PYTHONPATH=. python scripts/benchmark_graph.py --article-ids 1 2 --save-fixtures benchmarks/
+#   PYTHONPATH=. python scripts/benchmark_graph.py --fixtures benchmarks/*.json --only PRB --output new.json
+#   PYTHONPATH=. python scripts/benchmark_graph.py --fixtures benchmarks/*.json --compare new.json
+#   PYTHONPATH=. python scripts/benchmark_graph.py --synthetic 100 200 400 800 --configurations default
+#   PYTHONPATH=. python scripts/benchmark_graph.py --synthetic 500 --only '^SC_' --sweep
+#   PYTHONPATH=. python scripts/benchmark_graph.py --synthetic 200 400 --memory --calibrate costs.json
+#   PYTHONPATH=. python scripts/benchmark_graph.py --synthetic 200 400 --configurations default --memo \
+#       --compare no_memo.json
+import argparse
+import asyncio
+import json
+import os
+import re
+
+import common
+
+parser = argparse.ArgumentParser(description='Benchmark graph builds over configurations and comment threads')
+parser.add_argument('--config', default='configs/DEFAULT.ini', help='Base config of the graph builds')
+parser.add_argument('--fixtures', nargs='*', default=[], help='Fixture files with comment threads')
+parser.add_argument('--article-ids', nargs='*', type=int, default=[], help='Articles from the cache DB')
+parser.add_argument('--synthetic', nargs='*', type=int, default=[], help='Sizes of synthetic threads')
+parser.add_argument('--synthetic-articles', type=int, default=1, help='Articles per synthetic thread')
+parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic threads')
+parser.add_argument('--save-fixtures', help='Directory to save the threads of --article-ids and --synthetic to')
+parser.add_argument('--configurations', default='test.configuration_testing',
+                    help='Module with CONFIGURATIONS to sweep, or "default" for the base config only')
+parser.add_argument('--only', help='Regular expression, only sweep matching configurations')
+parser.add_argument('--repetitions', type=int, default=5, help='Measured builds per configuration')
+parser.add_argument('--warmup', type=int, default=1, help='Builds per configuration before measuring')
+parser.add_argument('--memory', action='store_true', help='Also measure peak memory (two more builds each)')
+parser.add_argument('--memo', action='store_true',
+                    help='Keep the stages like the server does, compare with a run without to see its overhead')
+parser.add_argument('--output', default='benchmark_graph.json', help='Where to save the results')
+parser.add_argument('--compare', help='Earlier results to compare the median wall times with')
+parser.add_argument('--sweep', action='store_true', help='Build every configuration once, reusing comparisons')
+parser.add_argument('--calibrate', help='Where to save the stage costs calibrated from the results')
+args = parser.parse_args()
+
+common.init_config(['--config', args.config])
+
+import data.database as db
+from data import synthetic
+from data.processors import benchmark, explain, sweep
+
+
+async def load_articles(article_ids):
+    await db.connect()
+    try:
+        return {f'article-{article_id}': await db.get_comments([article_id]) for article_id in article_ids}
+    finally:
+        await db.disconnect()
+
+
+def run_sweep(fixtures, configurations, isolated):
+    results = {fixture: sweep.sweep(comments, configurations, isolated=isolated)
+               for fixture, comments in fixtures.items()}
+    with open(args.output, 'w') as f:
+        json.dump({'sweeps': results}, f, indent=1)
+
+    print(f'{"fixture":>20} {"configuration":>20} {"edges":>8} {"comparisons":>12} {"modifiers":>10}')
+    for fixture, rows in results.items():
+        for row in rows:
+            if 'error' in row:
+                print(f'{fixture:>20} {row["configuration"]:>20} failed: {row["error"].strip().splitlines()[-1]}')
+                continue
+            comparisons = 'reused' if row['reused'] else f'{row["comparisons_wall"]:.3f}s'
+            print(f'{fixture:>20} {row["configuration"]:>20} {row["edges"]:>8} {comparisons:>12} '
+                  f'{row["modify_wall"]:9.3f}s')
+    print(f'Saved results to {args.output}')
+
+
+def main():
+    fixtures = {}
+    for path in args.fixtures:
+        name, comments = benchmark.load_fixture(path)
+        fixtures[name] = comments
+    generated = synthetic.fixtures(args.synthetic, num_articles=args.synthetic_articles, seed=args.seed)
+    if args.article_ids:
+        generated.update(asyncio.run(load_articles(args.article_ids)))
+    if args.save_fixtures:
+        os.makedirs(args.save_fixtures, exist_ok=True)
+        for name, comments in generated.items():
+            benchmark.save_fixture(os.path.join(args.save_fixtures, f'{name}.json'), name, comments)
+    fixtures.update(generated)
+    if not fixtures:
+        parser.error('no comment threads, pass --fixtures, --article-ids or --synthetic')
+
+    if args.configurations == 'default':
+        configurations, isolated = [('default', {})], False
+    else:
+        configurations, isolated = __import__(args.configurations, fromlist=['CONFIGURATIONS']).CONFIGURATIONS, True
+    if args.only:
+        configurations = [(name, conf) for name, conf in configurations if re.search(args.only, name)]
+
+    if args.sweep:
+        run_sweep(fixtures, configurations, isolated)
+        return
+
+    results = benchmark.run_suite(fixtures, configurations, repetitions=args.repetitions, warmup=args.warmup,
+                                  memory=args.memory, isolated=isolated, memo=args.memo)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+
+    print(f'{"fixture":>20} {"configuration":>20} {"comments":>8} {"edges":>8} '
+          f'{"median":>9} {"p90":>9} {"p99":>9} {"memory":>9}  slowest stage')
+    for result in results['results']:
+        if 'error' in result:
+            print(f'{result["fixture"]:>20} {result["configuration"]:>20} failed: '
+                  f'{result["error"].strip().splitlines()[-1]}')
+            continue
+        wall = result['wall']
+        slowest = max(result['stages'].items(), key=lambda stage: stage[1]['wall']['median'])
+        memory = f'{result["memory_peak"] / 2 ** 20:8.1f}M' if 'memory_peak' in result else f'{"-":>9}'
+        print(f'{result["fixture"]:>20} {result["configuration"]:>20} {result["comments"]:>8} {result["edges"]:>8} '
+              f'{wall["median"]:8.3f}s {wall["p90"]:8.3f}s {wall["p99"]:8.3f}s {memory}  '
+              f'{slowest[0]} ({slowest[1]["wall"]["median"]:.3f}s)')
+    print(f'Saved results to {args.output}')
+
+    if args.calibrate:
+        with open(args.calibrate, 'w') as f:
+            json.dump(explain.calibrate(results), f, indent=1)
+        print(f'Saved calibrated costs to {args.calibrate}')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f'\nCompared with {args.compare} (ratio > 1 is slower)')
+        for row in benchmark.compare(baseline, results):
+            print(f'{row["fixture"]:>20} {row["configuration"]:>20} {row["baseline"]:8.3f}s -> {row["median"]:8.3f}s '
+                  f'x{row["ratio"]:.2f}{"  edges changed" if row["edges_changed"] else ""}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# Compares the bulk ingest path (single transaction, executemany on tuples)
+# with the previous insert: `databases.execute_many` of the SQLAlchemy insert on a plain `databases.Database`.
+#
+# run from the server directory:
+#   PYTHONPATH=. python scripts/benchmark_ingest.py --comments 10000
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import databases
+
+import common
+
+parser = argparse.ArgumentParser(description='Benchmark comment ingest into the cache DB')
+parser.add_argument('--comments', type=int, default=10000,
+                    help='Number of comments of the synthetic article')
+parser.add_argument('--repetitions', type=int, default=3,
+                    help='How often each insert path is measured')
+args = parser.parse_args()
+
+common.init_config(['--config', 'configs/testing.ini'])
+db_file = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+common.config.set('cache', 'db_url', f'sqlite:///{db_file}')
+
+import data.database as db
+import data.models as models
+from data.backends.schema import articles_table, comments_table
+
+# the cache DB as it was opened before the storage backends, one connection per query, no pragmas
+legacy = databases.Database(f'sqlite:///{db_file}')
+
+
+def make_article(run: int) -> models.ArticleScraped:
+    return models.ArticleScraped(url=f'https://www.example.com/article-{run}.html',
+                                 title=f'Benchmark article {run}',
+                                 text='Lorem ipsum dolor sit amet.',
+                                 published_time=datetime(2020, 4, 1),
+                                 scraper='benchmark')
+
+
+def make_comments(n: int):
+    start = datetime(2020, 4, 1)
+    return [models.CommentScraped(username=f'user{i % 500}',
+                                  comment_id=f'c{i}',
+                                  timestamp=start + timedelta(seconds=i * 7),
+                                  text=f'Das ist Kommentar Nummer {i}. Er antwortet auf eine andere Meinung.',
+                                  reply_to=f'c{i // 3}' if i % 4 else None,
+                                  upvotes=i % 13,
+                                  downvotes=i % 5)
+            for i in range(n)]
+
+
+async def legacy_insert(article, comments):
+    article_id = await legacy.execute(articles_table.insert().values(**article.dict()))
+    values = [{**comment.dict(), 'article_id': article_id} for comment in comments]
+    await legacy.execute_many(comments_table.insert(), values=values)
+
+
+async def bulk_insert(article, comments):
+    await db.insert_article_with_comments(article, comments)
+
+
+async def main():
+    await db.connect()
+    await legacy.connect()
+    comments = make_comments(args.comments)
+    run = 0
+    for name, insert in [('execute_many (legacy)', legacy_insert), ('bulk ingest', bulk_insert)]:
+        timings = []
+        for _ in range(args.repetitions):
+            start = time.perf_counter()
+            await insert(make_article(run), comments)
+            timings.append(time.perf_counter() - start)
+            run += 1
+        print(f'{name:>24}: best {min(timings):.3f}s | '
+              f'{args.comments / min(timings):,.0f} comments/s over {args.repetitions} runs')
+    await legacy.disconnect()
+    await db.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# Import cost of the entry points: every entry point is imported in a fresh
+# interpreter and we report wall time, peak RSS and which heavy ML libraries
+# ended up in sys.modules. None of them should import TensorFlow or fastText,
+# models are loaded on first use (see common.ModelRegistry).
+#
+# run from the server directory:
+#   PYTHONPATH=. python scripts/benchmark_startup.py
+#   PYTHONPATH=. python scripts/benchmark_startup.py --check  # exit 1 if a heavy library is imported
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+parser = argparse.ArgumentParser(description='Benchmark import time and memory of the entry points')
+parser.add_argument('--repetitions', type=int, default=3, help='Fresh interpreters per entry point')
+parser.add_argument('--check', action='store_true', help='Fail if an entry point imports a heavy library')
+args = parser.parse_args()
+
+HEAVY_MODULES = ['tensorflow', 'keras', 'fasttext']
+
+ENTRY_POINTS = {
+    'common': 'pass',
+    # everything main.run imports, without starting uvicorn
+    'main': 'import main, api, data.database',
+    'data.database': 'import data.database',
+    'data.cache': 'import data.cache',
+    'data.processors.graph': 'import data.processors.graph',
+}
+
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import common
+common.init_config(['--config', 'configs/testing.ini'])
+{statement}
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': [name for name in {heavy} if name in sys.modules]
+}}))
+'''
+
+
+def probe(statement: str) -> dict:
+    result = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                            env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)},
+                            stdout=subprocess.PIPE, check=True)
+    return json.loads(result.stdout.decode().strip().splitlines()[-1])
+
+
+def main():
+    failed = False
+    print(f'{"entry point":>24} | {"import s":>8} | {"RSS MB":>7} | heavy modules')
+    for name, statement in ENTRY_POINTS.items():
+        results = [probe(statement) for _ in range(args.repetitions)]
+        best = min(results, key=lambda r: r['seconds'])
+        print(f'{name:>24} | {best["seconds"]:8.3f} | {best["max_rss_mb"]:7.1f} | {", ".join(best["heavy"]) or "-"}')
+        failed |= bool(best['heavy'])
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# Exports the word and subword vectors of the fastText model (configs: [TextProcessing] fasttext_path)
+# to a memory mapped store, which all workers share instead of loading the full model each.
+# Set [TextProcessing] word_vectors_path to the output directory to use it.
+#
+# run from the server directory:
+#   PYTHONPATH=. python scripts/export_word_vectors.py --config configs/example.ini --out models/word_vectors
+#   PYTHONPATH=. python scripts/export_word_vectors.py --out models/word_vectors_f16 --dtype float16 --max-words 500000
+import argparse
+import logging
+
+import common
+
+parser = argparse.ArgumentParser(description='Export fastText vectors to a memory mapped store')
+parser.add_argument('--config', type=str, default='configs/example.ini', help='Path to the config file to use')
+parser.add_argument('--out', type=str, required=True, help='Directory to write the store to')
+parser.add_argument('--dtype', type=str, default='float32', choices=['float32', 'float16'],
+                    help='float16 halves the size, vectors differ by ~1e-3')
+parser.add_argument('--max-words', type=int, default=None, help='Only keep the most frequent words')
+parser.add_argument('--no-subwords', action='store_true',
+                    help='Drop the subword buckets, unknown words will get zero vectors')
+args = parser.parse_args()
+
+common.init_config(['--config', args.config])
+logging.basicConfig(level=logging.INFO)
+
+from data.processors.word_vectors import export
+
+if __name__ == '__main__':
+    export(common.init_or_get_fasttext_model(), args.out,
+           dtype=args.dtype, max_words=args.max_words, subwords=not args.no_subwords)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Offline scraper fixtures: record the HTTP requests of scrapes into gzipped recordings (data.scrapers.replay),
+# measure how long the scrapers take to parse them, or serve them to a server started with [scrapers] replay_url.
+#
+# run from the server directory:
+#   PYTHONPATH=. python scripts/scraper_replay.py record --output test/recordings https://www.faz.net/...
+#   PYTHONPATH=. python scripts/scraper_replay.py benchmark test/recordings --repetitions 10
+#   PYTHONPATH=. python scripts/scraper_replay.py serve test/recordings --port 9091 --latency 0.05
+import argparse
+import time
+
+import common
+
+parser = argparse.ArgumentParser(description='Record, replay and benchmark scrapes')
+parser.add_argument('--config', default='configs/DEFAULT.ini', help='Config of the scrapers')
+commands = parser.add_subparsers(dest='command', required=True)
+record_parser = commands.add_parser('record', help='Scrape URLs over the network and save their recordings')
+record_parser.add_argument('urls', nargs='+')
+record_parser.add_argument('--output', default='test/recordings', help='Directory to save the recordings to')
+benchmark_parser = commands.add_parser('benchmark', help='Parse time of recorded scrapes')
+benchmark_parser.add_argument('recordings', help='Recording or directory of recordings')
+benchmark_parser.add_argument('--repetitions', type=int, default=5, help='Replays per recording')
+serve_parser = commands.add_parser('serve', help='Serve recordings over HTTP')
+serve_parser.add_argument('recordings', help='Recording or directory of recordings')
+serve_parser.add_argument('--host', default='localhost')
+serve_parser.add_argument('--port', type=int, default=9091)
+serve_parser.add_argument('--latency', type=float, default=0., help='Seconds to wait before every response')
+args = parser.parse_args()
+
+common.init_config(['--config', args.config])
+
+from data.scrapers import replay
+
+
+def main():
+    if args.command == 'record':
+        for url in args.urls:
+            recording = replay.record(url)
+            path = replay.save_recording(args.output, recording)
+            print(f'{recording["scraper"]:>20} {recording["comments"]:>6} comments '
+                  f'{len(recording["exchanges"]):>4} requests -> {path}')
+
+    elif args.command == 'benchmark':
+        print(f'{"scraper":>20} {"comments":>8} {"requests":>8} {"total":>9} {"article":>9} {"comments":>9} '
+              f'{"per comment":>12}  url')
+        for recording in replay.load_recordings(args.recordings):
+            result = replay.benchmark(recording, repetitions=args.repetitions)
+            print(f'{result["scraper"]:>20} {result["comments"]:>8} {result["requests"]:>8} '
+                  f'{result["total"]:8.3f}s {result["_scrape_article"]:8.3f}s {result["_scrape_comments"]:8.3f}s '
+                  f'{result["per_comment"] * 1000:10.3f}ms  {result["url"]}')
+
+    elif args.command == 'serve':
+        recordings = replay.load_recordings(args.recordings)
+        with replay.ReplayServer(recordings, host=args.host, port=args.port, latency=args.latency) as server:
+            print(f'Replaying {len(recordings)} recordings at {server.url}, set [scrapers] replay_url to it')
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == '__main__':
+    main()
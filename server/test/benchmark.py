@@ -0,0 +1,30 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+from data.processors import benchmark
+from test.configuration_testing import CONFIGURATIONS
+from test.tracing import make_comments
+
+
+def test_sweep_and_compare(tmp_path):
+    benchmark.save_fixture(str(tmp_path / 'thread.json'), 'thread', make_comments())
+    name, comments = benchmark.load_fixture(str(tmp_path / 'thread.json'))
+    assert name == 'thread' and comments == make_comments()
+
+    configurations = [c for c in CONFIGURATIONS if c[0] in ('SC_PRB_k50', 'RT_merge_01')]
+    results = benchmark.run_suite({name: comments}, configurations, repetitions=3, warmup=0, memory=True)
+    prb, merge = results['results']
+    assert prb['wall']['runs'] == 3 and prb['wall']['min'] <= prb['wall']['median'] <= prb['wall']['p99']
+    # only the comparators and modifiers of the configuration ran
+    assert list(prb['stages']) == ['split', 'index', 'comparisons', 'SameCommentComparator',
+                                   'PageRanker', 'PageRankBottomFilter']
+    assert prb['stages']['SameCommentComparator']['edges_out'] == prb['edges'] == 10
+    assert merge['stages']['ReplyToNodeMerger']['edges_in'] == 9
+
+    rows = benchmark.compare(results, results)
+    assert [row['ratio'] for row in rows] == [1., 1.]
+
+    # with memo no run restores stages of the one before
+    memoized = benchmark.run_suite({name: comments}, configurations[:1], repetitions=2, warmup=1, memo=True)
+    assert list(memoized['results'][0]['stages']) == list(prb['stages'])
@@ -0,0 +1,28 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+from data import synthetic
+from data.processors.graph import GraphRepresentation
+from data.processors.tracing import Tracer
+
+
+def test_rankers_only_run_when_needed():
+    comments = synthetic.generate(40, seed=4)
+    full_tracer, tracer = Tracer(), Tracer()
+    full = GraphRepresentation(comments, tracer=full_tracer)
+    graph = GraphRepresentation(comments, conf={'GraphRepresentation': {'node_weights': 'PAGERANK'}}, tracer=tracer)
+
+    stages = [span.name for span in tracer.spans]
+    # VotesFilter, PageRankBottomFilter and GenericSingleEdgeAdder read theirs,
+    # nothing reads SIZE, DEGREE_CENTRALITY or MERGE_ID
+    assert {'VotesRanker', 'PageRanker', 'RecencyRanker'} <= set(stages)
+    skipped = {'SizeRanker', 'CentralityDegreeCalculator', 'ReplyToNodeMerger'}
+    assert not skipped & set(stages)
+    assert skipped <= {span.name for span in full_tracer.spans}
+
+    assert [(e.src, e.tgt) for e in graph.edges] == [(e.src, e.tgt) for e in full.edges]
+    for comment, full_comment in zip(graph.comments, full.comments):
+        for split, full_split in zip(comment.splits, full_comment.splits):
+            assert split.wgts.PAGERANK == full_split.wgts.PAGERANK
+            assert split.wgts.SIZE is None and full_split.wgts.SIZE is not None
@@ -0,0 +1,67 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import numpy as np
+
+import data.models as models
+from common import config
+from data import synthetic
+from data.processors import explain
+from data.processors.benchmark import isolate
+from data.processors.graph import GraphRepresentation
+from data.processors.text import split_comment
+from data.processors.tracing import Tracer
+
+STRUCTURE = {'SameCommentComparator': {'base_weight': 1.0, 'only_consecutive': True},
+             'ReplyToComparator': {'base_weight': 1.0, 'only_root': False},
+             'TemporalComparator': {'base_weight': 1.0, 'only_root': False, 'max_time': 1000}}
+
+
+def test_estimated_edges_bound_the_comparisons():
+    comments = synthetic.generate(80, num_articles=2, seed=9)
+    for name in STRUCTURE:
+        conf = isolate({name: STRUCTURE[name]})
+        # the structural comparators' edges are counted exactly
+        assert explain.explain(comments, conf).edges == len(GraphRepresentation(comments, conf=conf).edges), name
+    conf = isolate(STRUCTURE)
+    explanation = explain.explain(comments, conf)
+    assert len(GraphRepresentation(comments, conf=conf).edges) <= explanation.edges <= explanation.pairs
+    assert [stage.stage for stage in explanation.stages] == ['comparisons']
+
+
+def test_over_budget_graphs_are_downgraded_or_rejected(monkeypatch):
+    comments = synthetic.generate(80, num_articles=2, seed=9)
+    clustered = isolate({**STRUCTURE, 'TemporalClusterer': {'algorithm': 'girvanNewman'}})
+    greedy = explain.explain(comments, {**clustered, 'TemporalClusterer': {'algorithm': 'greedyModularityCommunities'}})
+    assert explain.explain(comments, clustered).seconds > greedy.seconds
+
+    monkeypatch.setitem(config['Explain'], 'max_seconds', str(greedy.seconds * 1.5))
+    explanation = explain.explain(comments, clustered, policy='downgrade')
+    assert explanation.admission == models.GraphAdmission.DOWNGRADED
+    assert explanation.downgrades == ['TemporalClusterer uses greedyModularityCommunities']
+    assert explanation.conf['TemporalClusterer']['algorithm'] == 'greedyModularityCommunities'
+    assert explain.explain(comments, clustered, policy='reject').admission == models.GraphAdmission.REJECTED
+
+    # comparing alone is over budget, nothing to leave out
+    monkeypatch.setitem(config['Explain'], 'max_seconds', str(greedy.stages[0].seconds / 2))
+    assert explain.explain(comments, clustered, policy='downgrade').admission == models.GraphAdmission.REJECTED
+
+
+def test_splits_and_undated_comments():
+    comments = synthetic.generate(40, seed=3)
+    splits = [split_comment(comment) for comment in comments]
+    conf = isolate(STRUCTURE)
+    assert explain.explain(comments, conf, splits=splits) == explain.explain(comments, conf)
+    tracer = Tracer()
+    graph = GraphRepresentation(comments, conf={**conf, 'GraphRepresentation': {'memo': False}}, tracer=tracer,
+                                splits=splits)
+    assert graph.comments is splits and 'split' not in [span.name for span in tracer.spans]
+
+    # comments without a timestamp are only close in time to themselves
+    undated = [comment.copy(update={'timestamp': None}) if i % 2 else comment for i, comment in enumerate(comments)]
+    counts = explain.SplitCounts(undated, splits)
+    within = int((counts.splits * (counts.splits - 1) // 2).sum())
+    assert np.isnan(counts.times[1::2]).all()
+    assert within < counts.temporal_pairs(1000) <= explain.SplitCounts(comments, splits).temporal_pairs(1000)
+    assert explain.SplitCounts(undated[1:2]).temporal_pairs(1000) == 0
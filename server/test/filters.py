@@ -0,0 +1,62 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.models as models
+from data import synthetic
+from data.processors.benchmark import isolate
+from data.processors import graph, memo
+from data.processors.graph import GraphRepresentation, Plan
+from data.processors.tracing import Tracer
+
+TEMPORAL = {'TemporalComparator': {'base_weight': 1.0, 'only_root': False},
+            'ReplyToComparator': {'base_weight': 1.0, 'only_root': False}}
+
+
+def test_edge_filters_pushed_into_comparisons(monkeypatch):
+    comments = synthetic.generate(30, seed=5)
+    confs = {
+        'pushed': isolate({**TEMPORAL, 'TemporalEdgeFilter': {'threshold': 0.5, 'smaller_as': False},
+                           'VotesRanker': {'use_upvotes': True, 'use_downvotes': True},
+                           'OrEdgeFilter': {'reply_to_threshold': 0.5, 'same_comment_threshold': 0,
+                                            'same_article_threshold': 0, 'similarity_threshold': 0,
+                                            'same_group_threshold': 0, 'temporal_threshold': 0.9}}),
+        # the edges PageRanker sees have to stay the same, so the filter runs afterwards
+        'not_pushed': isolate({**TEMPORAL, 'PageRanker': {'num_iterations': 10, 'd': 0.85, 'edge_type': 'REPLY_TO',
+                                                          'use_power_mode': True},
+                               'ReplyToEdgeFilter': {'threshold': 0.5, 'smaller_as': False}})
+    }
+    tracers = {name: Tracer() for name in confs}
+    graphs = {name: models.Graph(**GraphRepresentation(comments, conf=conf, tracer=tracers[name]).__dict__())
+              for name, conf in confs.items()}
+    stages = {name: [span.name for span in tracer.spans] for name, tracer in tracers.items()}
+    assert 'TemporalEdgeFilter' not in stages['pushed'] and 'OrEdgeFilter' not in stages['pushed']
+    assert 'ReplyToEdgeFilter' in stages['not_pushed']
+
+    # plans compiled before pushed the filters down
+    monkeypatch.setattr(graph, 'PLANS', memo.LRUCache(0))
+    monkeypatch.setattr(Plan, '_push_down', staticmethod(lambda modifiers: (modifiers, [])))
+    for name, conf in confs.items():
+        assert graphs[name] == models.Graph(**GraphRepresentation(comments, conf=conf).__dict__()), name
+    assert 0 < len(graphs['pushed'].edges)
+
+
+def test_consecutive_edge_filters_are_fused(monkeypatch):
+    comments = synthetic.generate(40, num_articles=2, seed=6)
+    # PageRanker reads the edges, so the filters after it can't be pushed into the comparisons
+    conf = isolate({**TEMPORAL, 'SameArticleComparator': {'base_weight': 1.0, 'only_root': False},
+                    'PageRanker': {'num_iterations': 10, 'd': 0.85, 'edge_type': 'TEMPORAL', 'use_power_mode': True},
+                    'SameArticleEdgeFilter': {'threshold': 0.5, 'smaller_as': False},
+                    'TemporalEdgeFilter': {'threshold': 0.9, 'smaller_as': True},
+                    'OrEdgeFilter': {'reply_to_threshold': 0.5, 'same_comment_threshold': 0,
+                                     'same_article_threshold': 0.5, 'similarity_threshold': 0,
+                                     'same_group_threshold': 0, 'temporal_threshold': 0.3}})
+    tracer = Tracer()
+    fused = models.Graph(**GraphRepresentation(comments, conf=conf, tracer=tracer).__dict__())
+    stages = [span.name for span in tracer.spans]
+    assert 'FusedEdgeFilter' in stages and 'TemporalEdgeFilter' not in stages
+
+    monkeypatch.setattr(graph, 'PLANS', memo.LRUCache(0))
+    monkeypatch.setattr(Plan, '_fuse', lambda self, modifiers: modifiers)
+    assert fused == models.Graph(**GraphRepresentation(comments, conf=conf).__dict__())
+    assert 0 < len(fused.edges)
@@ -0,0 +1,76 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.models as models
+from data import synthetic
+from data.processors import implicit
+from data.processors.benchmark import isolate
+from data.processors.graph import GraphRepresentation
+from data.wire import graph_to_columns, iter_ndjson
+
+ALL_SPLITS = {'SameArticleComparator': {'base_weight': 1.0, 'only_root': False}}
+CONFS = {
+    'default': {},
+    # CentralityDegreeCalculator counts implicit edges, the non-strict top-k filter needs them expanded
+    'degree': isolate({**ALL_SPLITS, 'ReplyToComparator': {'base_weight': 1.0, 'only_root': False},
+                       'CentralityDegreeCalculator': {},
+                       'DegreeCentralityBottomFilter': {'top_k': 20, 'strict': False, 'descending_order': True}}),
+    'pagerank': isolate({**ALL_SPLITS, 'SameCommentComparator': {'base_weight': 1.0, 'only_consecutive': True},
+                         'PageRanker': {'num_iterations': 50, 'd': 0.85, 'edge_type': 'SAME_ARTICLE',
+                                        'use_power_mode': True},
+                         'PageRankBottomFilter': {'top_k': 30, 'strict': True, 'descending_order': True}}),
+    # pushed into the comparisons, then merging on SAME_ARTICLE needs the edges
+    'merge': isolate({**ALL_SPLITS, 'TemporalComparator': {'base_weight': 1.0, 'only_root': True, 'max_time': 3600},
+                      'SameArticleEdgeFilter': {'threshold': 0.5, 'smaller_as': False},
+                      'SameArticleNodeMerger': {'threshold': 0.5, 'smaller_as': False}}),
+}
+
+
+def _explicit(conf: dict) -> dict:
+    section = conf.get('SameArticleComparator', {})
+    return {**conf, 'SameArticleComparator': {**section, 'implicit': False}}
+
+
+def _expanded(graph: GraphRepresentation):
+    implicit.expand(graph)
+    edges = {(edge.src, edge.tgt): edge.wgts.dict() for edge in graph.edges}
+    assert len(edges) == len(graph.edges)
+    splits = [{key: round(value, 9) if isinstance(value, float) else value for key, value in split.wgts.dict().items()}
+              for comment in graph.comments for split in comment.splits]
+    return edges, splits
+
+
+def test_implicit_edges_expand_to_the_explicit_graph():
+    comments = synthetic.generate(60, num_articles=3, seed=7)
+    for name, conf in CONFS.items():
+        graph = GraphRepresentation(comments, conf=conf)
+        explicit = GraphRepresentation(comments, conf=_explicit(conf))
+        assert not explicit.groups
+        if name == 'default':
+            # one group per article, only its explicit edges are stored
+            assert len(graph.groups) == 3
+            assert len(graph.edges) < len(explicit.edges)
+        assert _expanded(graph) == _expanded(explicit), name
+
+
+def test_filtered_pairs_of_groups_are_excluded():
+    comments = synthetic.generate(40, num_articles=2, seed=2)
+    conf = isolate({**ALL_SPLITS, 'ReplyToComparator': {'base_weight': 1.0, 'only_root': True}})
+    graph = GraphRepresentation(comments, conf=conf)
+    explicit = GraphRepresentation(comments, conf=_explicit(conf))
+    for g in (graph, explicit):
+        implicit.filter_edges(g, lambda wgts: not wgts.REPLY_TO)
+    assert not graph.edges and sum(len(group.excluded) for group in graph.groups) > 0
+    assert _expanded(graph) == _expanded(explicit)
+
+
+def test_groups_on_the_wire():
+    comments = synthetic.generate(20, num_articles=2, seed=1)
+    graph = models.Graph(**GraphRepresentation(comments).__dict__())
+    groups = graph_to_columns(graph)['groups']
+    assert groups['tp'] == ['SAME_ARTICLE'] * len(graph.groups)
+    assert groups['node_offsets'][-1] == len(groups['node_comment']) == sum(len(g.nodes) for g in graph.groups)
+    lines = list(iter_ndjson(graph))
+    assert b'"type":"groups"' in lines[-2]
+    assert models.Graph.parse_raw(graph.json()).groups == graph.groups
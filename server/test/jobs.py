@@ -0,0 +1,84 @@
+import threading
+import time
+
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.jobs as jobs
+import data.models as models
+
+
+def make_app(monkeypatch, max_concurrent):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    import api.routes.graph as graph
+
+    release = threading.Event()
+    builds = []
+
+    async def get_graph(article_ids, conf, override_cache, ignore_cache, progress, tracer):
+        def build():
+            builds.append(article_ids)
+            progress('index', 1, 1)
+            progress('comparisons', 0, 3)
+            release.wait(5)
+            progress('comparisons', 3, 3)
+            return models.Graph(article_ids=article_ids, comments=[], id2idx={}, edges=[])
+        return await jobs.cache.run_in_threadpool(build)
+
+    monkeypatch.setattr(jobs.cache, 'get_graph', get_graph)
+    monkeypatch.setattr(jobs, 'queue', jobs.GraphJobQueue(max_concurrent=max_concurrent))
+
+    app = FastAPI()
+    app.include_router(graph.router, prefix='/api/graph')
+    return TestClient(app), release, builds
+
+
+def wait_for(client, job_id, state):
+    for _ in range(100):
+        status = client.get(f'/api/graph/jobs/{job_id}').json()
+        if status['state'] == state:
+            return status
+        time.sleep(.05)
+    raise AssertionError(f'job {job_id} not {state}: {status}')
+
+
+def test_jobs_are_deduplicated_and_bounded(monkeypatch):
+    client, release, builds = make_app(monkeypatch, max_concurrent=1)
+    with client:
+        first = client.post('/api/graph/jobs', json={'article_ids': [1, 2]})
+        assert first.status_code == 202
+        job_id = first.json()['job_id']
+        assert client.post('/api/graph/jobs', json={'article_ids': [2, 1]}).json()['job_id'] == job_id
+        uncached = client.post('/api/graph/jobs', json={'article_ids': [1, 2]}, params={'ignore_cache': True})
+        assert uncached.json()['job_id'] != job_id
+
+        # only one job runs at a time
+        running = wait_for(client, job_id, 'RUNNING')
+        assert running['stages'][:1] == [{'stage': 'index', 'done': 1, 'total': 1}]
+        other = client.post('/api/graph/jobs', json={'article_ids': [3]}).json()
+        assert other['state'] == 'QUEUED' and other['position'] == 1
+        assert client.get(f'/api/graph/jobs/{job_id}/result').status_code == 202
+
+        release.set()
+        done = wait_for(client, job_id, 'DONE')
+        assert done['stages'][-1] == {'stage': 'comparisons', 'done': 3, 'total': 3}
+        result = client.get(f'/api/graph/jobs/{job_id}/result')
+        assert result.status_code == 200 and result.json()['article_ids'] == [1, 2]
+
+        wait_for(client, other['job_id'], 'DONE')
+        assert builds == [[1, 2], [1, 2], [3]]
+        assert client.get('/api/graph/jobs/unknown').status_code == 404
+
+
+def test_progress_over_websocket(monkeypatch):
+    client, release, builds = make_app(monkeypatch, max_concurrent=2)
+    with client:
+        job_id = client.post('/api/graph/jobs', json={'article_ids': [1]}).json()['job_id']
+        with client.websocket_connect(f'/api/graph/jobs/{job_id}/ws') as websocket:
+            messages = [websocket.receive_json()]
+            release.set()
+            while messages[-1]['state'] != 'DONE':
+                messages.append(websocket.receive_json())
+        assert messages[-1]['stages'][-1] == {'stage': 'comparisons', 'done': 3, 'total': 3}
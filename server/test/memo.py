@@ -0,0 +1,73 @@
+from datetime import datetime
+import asyncio
+
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.cache as cache
+import data.database as db
+import data.models as models
+from data import synthetic
+from data.backends import create_backend
+from data.processors import memo
+from data.processors.graph import GraphRepresentation, compile_plan
+from data.processors.tracing import Tracer
+
+
+def _graph(comments, conf: dict, tracer: Tracer = None) -> models.Graph:
+    return models.Graph(**GraphRepresentation(comments, conf=conf, tracer=tracer).__dict__())
+
+
+def test_changed_late_filter_reuses_earlier_stages():
+    memo.STAGES.clear()
+    comments = synthetic.generate(60, num_articles=2, seed=5)
+    _graph(comments, {})
+    # after the comparisons and every wave but the last
+    plan = compile_plan({})
+    assert len(memo.STAGES.values) == len(plan.waves)
+    assert plan.copy_splits[0] and not plan.copy_splits[-1]
+    conf = {'PageRankBottomFilter': {'top_k': 12}}
+    tracer = Tracer()
+    graph = _graph(comments, conf, tracer=tracer)
+
+    stages = [span.name for span in tracer.spans]
+    assert stages[0] == 'memo'
+    assert not {'comparisons', 'PageRanker', 'VotesFilter'} & set(stages)
+    assert 'PageRankBottomFilter' in stages
+    assert graph == _graph(comments, {**conf, 'GraphRepresentation': {'memo': False}})
+
+    # other comments share no stage
+    tracer = Tracer()
+    _graph(synthetic.generate(60, num_articles=2, seed=6), conf, tracer=tracer)
+    assert 'comparisons' in [span.name for span in tracer.spans]
+
+
+def test_builds_of_stored_comments_reuse_stages(monkeypatch, tmp_path):
+    # the path of the server: comments are loaded as columns (data.columnar) and built with the default config
+    backend = create_backend(f'sqlite:///{tmp_path / "store.db"}', common.config)
+    monkeypatch.setattr(db, 'backend', backend)
+    monkeypatch.setattr(db, 'database', backend.database)
+    memo.STAGES.clear()
+    article = models.ArticleScraped(url='https://www.example.com/memo.html', title='Memo', text='Lorem ipsum.',
+                                    published_time=datetime(2020, 4, 1), scraper='test')
+    conf = {'PageRankBottomFilter': {'top_k': 12}}
+    tracer = Tracer()
+
+    async def build():
+        await db.connect()
+        try:
+            article_id = await db.insert_article_with_comments(article, synthetic.generate(60, seed=5))
+            await cache.get_graph(article_ids=[article_id], ignore_cache=True)
+            graph = await cache.get_graph(article_ids=[article_id], conf=conf, ignore_cache=True, tracer=tracer)
+            rebuilt = await cache.get_graph(article_ids=[article_id], ignore_cache=True,
+                                            conf={**conf, 'GraphRepresentation': {'memo': False}})
+            return graph, rebuilt
+        finally:
+            await db.disconnect()
+
+    graph, rebuilt = asyncio.run(build())
+    stages = [span.name for span in tracer.spans]
+    assert 'memo' in stages and 'PageRankBottomFilter' in stages
+    assert not {'index', 'comparisons', 'PageRanker'} & set(stages)
+    assert graph == rebuilt and graph.edges
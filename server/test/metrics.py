@@ -0,0 +1,46 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+from data.metrics import MetricsRegistry, Counter, Histogram
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = Counter('test_requests_total', 'Requests', ['result'], registry=registry)
+    latency = Histogram('test_seconds', 'Latency', ['stage'], buckets=(.1, 1.), registry=registry)
+
+    requests.inc(result='hit')
+    requests.inc(2, result='say "hi"\n')
+    for value in [.05, .1, .5, 3.]:
+        latency.observe(value, stage='PageRanker')
+
+    assert registry.render().splitlines() == [
+        '# HELP test_requests_total Requests',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{result="hit"} 1.0',
+        r'test_requests_total{result="say \"hi\"\n"} 2.0',
+        '# HELP test_seconds Latency',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{stage="PageRanker",le="0.1"} 2',
+        'test_seconds_bucket{stage="PageRanker",le="1.0"} 3',
+        'test_seconds_bucket{stage="PageRanker",le="+Inf"} 4',
+        'test_seconds_sum{stage="PageRanker"} 3.65',
+        'test_seconds_count{stage="PageRanker"} 4',
+    ]
+    assert latency.get(stage='PageRanker') == (4, 3.65)
+
+
+def test_metrics_route():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    import api.routes.metrics as metrics
+    from data.metrics import GRAPH_CACHE
+
+    app = FastAPI()
+    app.include_router(metrics.router, prefix='/api/metrics')
+    GRAPH_CACHE.inc(result='hit')
+    response = TestClient(app).get('/api/metrics/')
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE comex_db_query_seconds histogram' in response.text
+    assert 'comex_graph_cache_requests_total{result="hit"}' in response.text
@@ -0,0 +1,18 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+from data import synthetic
+from data.processors.graph import GraphRepresentation, compile_plan
+
+
+def test_equal_configs_share_a_plan():
+    plan = compile_plan({'VotesFilter': {'threshold': 3}, 'GraphRepresentation': {'memo': False}})
+    # values and options as ConfigParser reads them
+    assert compile_plan({'GraphRepresentation': {'MEMO': 'False'}, 'VotesFilter': {'threshold': '3'}}) is plan
+    assert compile_plan({'VotesFilter': {'threshold': 4}, 'GraphRepresentation': {'memo': False}}) is not plan
+    assert plan.conf.getint('VotesFilter', 'threshold') == 3
+
+    graph = GraphRepresentation(synthetic.generate(20, seed=3),
+                                conf={'VotesFilter': {'threshold': 3}, 'GraphRepresentation': {'memo': False}})
+    assert graph.plan is plan
@@ -3,11 +3,21 @@ from server.main import run
 from urllib.parse import quote
 import data.models as models
 import pytest
+import os
 
 server = run(['--config', 'configs/testing.ini'])
 
 client = TestClient(server.app)
 
+# scrapes recorded with scripts/scraper_replay.py record --output test/recordings run offline, others live
+if os.path.isdir('test/recordings'):
+    from requests.adapters import HTTPAdapter
+    from data.scrapers import http
+    from data.scrapers.replay import ReplayAdapter, load_recordings
+    replay_adapter = ReplayAdapter(load_recordings('test/recordings'), fallback=HTTPAdapter())
+    http.mount('http://', replay_adapter)
+    http.mount('https://', replay_adapter)
+
 
 def _test_platform(urls):
     for url in urls:
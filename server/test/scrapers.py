@@ -0,0 +1,45 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import requests
+from data.scrapers import Scraper, replay
+
+ARTICLE = 'https://www.example.com/article.html'
+API = 'https://api.example.com/comments.json'
+RECORDING = {'scraper': 'Scraper', 'url': ARTICLE, 'recorded': '2020-04-01T08:00:00', 'comments': 1, 'exchanges': [
+    {'method': 'GET', 'url': ARTICLE, 'body': None, 'status': 200,
+     'headers': {'Content-Type': 'text/html; charset=utf-8'}, 'content': '<html><h1>Überschrift</h1></html>'},
+    {'method': 'GET', 'url': f'{API}?page=2', 'body': None, 'status': 200,
+     'headers': {'Content-Type': 'application/json'}, 'content': '{"comments": [{"id": 1}]}'},
+    {'method': 'POST', 'url': API, 'body': '{"query": 1}', 'status': 200,
+     'headers': {'Content-Type': 'application/json'}, 'content': '{"data": "post"}'}
+]}
+
+
+def _scrape():
+    return (Scraper.get_html(ARTICLE).h1.get_text(), Scraper.get_json(API, params={'page': 2}),
+            Scraper.post_json(API, '{"query": 1}', headers={'Content-Type': 'application/json'}),
+            Scraper.get_json(API, params={'page': 3}))
+
+
+def test_replay_adapter(tmp_path):
+    path = replay.save_recording(str(tmp_path), RECORDING)
+    assert replay.load_recordings(str(tmp_path)) == [RECORDING] == replay.load_recordings(path)
+
+    with replay.mounted(replay.ReplayAdapter([RECORDING])):
+        # the last request wasn't recorded and fails like a request without network
+        assert _scrape() == ('Überschrift', {'comments': [{'id': 1}]}, {'data': 'post'}, None)
+
+
+def test_replay_server_and_recording():
+    with replay.ReplayServer([RECORDING]) as server:
+        # recording through the replay server gives the recorded exchanges back
+        with replay.mounted(replay.RecordingAdapter(replay.ForwardAdapter(server.url))) as recorder:
+            assert _scrape() == ('Überschrift', {'comments': [{'id': 1}]}, {'data': 'post'}, None)
+        assert requests.get(f'{server.url}/https/www.example.com/missing').status_code == 404
+
+    exchanges = recorder.exchanges[:3]
+    assert [(e['method'], e['url'], e['body'], e['content']) for e in exchanges] == \
+           [(e['method'], e['url'], e['body'], e['content']) for e in RECORDING['exchanges']]
+    assert recorder.exchanges[3]['status'] == 404
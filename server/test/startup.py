@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+from common import ModelRegistry
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+
+def test_entry_points_do_not_import_ml_libraries():
+    # fresh interpreter, the test session itself may already have imported them
+    probe = ('import sys, common\n'
+             'common.init_config(["--config", "configs/testing.ini"])\n'
+             'import main, api, data.database, data.cache\n'
+             'print("heavy:" + ",".join(m for m in ("tensorflow", "keras", "fasttext") if m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', probe], stdout=subprocess.PIPE, check=True,
+                            env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)})
+    # routes set up logging to stdout as well
+    assert 'heavy:' in result.stdout.decode().splitlines()
+
+
+def test_model_registry_loads_once():
+    calls = []
+    registry = ModelRegistry()
+    registry.register('model', lambda: calls.append(1) or object())
+    assert not registry.is_loaded('model')
+
+    with ThreadPoolExecutor(8) as executor:
+        models = list(executor.map(lambda _: registry.get('model'), range(32)))
+
+    assert len(calls) == 1
+    assert all(model is models[0] for model in models)
+    assert registry.is_loaded('model')
+
+
+def test_ready_after_preload(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    import api.routes.ready as ready
+
+    registry = ModelRegistry()
+    warmed_up = []
+    registry.register('model', lambda: 'model', warmup=warmed_up.append)
+    registry.register('broken', lambda: 1 / 0)
+    registry.register('unused', lambda: 'unused')
+    monkeypatch.setattr(ready, 'model_registry', registry)
+
+    app = FastAPI()
+    app.include_router(ready.router, prefix='/api/ready')
+    client = TestClient(app)
+
+    registry.preload(['model']).join()
+    response = client.get('/api/ready/')
+    assert response.status_code == 200
+    assert warmed_up == ['model']
+    models = response.json()['models']
+    assert models['model']['state'] == 'ready' and models['model']['preload']
+    assert models['unused']['state'] == 'not_loaded' and not models['unused']['preload']
+
+    registry.preload(['model', 'broken']).join()
+    response = client.get('/api/ready/')
+    assert response.status_code == 503
+    assert response.json()['models']['broken']['state'] == 'failed'
+    assert 'ZeroDivisionError' in response.json()['models']['broken']['error']
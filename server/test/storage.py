@@ -0,0 +1,138 @@
+# Runs the same checks against every storage backend.
+# PostgreSQL uses COMEX_TEST_POSTGRES_URL if set, otherwise a throwaway local server from `pgserver`
+# (pip install pgserver), and is skipped if neither is available.
+from datetime import datetime, timedelta
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.database as db
+import data.models as models
+from data.backends import create_backend
+
+_postgres_server = None
+
+
+def _postgres_url():
+    global _postgres_server
+    url = os.environ.get('COMEX_TEST_POSTGRES_URL')
+    if url:
+        return url
+    if _postgres_server is None:
+        pgserver = pytest.importorskip('pgserver')
+        _postgres_server = pgserver.get_server(tempfile.mkdtemp(), cleanup_mode='stop')
+    return _postgres_server.get_uri()
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def backend(request, monkeypatch, tmp_path):
+    if request.param == 'sqlite':
+        url = f'sqlite:///{tmp_path / "store.db"}'
+    else:
+        url = _postgres_url()
+    backend = create_backend(url, common.config)
+    monkeypatch.setattr(db, 'backend', backend)
+    monkeypatch.setattr(db, 'database', backend.database)
+    return backend
+
+
+def run(backend, test):
+    async def wrapper():
+        await db.connect()
+        try:
+            if backend.url.startswith('postgres'):
+                await db.database.execute('TRUNCATE articles, comments, graphs RESTART IDENTITY CASCADE')
+            await test()
+        finally:
+            await db.disconnect()
+
+    asyncio.run(wrapper())
+
+
+def make_article(i=0):
+    return models.ArticleScraped(url=f'https://www.example.com/article-{i}.html',
+                                 title=f'Article {i}',
+                                 text='Lorem ipsum dolor sit amet.',
+                                 published_time=datetime(2020, 4, 1),
+                                 scraper='test')
+
+
+def make_comments(n=10):
+    return [models.CommentScraped(username=f'user{i % 3}',
+                                  comment_id=f'c{i}',
+                                  timestamp=datetime(2020, 4, 1) + timedelta(minutes=i),
+                                  text=f'Kommentar {i}.',
+                                  # the first comment replies to one that is stored after it
+                                  reply_to=f'c{i - 1}' if i else f'c{n - 1}',
+                                  upvotes=i)
+            for i in range(n)]
+
+
+def test_ingest(backend):
+    async def test():
+        article_id = await db.insert_article_with_comments(make_article(), make_comments())
+        article = await db.get_article_with_comments(article_id=article_id)
+
+        assert article.url == make_article().url
+        assert [c.comment_id for c in article.comments] == [f'c{i}' for i in range(10)]
+        ids = {c.comment_id: c.id for c in article.comments}
+        assert [c.reply_to_id for c in article.comments] == [ids['c9']] + [ids[f'c{i}'] for i in range(9)]
+
+    run(backend, test)
+
+
+def test_failed_ingest_is_rolled_back(backend):
+    async def test():
+        # comment_id is NOT NULL, so the last comment fails after the article was inserted
+        comments = make_comments() + [models.CommentScraped.construct(username='user', comment_id=None)]
+        with pytest.raises(Exception):
+            await db.insert_article_with_comments(make_article(), comments)
+        assert await db.get_article(url=make_article().url) is None
+
+    run(backend, test)
+
+
+def test_comment_columns(backend):
+    async def test():
+        article_ids = [await db.insert_article_with_comments(make_article(i), make_comments())
+                       for i in range(2)]
+        comments = await db.get_comments(article_ids)
+        columns = (await db.get_comment_columns(article_ids)).rows()
+
+        assert [c.id for c in columns] == [c.id for c in comments]
+        assert [c.reply_to_id for c in columns] == [c.reply_to_id for c in comments]
+        assert [c.timestamp for c in columns] == [c.timestamp for c in comments]
+        assert [c.text for c in columns] == [c.text for c in comments]
+        assert [c.upvotes for c in columns] == [c.upvotes for c in comments]
+
+        # the timestamp column is nullable
+        undated = models.CommentScraped.construct(username='user', comment_id='undated', text='Ohne Datum.')
+        article_id = await db.insert_article_with_comments(make_article(2), [undated])
+        assert [c.timestamp for c in (await db.get_comment_columns([article_id])).rows()] == [None]
+
+    run(backend, test)
+
+
+def test_graphs(backend):
+    async def test():
+        a, b, c = [await db.insert_article(make_article(i)) for i in range(3)]
+        graph = models.Graph(comments=[], id2idx={}, edges=[])
+        ab = await db.store_graph([b, a], graph)
+        bc = await db.store_graph([b, c], graph)
+
+        stored = await db.get_graph([a, b])
+        assert stored.graph_id == ab
+        assert stored.article_ids == [a, b]
+        assert await db.get_graph([a, c]) is None
+
+        await db.delete_edges(article_id=a)
+        assert await db.get_graph([a, b]) is None
+        assert (await db.get_graph([c, b])).graph_id == bc
+
+    run(backend, test)
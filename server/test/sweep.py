@@ -0,0 +1,27 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.models as models
+from data import synthetic
+from data.processors.benchmark import isolate
+from data.processors.graph import GraphRepresentation
+from data.processors.sweep import sweep
+from test.configuration_testing import CONFIGURATIONS
+
+
+def test_sweep_reuses_comparisons():
+    comments = synthetic.generate(25, seed=3)
+    names = ['SC_PRB_k50', 'SC_PR_t001', 'RT_PRB', 'SC_VB', 'SC_merge_01', 'SC_PRB_no_consec', 'SC_RB']
+    configurations = [(name, dict(CONFIGURATIONS)[name]) for name in names]
+    rows = sweep(comments, configurations, keep_graphs=True)
+
+    assert [row['configuration'] for row in rows] == names
+    assert [row['reused'] for row in rows] == [False, True, False, True, True, False, True]
+    assert rows[1]['comparisons_wall'] == 0. and rows[0]['comparisons_wall'] > 0.
+    for (name, conf), row in zip(configurations, rows):
+        assert 'error' not in row
+        # same graph as building the configuration from scratch
+        built = models.Graph(**GraphRepresentation(comments, conf=isolate(conf)).__dict__())
+        assert row['graph'] == built, name
+        assert row['edges'] == len(built.edges)
@@ -0,0 +1,25 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+from data import synthetic
+from data.processors.text import split_comment
+
+
+def test_generate_is_deterministic():
+    comments = synthetic.generate(300, num_articles=3, seed=7)
+    assert comments == synthetic.generate(300, num_articles=3, seed=7)
+    assert comments != synthetic.generate(300, num_articles=3, seed=8)
+
+    assert len(comments) == 300 and [c.id for c in comments] == list(range(300))
+    assert {c.article_id for c in comments} == {1, 2, 3}
+    by_id = {c.id: c for c in comments}
+    replies = [c for c in comments if c.reply_to_id is not None]
+    assert 0 < len(replies) < 300
+    for reply in replies:
+        parent = by_id[reply.reply_to_id]
+        assert parent.article_id == reply.article_id and parent.timestamp <= reply.timestamp
+        assert reply.reply_to == parent.comment_id
+    assert all(len(split_comment(c).splits) >= 1 for c in comments)
+    assert all(c.upvotes >= 0 and c.downvotes >= 0 for c in comments)
+    assert any(c.upvotes == 0 for c in comments)
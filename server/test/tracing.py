@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.models as models
+from data.processors.graph import GraphRepresentation
+from data.processors.tracing import Tracer
+
+
+def make_comments(n=10):
+    return [models.CommentCached(id=i, article_id=1, username=f'user{i % 3}', comment_id=f'c{i}',
+                                 timestamp=datetime(2020, 4, 1) + timedelta(minutes=10 * i),
+                                 text=f'Kommentar {i}. Noch ein Satz zu Kommentar {i}.',
+                                 reply_to_id=i - 1 if i else None, upvotes=i)
+            for i in range(n)]
+
+
+def test_spans_of_graph_build():
+    tracer = Tracer(memory=True, comparators=True)
+    graph = GraphRepresentation(make_comments(), tracer=tracer)
+    spans = {span.name: span for span in tracer.spans}
+
+    assert list(spans)[:3] == ['split', 'index', 'comparisons']
+    assert {'SameArticleComparator', 'ReplyToComparator', 'PageRanker'} <= set(spans)
+    assert spans['comparisons'].edges_in == 0 and spans['comparisons'].cpu > 0
+    # 20 splits, every comparator sees every pair, edges are the pairs at least one comparator weighted
+    assert spans['ReplyToComparator'].edges_in == spans['SameArticleComparator'].edges_in == 190
+    assert spans['comparisons'].edges_out >= spans['SameCommentComparator'].edges_out == 10
+    assert spans['ReplyToComparator'].edges_out == 9
+    assert tracer.spans[-1].edges_out == len(graph.edges)
+    assert spans['comparisons'].memory is None or spans['comparisons'].memory > 0
+
+    header = tracer.server_timing()
+    assert header.startswith('split;dur=') and ', comparisons;dur=' in header
+    assert tracer.debug()['spans'][2]['name'] == 'comparisons'
+
+
+def test_comparators_untraced_by_default():
+    tracer = Tracer()
+    GraphRepresentation(make_comments(), conf={'GraphRepresentation': {'memo': False}}, tracer=tracer)
+    names = [span.name for span in tracer.spans]
+
+    assert 'comparisons' in names and 'PageRanker' in names
+    assert not {'SameArticleComparator', 'ReplyToComparator'} & set(names)
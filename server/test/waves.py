@@ -0,0 +1,24 @@
+import common
+
+common.init_config(['--config', 'configs/testing.ini'])
+
+import data.models as models
+from data import synthetic
+from data.processors.graph import GraphRepresentation, MODIFIERS, Plan, graph_config
+
+
+def test_independent_modifiers_run_in_one_wave():
+    conf = graph_config()
+    modifiers = [modifier(conf=conf) for modifier in MODIFIERS if modifier.is_on(conf)]
+    waves = [[modifier.__class__.__name__ for modifier in wave] for wave in Plan._waves(modifiers)]
+    # the rankers only read the edges and write their own weights, the filters read those and change the edges
+    assert set(waves[0]) == {'PageRanker', 'CentralityDegreeCalculator', 'SizeRanker', 'VotesRanker',
+                             'RecencyRanker'}
+    assert waves[1:] == [['VotesFilter'], ['PageRankBottomFilter'], ['ReplyToNodeMerger'], ['GenericSingleEdgeAdder']]
+
+
+def test_parallel_modifiers_build_the_same_graph():
+    comments = synthetic.generate(60, num_articles=2, seed=8)
+    confs = [{'GraphRepresentation': {'workers': workers, 'memo': False}} for workers in [1, 4]]
+    graphs = [models.Graph(**GraphRepresentation(comments, conf=conf).__dict__()) for conf in confs]
+    assert graphs[0] == graphs[1]
@@ -0,0 +1,74 @@
+import json
+import struct
+
+import numpy as np
+
+import data.models as models
+import data.wire as wire
+
+
+def make_graph():
+    comments = [models.SplitComment(id=10, grp_id=None,
+                                    splits=[models.Split(s=0, e=5, wgts=models.SplitWeights(SIZE=5)),
+                                            models.Split(s=6, e=9, wgts=models.SplitWeights(SIZE=3, PAGERANK=.5))]),
+                models.SplitComment(id=11, grp_id=2,
+                                    splits=[models.Split(s=0, e=4, wgts=models.SplitWeights(SIZE=4))])]
+    edges = [models.Edge(src=(0, 0), tgt=(0, 1), wgts=models.EdgeWeights(SAME_COMMENT=1.)),
+             models.Edge(src=(1, 0), tgt=(0, 0), wgts=models.EdgeWeights(REPLY_TO=1., SIMILARITY=.25))]
+    # id2idx keys are strings when the graph comes from the cache
+    return models.Graph(article_ids=[1], graph_id=3, comments=comments, id2idx={'10': 0, '11': 1}, edges=edges)
+
+
+def test_negotiate():
+    assert wire.negotiate(None) == wire.GRAPH_V1
+    assert wire.negotiate('*/*') == wire.GRAPH_V1
+    assert wire.negotiate(f'{wire.GRAPH_V2_BINARY}, {wire.GRAPH_V2_JSON};q=0.9') == wire.GRAPH_V2_BINARY
+    assert wire.negotiate(f'{wire.GRAPH_V1}, {wire.GRAPH_V2_JSON};q=0.5') == wire.GRAPH_V1
+    assert wire.negotiate(f'{wire.GRAPH_V1};q=0.5, {wire.GRAPH_V2_JSON}') == wire.GRAPH_V2_JSON
+    # q=0 means not acceptable
+    assert wire.negotiate(f'{wire.GRAPH_V2_JSON};q=0') == wire.GRAPH_V1
+    assert wire.negotiate(f'{wire.GRAPH_V2_BINARY};q=0, {wire.GRAPH_V2_JSON};q=0.1') == wire.GRAPH_V2_JSON
+
+
+def test_json_omits_nulls():
+    graph = json.loads(wire.encode(make_graph(), wire.GRAPH_V2_JSON))
+    assert graph['id2idx'] == {'id': [10, 11], 'idx': [0, 1]}
+    assert graph['comments'] == {'id': [10, 11], 'split_offsets': [0, 2, 3], 'grp_id': {'idx': [1], 'val': [2]}}
+    assert graph['splits']['wgts'] == {'SIZE': {'val': [5., 3., 4.]}, 'PAGERANK': {'idx': [1], 'val': [.5]}}
+    assert graph['edges']['src_comment'] == [0, 1] and graph['edges']['tgt_split'] == [1, 0]
+    assert graph['edges']['wgts'] == {'REPLY_TO': {'idx': [1], 'val': [1.]},
+                                      'SIMILARITY': {'idx': [1], 'val': [.25]},
+                                      'SAME_COMMENT': {'idx': [0], 'val': [1.]}}
+
+
+def test_binary_matches_json():
+    data = wire.encode(make_graph(), wire.GRAPH_V2_BINARY)
+    assert data[:4] == wire.MAGIC
+    header_length = struct.unpack('<I', data[4:8])[0]
+    assert (8 + header_length) % 8 == 0
+    buffers = data[8 + header_length:]
+
+    def resolve(node):
+        if isinstance(node, dict) and '$' in node:
+            dtype, offset, length = node['$']
+            assert offset % 8 == 0
+            return np.frombuffer(buffers, dtype=wire.DTYPES[dtype], count=length, offset=offset).tolist()
+        if isinstance(node, dict):
+            return {key: resolve(value) for key, value in node.items()}
+        return node
+
+    assert resolve(json.loads(data[8:8 + header_length])) == json.loads(wire.encode(make_graph(), wire.GRAPH_V2_JSON))
+
+
+def test_ndjson_nodes_before_edges():
+    graph = make_graph()
+    lines = [json.loads(line) for line in wire.iter_ndjson(graph, chunk_size=1)]
+    assert [line['type'] for line in lines] == ['meta', 'comments', 'comments', 'edges', 'edges', 'end']
+    assert lines[0]['num_comments'] == 2 and lines[0]['num_edges'] == 2
+
+    v1 = json.loads(graph.json())
+    assert [c for line in lines[1:3] for c in line['comments']] == v1['comments']
+    assert [e for line in lines[3:5] for e in line['edges']] == v1['edges']
+
+    # stored graphs are streamed from plain dicts with the same result
+    assert list(wire.iter_ndjson(v1, chunk_size=1)) == list(wire.iter_ndjson(graph, chunk_size=1))
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from data.processors.word_vectors import WordVectors, export
+
+fasttext = pytest.importorskip('fasttext')
+
+WORDS = 'Das ist ein Kommentar über Straßenbahn und Zürich Öl Meinung Politik Regierung Bürger'.split()
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    random.seed(42)
+    corpus = tmp_path_factory.mktemp('fasttext') / 'corpus.txt'
+    corpus.write_text('\n'.join(' '.join(random.choice(WORDS) + str(random.randint(0, 30)) for _ in range(20))
+                                for _ in range(2000)) + '\n')
+    return fasttext.train_unsupervised(str(corpus), dim=16, minn=2, maxn=5, bucket=5000,
+                                       epoch=1, minCount=1, thread=1, verbose=0)
+
+
+def test_same_vectors_as_fasttext(model, tmp_path):
+    export(model, str(tmp_path))
+    store = WordVectors(str(tmp_path))
+    assert store.get_dimension() == model.get_dimension()
+
+    # known words, unknown words, multi byte characters
+    for word in model.get_words()[:50] + ['Straßenbahnen', 'Zürich', 'Öl99', '€uro', 'Ü', '</s>']:
+        np.testing.assert_allclose(store.get_word_vector(word), model.get_word_vector(word), atol=1e-6)
+
+    for text in ['Das ist ein Kommentar über die Straßenbahn', '  Zürich  Öl3\tPolitik ', '']:
+        np.testing.assert_allclose(store.get_sentence_vector(text), model.get_sentence_vector(text), atol=1e-6)
+
+
+def test_pruned_half_precision(model, tmp_path):
+    export(model, str(tmp_path), dtype='float16', max_words=100)
+    store = WordVectors(str(tmp_path))
+    assert store.vectors.dtype == np.float16
+    assert store.nwords == 100
+    assert store.get_word_id(model.get_words()[100]) == -1
+
+    for word in model.get_words()[:100]:
+        np.testing.assert_allclose(store.get_word_vector(word), model.get_word_vector(word), atol=1e-2)
+
+
+def test_without_subwords(model, tmp_path):
+    export(model, str(tmp_path), subwords=False)
+    store = WordVectors(str(tmp_path))
+    assert len(store.vectors) == len(model.get_words())
+    assert not store.get_word_vector('Unbekannt').any()